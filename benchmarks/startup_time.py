@@ -0,0 +1,68 @@
+# benchmarks/startup_time.py - Tempo di avvio del tool con backend lazy vs import eager.
+"""
+Misura il tempo di import dell'interfaccia (cli.cli) in un interprete nuovo:
+- lazy: come all'avvio reale, i backend opzionali non vengono importati
+- eager: cli.cli più l'import esplicito dei backend installati (comportamento precedente)
+Verifica anche che l'import di cli.cli non carichi nessun backend (numpy, dnspython, ...)
+Uso: python benchmarks/startup_time.py [ripetizioni]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from network.backends import BACKENDS, availability  # noqa: E402
+
+
+def _measure(code, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _check_lazy():
+    """Package radice dei backend importati da cli.cli (attesi: nessuno)."""
+    roots = sorted({module.split(".", 1)[0] for module in BACKENDS.values()})
+    code = (
+        "import sys, cli.cli\n"
+        f"print(','.join(m for m in {roots!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    loaded = [m for m in out.stdout.strip().split(",") if m]
+    assert not loaded, f"Backend importati all'avvio: {', '.join(loaded)}"
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    _check_lazy()
+    installed = [
+        BACKENDS[name] for name, state in availability().items() if state["installed"]
+    ]
+    baseline = _measure("pass", repeat)
+    lazy = _measure("import cli.cli", repeat)
+    eager = _measure(
+        "import cli.cli\n" + "".join(f"import {m}\n" for m in installed), repeat
+    )
+    print(f"Backend installati: {', '.join(installed) or 'nessuno'}")
+    print(f"Interprete vuoto:     {baseline * 1000:8.1f} ms")
+    print(f"Avvio lazy (attuale): {lazy * 1000:8.1f} ms")
+    print(f"Avvio eager:          {eager * 1000:8.1f} ms")
+    print(f"Risparmio:            {(eager - lazy) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
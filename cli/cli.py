@@ -1,19 +1,39 @@
 # cli/cli.py - Interfaccia Command Line (CLI) per la selezione e l'avvio delle azioni diagnostiche.
 """
 Gestisce la user experience su terminale:
-- Mostra il menu delle azioni disponibili (ping, traceroute, speedtest, stats, DNS, diagnosi avanzata, uscita)
+- Mostra il menu delle azioni disponibili (ping, traceroute, speedtest, stats, DNS, diagnosi avanzata, ping sweep, traceroute continuo, confronto resolver DNS, analisi risultati, campionamento interfacce, monitoraggio adattivo, uscita)
 - Valida l’input utente per sicurezza
 - Chiama i moduli diagnostici specifici
-- Integra logging e configurazione
+- Integra logging e configurazione (snapshot tipizzato config.settings)
 """
 
+import configparser
+
+from cli.render import (
+    render_dns,
+    render_ping,
+    render_report,
+    render_speedtest,
+    render_stats,
+    render_topology,
+    render_traceroute,
+    rendered,
+)
 from logs.custom_logging import LogManager
+from network.adaptive import default_stages, run_adaptive_diag
+from network.analysis import run_analysis_diag
+from network.dns_async import run_resolver_comparison
 from network.dns_utils import run_dns_diag
-from network.ping import run_ping_diag
+from network.icmp_transport import get_transport
+from network.mtr import run_mtr_diag
+from network.orchestrator import run_full_diag
+from network.ping import load_targets, run_ping_diag, run_ping_sweep
 from network.speedtest import run_speedtest_diag
-from network.stats import run_stats_diag
-from network.traceroute import run_traceroute_diag
+from network.stats import run_stats_diag, run_stats_sampling_diag
+from network.traceroute import run_multi_traceroute_diag, run_traceroute_diag
+from security.rate_limiter import configure_budget
 from security.security import validate_address
+from storage.columnar_store import get_store
 
 
 class CliMenu:
@@ -31,7 +51,14 @@ class CliMenu:
         print("4) Statistiche di rete")
         print("5) DNS Check")
         print("6) Diagnosi avanzata")
-        print("7) Esci")
+        print("7) Ping sweep (file o rete CIDR)")
+        print("8) Traceroute continuo (MTR)")
+        print("9) Confronto resolver DNS")
+        print("10) Analisi risultati salvati")
+        print("11) Campionamento interfacce (throughput)")
+        print("12) Monitoraggio adattivo (diagnostica su degrado)")
+        print("13) Traceroute multi-destinazione (topologia)")
+        print("14) Esci")
         choice = input("Inserisci il numero dell'azione: ").strip()
         mapping = {
             "1": "ping",
@@ -40,10 +67,51 @@ class CliMenu:
             "4": "network_stats",
             "5": "dns_check",
             "6": "advanced_diag",
-            "7": "exit",
+            "7": "ping_sweep",
+            "8": "mtr",
+            "9": "dns_compare",
+            "10": "analysis",
+            "11": "stats_sampling",
+            "12": "adaptive",
+            "13": "multi_traceroute",
+            "14": "exit",
         }
         return mapping.get(choice, None)
 
+    def reload_config(self):
+        """Ricarica config.ini se modificato; in caso di errore resta lo snapshot attuale."""
+        try:
+            if self.config.reload_if_changed():
+                configure_budget(self.config.settings.security)
+                self.logger.info("Configurazione ricaricata.")
+        except (OSError, ValueError, configparser.Error) as e:
+            self.logger.warning(f"Configurazione non ricaricata: {e}")
+
+    def get_results_store(self):
+        """Store binario dei risultati ping, se configurato in [diagnostics] binary_store."""
+        path = self.config.settings.diagnostics.binary_store
+        if not path:
+            return None
+        try:
+            return get_store(path)
+        except (ImportError, OSError, ValueError) as e:
+            self.logger.error(f"Store binario non disponibile: {e}")
+            return None
+
+    def get_icmp_transport(self):
+        """
+        Trasporto ICMP condiviso se abilitato in [diagnostics] icmp_transport
+        (auto, dgram, raw); None = probe con ping3/scapy.
+        """
+        kind = self.config.settings.diagnostics.icmp_transport
+        if kind in ("", "off"):
+            return None
+        try:
+            return get_transport(kind)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Trasporto ICMP non disponibile ({kind}): {e}")
+            return None
+
     def get_target_address(self):
         address = input("Inserisci IP o dominio da diagnosticare: ").strip()
         if not validate_address(address):
@@ -55,37 +123,181 @@ class CliMenu:
     def run_ping(self):
         addr = self.get_target_address()
         if addr:
-            run_ping_diag(addr, self.logger, self.os_type)
+            result = run_ping_diag(
+                addr,
+                self.logger,
+                self.os_type,
+                max_ping_count=self.config.settings.security.max_ping_count,
+                transport=self.get_icmp_transport(),
+            )
+            render_ping(result)
 
     def run_traceroute(self):
         addr = self.get_target_address()
         if addr:
-            run_traceroute_diag(addr, self.logger, self.os_type)
+            network = self.config.settings.network
+            result = run_traceroute_diag(
+                addr, self.logger, self.os_type, network.max_hops, network.timeout
+            )
+            render_traceroute(result)
+
+    def run_multi_traceroute(self):
+        spec = input("Inserisci IP o domini separati da virgola: ")
+        addresses = [a.strip() for a in spec.split(",") if a.strip()]
+        if not addresses:
+            print("ERRORE: Nessuna destinazione indicata.")
+            return
+        network = self.config.settings.network
+        topology = run_multi_traceroute_diag(
+            addresses, self.logger, self.os_type, network.max_hops, network.timeout
+        )
+        render_topology(topology)
+
+    def run_mtr(self):
+        addr = self.get_target_address()
+        if addr:
+            network = self.config.settings.network
+            print("Traceroute continuo avviato, Ctrl+C per terminare.")
+            run_mtr_diag(
+                addr,
+                self.logger,
+                self.os_type,
+                max_hops=network.max_hops,
+                timeout=network.timeout,
+                interval=network.mtr_interval,
+                csvfile=network.mtr_csvfile,
+            )
 
     def run_speedtest(self):
-        run_speedtest_diag(self.logger)
+        speedtest = self.config.settings.speedtest
+        result = run_speedtest_diag(
+            self.logger,
+            cache_file=speedtest.cache_file,
+            cache_ttl=speedtest.cache_ttl,
+            server_id=speedtest.server_id or None,
+        )
+        render_speedtest(result)
 
     def run_network_stats(self):
-        run_stats_diag(self.logger)
+        render_stats(run_stats_diag(self.logger))
+
+    def run_stats_sampling(self):
+        network = self.config.settings.network
+        print("Campionamento interfacce avviato, Ctrl+C per terminare prima.")
+        run_stats_sampling_diag(
+            self.logger,
+            interval=network.stats_interval,
+            duration=network.stats_duration,
+            history=network.stats_history,
+        )
 
     def run_dns_check(self):
         addr = self.get_target_address()
         if addr:
-            run_dns_diag(addr, self.logger)
+            dns = self.config.settings.dns
+            result = run_dns_diag(
+                addr,
+                self.logger,
+                record_types=list(dns.record_types),
+                dns_timeout=dns.dns_timeout,
+                nameservers=list(dns.nameservers) or None,
+            )
+            render_dns(result)
 
-    def run_advanced_diag(self):
+    def run_dns_compare(self):
+        addr = self.get_target_address()
+        if addr:
+            dns = self.config.settings.dns
+            run_resolver_comparison(
+                addr,
+                self.logger,
+                list(dns.nameservers),
+                record_types=list(dns.record_types),
+                dns_timeout=dns.dns_timeout,
+                rounds=dns.compare_rounds,
+            )
+
+    def run_adaptive(self):
         addr = self.get_target_address()
         if addr:
-            # Parametri avanzati da config
-            filename = self.config.get(
-                "diagnostics", "csvfile", fallback="diagnostics.csv"
+            settings = self.config.settings
+            try:
+                stages = rendered(
+                    default_stages(
+                        self.logger,
+                        self.os_type,
+                        settings.adaptive.stages,
+                        csvfile=settings.diagnostics.csvfile,
+                        store=self.get_results_store(),
+                        transport=self.get_icmp_transport(),
+                    )
+                )
+            except ValueError as e:
+                self.logger.error(f"Configurazione [adaptive] non valida: {e}")
+                print(f"ERRORE: {e}")
+                return
+            print("Monitoraggio adattivo avviato, Ctrl+C per terminare.")
+            run_adaptive_diag(
+                addr,
+                self.logger,
+                self.os_type,
+                interval=settings.adaptive.interval,
+                timeout=settings.network.timeout,
+                stages=stages,
+                store=self.get_results_store(),
+                transport=self.get_icmp_transport(),
+                config=self.config,
+                **settings.adaptive.thresholds(),
             )
-            delay = self.config.getint("diagnostics", "delay", fallback=5)
-            run_ping_diag(
+
+    def run_advanced_diag(self):
+        addr = self.get_target_address()
+        if addr:
+            # Parametri avanzati da config: tutti gli stadi in parallelo
+            settings = self.config.settings
+            diagnostics = settings.diagnostics
+            report = run_full_diag(
                 addr,
                 self.logger,
                 self.os_type,
-                advanced=True,
-                csvfile=filename,
-                delay=delay,
+                stage_timeout=diagnostics.stage_timeout,
+                csvfile=diagnostics.csvfile,
+                store=self.get_results_store(),
+                scapy_count=diagnostics.scapy_count,
+                max_ping_count=settings.security.max_ping_count,
+                timeout=settings.network.timeout,
+                max_hops=settings.network.max_hops,
+                record_types=list(settings.dns.record_types),
+                dns_timeout=settings.dns.dns_timeout,
+                transport=self.get_icmp_transport(),
+                burst_spacing=diagnostics.burst_spacing_ms / 1000,
             )
+            render_report(report)
+
+    def run_ping_sweep(self):
+        spec = input("Inserisci file di target o rete CIDR: ").strip()
+        settings = self.config.settings
+        try:
+            targets = load_targets(spec, max_hosts=settings.security.max_sweep_hosts)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Target sweep non validi: {e}")
+            print(f"ERRORE: {e}")
+            return
+        rows = run_ping_sweep(
+            targets,
+            self.logger,
+            self.os_type,
+            max_workers=settings.network.sweep_workers,
+            timeout=settings.network.timeout,
+            csvfile=settings.diagnostics.csvfile,
+            store=self.get_results_store(),
+            transport=self.get_icmp_transport(),
+        )
+        for row in rows:
+            print(f"{row[1]}: {row[2]} ms" if row[2] != "" else f"{row[1]}: timeout")
+
+    def run_analysis(self):
+        diagnostics = self.config.settings.diagnostics
+        default = diagnostics.binary_store or diagnostics.csvfile
+        source = input(f"File CSV o store binario da analizzare [{default}]: ").strip()
+        run_analysis_diag(source or default, self.logger)
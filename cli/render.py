@@ -0,0 +1,152 @@
+# cli/render.py - Stampa a terminale dei risultati delle diagnostiche.
+"""
+Presentazione dei risultati tipizzati ritornati dalle run_*_diag:
+- Le funzioni di diagnostica misurano e loggano, qui si formatta l'output
+- Un renderer per tipo di risultato (PingResult, TracerouteResult, ...)
+- Risultato None (indirizzo non valido, backend assente, errore): nessuna
+  stampa, il messaggio di errore è già stato emesso dalla diagnostica
+"""
+
+
+def _ms(value):
+    return f"{value} ms" if value is not None else "timeout"
+
+
+def render_ping(result):
+    if result is None:
+        return
+    print(f"--- Ping {result.address} ---")
+    print(f"RTT: {_ms(result.rtt_ms)}")
+    if result.avg_rtt is not None:
+        print(
+            f"Burst min/avg/max {result.min_rtt}/{result.avg_rtt}/{result.max_rtt} ms, "
+            f"loss {result.loss_pct}%"
+        )
+    if result.batch_rtts:
+        print(f"Batch: {', '.join(_ms(rtt) for rtt in result.batch_rtts)}")
+
+
+def render_traceroute(result):
+    if result is None:
+        return
+    print("--- Traceroute ---")
+    for hop in result.hops:
+        print(f"{hop.ip} ({_ms(hop.rtt_ms)})")
+
+
+def render_topology(topology):
+    """Percorsi di un traceroute multi-destinazione (TracerouteTopology)."""
+    if topology is None:
+        return
+    for ip, path in topology.paths.items():
+        print(f"--- Traceroute {topology.destinations.get(ip, ip)} ({ip}) ---")
+        for ttl in sorted(path):
+            hop_ip, rtt = path[ttl]
+            print(
+                f"{ttl:2d} {hop_ip} ({rtt} ms)"
+                if hop_ip is not None
+                else f"{ttl:2d} * (timeout)"
+            )
+    print(f"Hop unici: {len(topology.hops())} | Probe inviati: {topology.probes_sent}")
+
+
+def render_dns(result):
+    if result is None:
+        return
+    if result.ip is None:
+        print("ERRORE: DNS fallito, vedi log.")
+    else:
+        print(f"{result.address} -> {result.ip}")
+        if result.reverse:
+            print(f"Reverse: {result.ip} -> {result.reverse}")
+        for rtype, records in result.records.items():
+            print(f"{rtype}: {records}")
+        if "records" in result.errors:
+            print(f"Record DNS non disponibili: {result.errors['records']}")
+    print("Diagnostica DNS completata.")
+
+
+def render_speedtest(result):
+    if result is None:
+        return
+    print(f"Download: {result.download_bps / 1e6:.2f} Mbps")
+    print(f"Upload:   {result.upload_bps / 1e6:.2f} Mbps")
+    print(f"Ping:     {result.ping_ms} ms")
+
+
+def render_stats(interfaces):
+    for c in interfaces or ():
+        print(
+            f"{c.iface}: Bytes sent={c.bytes_sent}, recv={c.bytes_recv}, "
+            f"Packets sent={c.packets_sent}, recv={c.packets_recv}, "
+            f"Err in/out={c.errin}/{c.errout}, Drop in/out={c.dropin}/{c.dropout}"
+        )
+
+
+def render_report(report):
+    """Report della diagnosi avanzata (DiagnosisReport), uno stadio per blocco."""
+    if report is None:
+        return
+    print(f"--- Diagnosi avanzata {report.address} ({report.elapsed:.2f} s) ---")
+    for name, result in report.stages.items():
+        if not result.ok:
+            print(f"[{name}] {result.status.upper()}: {result.error}")
+            continue
+        value = result.value
+        if name == "ping":
+            print(f"[ping] {value:.2f} ms" if value is not None else "[ping] timeout")
+        elif name == "burst":
+            print(
+                f"[burst] min/avg/max {value['min_rtt']}/{value['avg_rtt']}/"
+                f"{value['max_rtt']} ms, loss {value['packet_loss_rate']}%"
+            )
+        elif name == "batch":
+            print(f"[batch] {value}")
+        elif name == "traceroute":
+            print(f"[traceroute] {len(value)} hop")
+            for ttl, hop in enumerate(value, 1):
+                print(f"  {ttl}: {hop.ip} ({_ms(hop.rtt_ms)})")
+        elif name == "dns":
+            print(
+                f"[dns] {report.address} -> {value['ip']}, reverse {value['reverse']}"
+            )
+            for rtype, records in value["records"].items():
+                print(f"  {rtype}: {records}")
+        elif name == "stats":
+            ranked = sorted(
+                value.items(),
+                key=lambda item: -(item[1]["bps_sent"] + item[1]["bps_recv"]),
+            )
+            print(f"[stats] {len(value)} interfacce")
+            for iface, r in ranked[:5]:
+                print(
+                    f"  {iface}: out={r['bps_sent'] / 1e6:.3f} Mbps in={r['bps_recv'] / 1e6:.3f} Mbps "
+                    f"err/s={r['errors_per_s']:.2f} drop/s={r['drops_per_s']:.2f}"
+                )
+        else:
+            print(f"[{name}] {value}")
+
+
+# Renderer degli stadi di escalation del monitoraggio adattivo
+STAGE_RENDERERS = {
+    "burst": render_ping,
+    "traceroute": render_traceroute,
+    "dns": render_dns,
+}
+
+
+def rendered(stages):
+    """Stadi {nome: callable(address)} che stampano il proprio risultato."""
+
+    def wrap(stage, render):
+        def run(address):
+            result = stage(address)
+            render(result)
+            return result
+
+        return run
+
+    return {
+        name: wrap(stage, STAGE_RENDERERS[name]) if name in STAGE_RENDERERS else stage
+        for name, stage in stages.items()
+    }
@@ -3,19 +3,233 @@
 Carica e gestisce il file di configurazione .ini:
 - Accesso a sezioni e parametri
 - Supporto a fallback/default
-- API semplice: get(), getint(), getboolean()
+- API semplice: get(), getint(), getfloat(), getboolean(), sections()
+- Snapshot tipizzato e immutabile (settings): parsato e validato una volta,
+  letto come attributi (settings.network.timeout) senza lookup di stringhe
+- Ricarica atomica se il file cambia (reload_if_changed, confronto mtime)
 """
 
 import configparser
 import os
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Tuple
+
+ICMP_TRANSPORT_KINDS = ("off", "auto", "dgram", "raw")
+
+
+@dataclass(frozen=True)
+class DiagnosticsSettings:
+    csvfile: str = "diagnostics.csv"
+    delay: int = 5
+    scapy_count: int = 4
+    binary_store: str = ""
+    icmp_transport: str = "off"
+    burst_spacing_ms: int = 200
+    stage_timeout: float = 30.0
+
+    def validate(self):
+        if self.icmp_transport not in ICMP_TRANSPORT_KINDS:
+            raise ValueError(f"icmp_transport non valido: {self.icmp_transport}")
+
+
+@dataclass(frozen=True)
+class SecuritySettings:
+    max_ping_count: int = 10
+    max_csv_size_mb: int = 10
+    max_sweep_hosts: int = 4096
+    probe_rate: float = 1000.0
+    probe_burst: float = 50.0
+    target_rate: float = 20.0
+    target_burst: float = 10.0
+    dns_rate: float = 0.0
+    dns_burst: float = 100.0
+
+    def validate(self):
+        # Stessi vincoli di ProbeBudget: una ricarica non valida resta la precedente
+        if (
+            self.probe_rate > 0
+            and min(self.probe_burst, self.target_rate, self.target_burst) <= 0
+        ):
+            raise ValueError(
+                "probe_burst, target_rate e target_burst devono essere > 0"
+            )
+        if self.dns_rate > 0 and self.dns_burst <= 0:
+            raise ValueError("dns_burst deve essere > 0 con dns_rate > 0")
+
+
+@dataclass(frozen=True)
+class NetworkSettings:
+    default_target: str = "8.8.8.8"
+    timeout: int = 2
+    max_hops: int = 20
+    sweep_workers: int = 64
+    mtr_interval: int = 1
+    mtr_csvfile: str = "mtr.csv"
+    stats_interval: float = 1.0
+    stats_duration: float = 10.0
+    stats_history: int = 600
+
+    def validate(self):
+        if self.timeout <= 0 or self.max_hops <= 0 or self.sweep_workers <= 0:
+            raise ValueError("timeout, max_hops e sweep_workers devono essere > 0")
+
+
+@dataclass(frozen=True)
+class DnsSettings:
+    record_types: Tuple[str, ...] = ("A",)
+    dns_timeout: int = 3
+    nameservers: Tuple[str, ...] = ()
+    compare_rounds: int = 3
+
+    def validate(self):
+        if not self.record_types:
+            raise ValueError("record_types vuoto")
+
+
+@dataclass(frozen=True)
+class SpeedtestSettings:
+    cache_file: str = ""
+    cache_ttl: int = 86400
+    server_id: str = ""
+
+
+@dataclass(frozen=True)
+class AdaptiveSettings:
+    interval: float = 1.0
+    window: int = 20
+    min_samples: int = 5
+    rtt_threshold_ms: float = 150.0
+    loss_threshold_pct: float = 20.0
+    cooldown: float = 300.0
+    stages: Tuple[str, ...] = ("burst", "traceroute", "dns")
+
+    def validate(self):
+        if self.interval <= 0 or self.window <= 0:
+            raise ValueError("interval e window devono essere > 0")
+
+    def thresholds(self):
+        """Soglie come keyword di AdaptiveMonitor."""
+        return {
+            "window": self.window,
+            "min_samples": self.min_samples,
+            "rtt_threshold_ms": self.rtt_threshold_ms,
+            "loss_threshold_pct": self.loss_threshold_pct,
+            "cooldown": self.cooldown,
+        }
+
+
+@dataclass(frozen=True)
+class SchedulerSettings:
+    max_workers: int = 4
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Snapshot immutabile della configurazione, una sezione per attributo."""
+
+    diagnostics: DiagnosticsSettings = field(default_factory=DiagnosticsSettings)
+    security: SecuritySettings = field(default_factory=SecuritySettings)
+    network: NetworkSettings = field(default_factory=NetworkSettings)
+    dns: DnsSettings = field(default_factory=DnsSettings)
+    speedtest: SpeedtestSettings = field(default_factory=SpeedtestSettings)
+    adaptive: AdaptiveSettings = field(default_factory=AdaptiveSettings)
+    scheduler: SchedulerSettings = field(default_factory=SchedulerSettings)
+
+
+def _split(value):
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _parse_section(parser, section, cls):
+    """
+    Istanza di cls dalla sezione: il tipo di ogni chiave è quello del default
+    (bool, int, float, tuple = lista separata da virgole, str).
+    """
+    defaults = cls()
+    values = {}
+    for f in fields(cls):
+        default = getattr(defaults, f.name)
+        if not parser.has_option(section, f.name):
+            values[f.name] = default
+            continue
+        try:
+            if isinstance(default, bool):
+                value = parser.getboolean(section, f.name)
+            elif isinstance(default, int):
+                value = parser.getint(section, f.name)
+            elif isinstance(default, float):
+                value = parser.getfloat(section, f.name)
+            elif isinstance(default, tuple):
+                value = _split(parser.get(section, f.name))
+            else:
+                value = parser.get(section, f.name).strip()
+        except ValueError as e:
+            raise ValueError(f"[{section}] {f.name}: {e}") from None
+        if isinstance(value, (int, float)) and value < 0:
+            raise ValueError(f"[{section}] {f.name}: valore negativo {value}")
+        values[f.name] = value
+    settings = cls(**values)
+    validate = getattr(settings, "validate", None)
+    if validate is not None:
+        try:
+            validate()
+        except ValueError as e:
+            raise ValueError(f"[{section}] {e}") from None
+    return settings
+
+
+def parse_settings(parser):
+    """Snapshot validato da un ConfigParser; ValueError con sezione e chiave se invalido."""
+    return Settings(
+        **{f.name: _parse_section(parser, f.name, f.type) for f in fields(Settings)}
+    )
 
 
 class ConfigManager:
     def __init__(self, ini_path):
-        self.config = configparser.ConfigParser()
         if not os.path.isfile(ini_path):
             raise FileNotFoundError(f"File di configurazione '{ini_path}' non trovato!")
-        self.config.read(ini_path)
+        self.ini_path = ini_path
+        self._reload_lock = threading.Lock()
+        # (parser, snapshot, mtime): sostituiti insieme con un'unica assegnazione
+        self._state = self._load()
+
+    def _load(self):
+        mtime = os.stat(self.ini_path).st_mtime_ns
+        parser = configparser.ConfigParser()
+        parser.read(self.ini_path)
+        return parser, parse_settings(parser), mtime
+
+    @property
+    def config(self):
+        return self._state[0]
+
+    @property
+    def settings(self):
+        """Snapshot tipizzato corrente (Settings); nessun parsing alla lettura."""
+        return self._state[1]
+
+    def reload_if_changed(self):
+        """
+        Ricarica il file se l'mtime è cambiato; True se lo snapshot è stato sostituito.
+        Con un file non valido lo snapshot precedente resta attivo e l'errore
+        (ValueError o configparser.Error) viene propagato; OSError se il file manca.
+        """
+        mtime = os.stat(self.ini_path).st_mtime_ns
+        if mtime == self._state[2]:
+            return False
+        with self._reload_lock:
+            if mtime == self._state[2]:
+                return False
+            try:
+                self._state = self._load()
+            except (ValueError, configparser.Error):
+                # Non si riprova a ogni controllo finché il file non cambia ancora
+                parser, settings, _ = self._state
+                self._state = parser, settings, mtime
+                raise
+        return True
 
     def get(self, section, key, fallback=None):
         return self.config.get(section, key, fallback=fallback)
@@ -23,5 +237,11 @@ class ConfigManager:
     def getint(self, section, key, fallback=None):
         return self.config.getint(section, key, fallback=fallback)
 
+    def getfloat(self, section, key, fallback=None):
+        return self.config.getfloat(section, key, fallback=fallback)
+
     def getboolean(self, section, key, fallback=None):
         return self.config.getboolean(section, key, fallback=fallback)
+
+    def sections(self):
+        return self.config.sections()
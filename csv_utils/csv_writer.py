@@ -4,35 +4,199 @@ Gestione scrittura CSV:
 - Scrittura righe e header
 - Rollover per dimensione (nuovo file con timestamp)
 - Configurabile da .ini
-- API: write_csv(filename, header, rows)
+- Sink a lunga vita: file aperto una sola volta, righe bufferizzate,
+  flush per numero di righe o intervallo di tempo
+- API: write_csv(filename, header, rows), CsvSink, get_sink(filename, header)
 """
 
+import atexit
 import csv
 import os
+import threading
 import time
+from typing import Dict, Tuple
+
+
+def _sanitize_row(row):
+    # Protezione: nessun campo deve contenere newline o caratteri di escape
+    return [str(x).replace("\n", " ").replace("\r", "") for x in row]
+
+
+class CsvSink:
+    """
+    Sink CSV bufferizzato con file handle persistente:
+    - Header scritto solo se il file è nuovo/vuoto
+    - File esistente con header diverso: righe su un nuovo file (come il rollover),
+      mai sotto colonne sbagliate
+    - Flush automatico ogni flush_rows righe o flush_interval secondi
+    - Rollover per dimensione (nuovo file con timestamp), max_bytes=None per disattivarlo
+    - Thread-safe, utilizzabile come context manager
+    """
+
+    def __init__(
+        self,
+        filename,
+        header,
+        folder="csv_utils",
+        max_bytes=5 * 1024 * 1024,
+        flush_rows=100,
+        flush_interval=5.0,
+        sanitize=False,
+    ):
+        self.header = list(header)
+        self.max_bytes = max_bytes
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.sanitize = sanitize
+        self.path = self._base_path = os.path.join(folder, filename)
+        self.closed = False
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._last_flush = time.monotonic()
+
+        # Assicurati che la cartella esista
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        # rollover: nuovo file se il file esistente supera max_bytes o ha un altro header
+        if self._over_limit(self.path) or not self._header_matches(self.path):
+            self.path = self._rollover_path()
+        self._open()
+
+    def _over_limit(self, path):
+        return (
+            self.max_bytes is not None
+            and os.path.isfile(path)
+            and os.path.getsize(path) > self.max_bytes
+        )
+
+    def _header_matches(self, path):
+        """True se il file manca, è vuoto o inizia con lo stesso header."""
+        if not os.path.isfile(path) or os.path.getsize(path) == 0:
+            return True
+        with open(path, newline="", encoding="utf-8") as f:
+            first = next(csv.reader(f), [])
+        return first == [str(column) for column in self.header]
+
+    def _rollover_path(self):
+        base, ext = os.path.splitext(self._base_path)
+        path = f"{base}_{int(time.time())}{ext}"
+        counter = 1
+        while os.path.exists(path):
+            path = f"{base}_{int(time.time())}_{counter}{ext}"
+            counter += 1
+        return path
+
+    def _open(self):
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(self.header)
+            self._file.flush()
+
+    def write_row(self, row):
+        self.write_rows([row])
+
+    def write_rows(self, rows):
+        """Accoda righe al buffer; flush se superate le soglie di righe o tempo."""
+        with self._lock:
+            if self.closed:
+                raise ValueError(f"CsvSink chiuso: {self.path}")
+            if self.sanitize:
+                rows = [_sanitize_row(row) for row in rows]
+            self._buffer.extend(rows)
+            if (
+                len(self._buffer) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            if not self.closed:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer:
+            self._writer.writerows(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+        self._last_flush = time.monotonic()
+        if self.max_bytes is not None and self._file.tell() > self.max_bytes:
+            self._file.close()
+            self.path = self._rollover_path()
+            self._open()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self._flush_locked()
+            self._file.close()
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_sinks: Dict[Tuple[str, Tuple[str, ...]], CsvSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_sink(filename, header, folder="csv_utils", **kwargs):
+    """
+    Ritorna il CsvSink condiviso per (file, header), creandolo al primo uso.
+    Header diversi sullo stesso file: sink distinti, il secondo su un file di rollover.
+    ValueError se max_bytes o sanitize differiscono da quelli del sink esistente.
+    I sink condivisi vengono svuotati e chiusi all'uscita del processo.
+    """
+    key = (
+        os.path.abspath(os.path.join(folder, filename)),
+        tuple(str(column) for column in header),
+    )
+    with _sinks_lock:
+        sink = _sinks.get(key)
+        if sink is None or sink.closed:
+            sink = CsvSink(filename, header, folder=folder, **kwargs)
+            _sinks[key] = sink
+        else:
+            for option in ("max_bytes", "sanitize"):
+                if option in kwargs and kwargs[option] != getattr(sink, option):
+                    raise ValueError(
+                        f"Sink {filename} già aperto con {option}={getattr(sink, option)}"
+                    )
+        return sink
+
+
+def flush_all_sinks():
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+    for sink in sinks:
+        sink.flush()
+
+
+def close_all_sinks():
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.close()
+
+
+atexit.register(close_all_sinks)
 
 
 def write_csv(filename, header, rows, max_bytes=5 * 1024 * 1024, folder="csv_utils"):
     """
     Scrive dati su CSV in una cartella dedicata.
     Se il file supera max_bytes, crea nuovo file con timestamp.
+    Usa il sink condiviso del file: nessuna open/close per chiamata,
+    le righe sono comunque su disco al ritorno.
     """
-    # Assicurati che la cartella esista
-    if not os.path.isdir(folder):
-        os.makedirs(folder, exist_ok=True)
-
-    # Percorso completo file
-    full_path = os.path.join(folder, filename)
-
-    # rollover: nuovo file se supera max_bytes
-    if os.path.isfile(full_path) and os.path.getsize(full_path) > max_bytes:
-        base, ext = os.path.splitext(full_path)
-        full_path = f"{base}_{int(time.time())}{ext}"
-
-    write_header = not os.path.isfile(full_path)
-    with open(full_path, "a", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        if write_header:
-            writer.writerow(header)
-        for row in rows:
-            writer.writerow(row)
+    sink = get_sink(filename, header, folder=folder, max_bytes=max_bytes)
+    sink.write_rows(rows)
+    sink.flush()
@@ -5,22 +5,102 @@ Gestione logging centralizzata:
 - Livelli: INFO, WARNING, ERROR, CRITICAL
 - Rollover automatico (dimensione e giorni)
 - Configurazione da file .ini (path, livelli, formato)
-- API semplice: info(), warning(), error(), critical()
+- Modalità asincrona: i thread accodano i record, un listener fa formattazione e I/O
+- Eventi strutturati (nome + campi) formattati solo se emessi, output JSON-lines opzionale
+- API semplice: info(), warning(), error(), critical(), event(), close()
 """
 
+import atexit
+import json
 import logging
 import logging.handlers
 import os
+import queue
+
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+
+class LogEvent:
+    """
+    Evento strutturato usato come msg del LogRecord:
+    la stringa (name k=v ...) viene costruita solo quando un handler lo emette.
+    """
+
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self):
+        parts = [self.name]
+        parts.extend(f"{key}={value}" for key, value in self.fields.items())
+        return " ".join(parts)
+
+
+class JsonFormatter(logging.Formatter):
+    """Una riga JSON per record: ts, level, event, msg e campi dell'evento."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+        }
+        if isinstance(record.msg, LogEvent):
+            entry["event"] = record.msg.name
+            entry.update(record.msg.fields)
+        else:
+            entry["msg"] = record.getMessage()
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler non bloccante su coda limitata:
+    - Coda piena: il record viene scartato e conteggiato in dropped
+    - Nessuna formattazione nel thread chiamante (la fa il listener)
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Bloccante: con la coda piena il sentinel attende lo svuotamento
+        self.queue.put(self._sentinel)
 
 
 class LogManager:
-    def __init__(self, config):
+    def __init__(self, config, async_default=False):
         log_path = config.get("logging", "file", fallback="logs/network_diag.log")
         log_level = config.get("logging", "level", fallback="INFO").upper()
         max_bytes = config.getint(
             "logging", "max_bytes", fallback=5 * 1024 * 1024
         )  # 5MB
         backup_count = config.getint("logging", "backup_count", fallback=5)
+        # [logging] async esplicito vince su async_default (True per il daemon)
+        use_queue = config.getboolean("logging", "async", fallback=async_default)
+        queue_size = config.getint("logging", "queue_size", fallback=10000)
+        log_format = config.get("logging", "format", fallback="text").lower()
 
         os.makedirs(os.path.dirname(log_path), exist_ok=True)
 
@@ -32,13 +112,50 @@ class LogManager:
             log_path, maxBytes=max_bytes, backupCount=backup_count
         )
         formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s")
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
+        # JSON-lines solo su file: il terminale resta leggibile
+        handler.setFormatter(JsonFormatter() if log_format == "json" else formatter)
 
         # Log su stdout
         stream_handler = logging.StreamHandler()
         stream_handler.setFormatter(formatter)
-        self.logger.addHandler(stream_handler)
+
+        self._listener = None
+        self._queue_handler = None
+        if use_queue:
+            # I thread diagnostici accodano soltanto; file e terminale nel listener
+            self._queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+            self._listener = _DrainingQueueListener(
+                self._queue_handler.queue, handler, stream_handler
+            )
+            self._handlers = [self._queue_handler]
+            self._listener.start()
+        else:
+            self._handlers = [handler, stream_handler]
+        self._io_handlers = [handler, stream_handler]
+        for h in self._handlers:
+            self.logger.addHandler(h)
+        atexit.register(self.close)
+
+    @property
+    def dropped(self):
+        """Record scartati per coda piena (solo modalità asincrona)."""
+        return self._queue_handler.dropped if self._queue_handler else 0
+
+    def close(self):
+        """Svuota la coda, ferma il listener e chiude i file di log."""
+        if self._listener is not None:
+            if self.dropped:
+                self.logger.warning(
+                    f"Log asincrono: {self.dropped} record scartati per coda piena."
+                )
+            self._listener.stop()
+            self._listener = None
+        for h in self._handlers:
+            self.logger.removeHandler(h)
+        for h in self._io_handlers:
+            h.close()
+        self._handlers = []
+        atexit.unregister(self.close)
 
     def info(self, msg):
         self.logger.info(msg)
@@ -51,3 +168,12 @@ class LogManager:
 
     def critical(self, msg, *args, **kwargs):
         self.logger.critical(msg, *args, **kwargs)
+
+    def event(self, name, level="info", **fields):
+        """
+        Evento strutturato: nome + campi, nessuna formattazione se il livello
+        è filtrato. Testo "name k=v ..." o riga JSON secondo [logging] format.
+        """
+        level = _LEVELS.get(level, level)
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, LogEvent(name, fields))
@@ -7,32 +7,80 @@ Gestisce il flusso principale:
 - Mostra CLI per selezione azioni
 - Chiama i moduli richiesti in base alla scelta utente
 - Gestisce errori critici e logging a livello globale
+- Modalità --daemon: job pianificati da config.ini, senza menu interattivo
 """
+import argparse
+import signal
 import sys
 
 from cli.cli import CliMenu
 from config.config_manager import ConfigManager
 from logs.custom_logging import LogManager
+from network.backends import log_availability
 from os_manager.os_manager import OSManager
+from scheduler.scheduler import JobRunner, Scheduler, load_jobs
+from security.rate_limiter import configure_budget
+
+
+def run_daemon(config, logger, os_type):
+    """Esegue i job [job:<nome>] fino a SIGTERM/SIGINT."""
+    try:
+        jobs = load_jobs(config)
+    except ValueError as e:
+        logger.critical(f"Configurazione job non valida: {e}")
+        sys.exit(2)
+    scheduler = Scheduler(
+        jobs,
+        JobRunner(config, logger, os_type),
+        logger,
+        max_workers=config.settings.scheduler.max_workers,
+        config=config,
+    )
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    scheduler.run()
+    logger.close()
 
 
 def main():
-    # Carica configurazione
-    config = ConfigManager("config.ini")
+    parser = argparse.ArgumentParser(description="Tool di diagnostica di rete")
+    parser.add_argument(
+        "--daemon", action="store_true", help="esegue i job pianificati in config.ini"
+    )
+    parser.add_argument("--config", default="config.ini", help="file di configurazione")
+    args = parser.parse_args()
 
-    # Inizializza logging evoluto
-    logger = LogManager(config)
+    # Carica configurazione (snapshot tipizzato validato)
+    try:
+        config = ConfigManager(args.config)
+    except ValueError as e:
+        print(f"ERRORE: configurazione non valida: {e}")
+        sys.exit(2)
+
+    # Inizializza logging evoluto (asincrono di default solo per il daemon)
+    logger = LogManager(config, async_default=args.daemon)
+    # Backend opzionali: solo verifica di disponibilità, import al primo uso
+    log_availability(logger)
+    # Budget di probe condiviso da ping, traceroute e DNS ([security])
+    budget = configure_budget(config.settings.security)
+    if budget is None:
+        logger.warning("Rate limiting dei probe disattivato (probe_rate = 0).")
 
     # Rileva OS e gestisce permessi/admin
     os_manager = OSManager(logger)
     os_type = os_manager.detect_os()
     os_manager.require_admin_if_needed()
 
+    if args.daemon:
+        run_daemon(config, logger, os_type)
+        return
+
     # Mostra CLI e gestisce scelta utente
     cli = CliMenu(config, logger, os_type)
 
     while True:
         try:
+            cli.reload_config()
             action = cli.show_menu()
             if action == "ping":
                 cli.run_ping()
@@ -46,6 +94,20 @@ def main():
                 cli.run_dns_check()
             elif action == "advanced_diag":
                 cli.run_advanced_diag()
+            elif action == "ping_sweep":
+                cli.run_ping_sweep()
+            elif action == "mtr":
+                cli.run_mtr()
+            elif action == "dns_compare":
+                cli.run_dns_compare()
+            elif action == "analysis":
+                cli.run_analysis()
+            elif action == "stats_sampling":
+                cli.run_stats_sampling()
+            elif action == "adaptive":
+                cli.run_adaptive()
+            elif action == "multi_traceroute":
+                cli.run_multi_traceroute()
             elif action == "exit":
                 logger.info("Chiusura tool richiesta dall'utente.")
                 print("Arrivederci!")
@@ -0,0 +1,306 @@
+# network/adaptive.py - Monitoraggio adattivo: probe leggero continuo, diagnostica profonda su soglia.
+"""
+Pipeline diagnostica a livelli:
+- Livello base: un solo echo ping3 per tick (costo minimo di traffico e CPU)
+- Finestra mobile di RTT e loss sugli ultimi N probe
+- Superate le soglie (RTT medio o loss) si attivano gli stadi costosi:
+  burst pingparsing + scapy, traceroute, DNS check
+- Cooldown tra escalation successive, stadi eseguiti in un worker dedicato
+  (il probe base non si ferma durante l'escalation)
+"""
+
+import configparser
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from logs.custom_logging import LogManager
+from network.dns_utils import run_dns_diag
+from network.ping import _probe_host, _store_rows, run_ping_diag
+from network.traceroute import run_traceroute_diag
+from security.rate_limiter import configure_budget
+from security.security import validate_address
+
+DEFAULT_STAGES = ("burst", "traceroute", "dns")
+
+
+class RollingWindow:
+    """Ultimi size campioni RTT (None = perso) con somme incrementali."""
+
+    __slots__ = ("samples", "_sum", "_received")
+
+    def __init__(self, size=20):
+        self.samples = deque(maxlen=size)
+        self._sum = 0.0
+        self._received = 0
+
+    def add(self, rtt):
+        if len(self.samples) == self.samples.maxlen:
+            old = self.samples[0]
+            if old is not None:
+                self._sum -= old
+                self._received -= 1
+        self.samples.append(rtt)
+        if rtt is not None:
+            self._sum += rtt
+            self._received += 1
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def mean_rtt(self):
+        return self._sum / self._received if self._received else None
+
+    @property
+    def loss_pct(self):
+        if not self.samples:
+            return 0.0
+        return 100.0 * (len(self.samples) - self._received) / len(self.samples)
+
+
+class AdaptiveMonitor:
+    """
+    Monitor adattivo di un target:
+    - tick(): probe base, aggiornamento finestra, eventuale escalation
+    - stages: {nome: callable(address)} eseguiti in ordine all'escalation
+    """
+
+    def __init__(
+        self,
+        address,
+        logger: LogManager,
+        stages,
+        probe=None,
+        window=20,
+        min_samples=5,
+        rtt_threshold_ms=150.0,
+        loss_threshold_pct=20.0,
+        cooldown=300.0,
+        clock=time.monotonic,
+    ):
+        self.address = address
+        self.logger = logger
+        self.stages = stages
+        self.probe = probe or (lambda addr: cheap_probe(addr, logger))
+        self.window = RollingWindow(window)
+        self.min_samples = min_samples
+        self.rtt_threshold_ms = rtt_threshold_ms
+        self.loss_threshold_pct = loss_threshold_pct
+        self.cooldown = cooldown
+        self.clock = clock
+        self.probes = 0
+        self.escalations: List[Tuple[float, str]] = []
+        self._last_escalation = None
+        self._pending = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="adaptive-stage"
+        )
+
+    def degraded(self):
+        """Motivo del degrado (stringa) o None se entro le soglie."""
+        if len(self.window) < self.min_samples:
+            return None
+        loss = self.window.loss_pct
+        if loss >= self.loss_threshold_pct:
+            return f"loss {loss:.1f}% >= {self.loss_threshold_pct}%"
+        mean = self.window.mean_rtt
+        if mean is not None and mean >= self.rtt_threshold_ms:
+            return f"RTT medio {mean:.1f} ms >= {self.rtt_threshold_ms} ms"
+        return None
+
+    def observe(self, rtt):
+        """Aggiunge un campione; ritorna il motivo se parte un'escalation."""
+        self.window.add(rtt)
+        reason = self.degraded()
+        if reason is None:
+            return None
+        now = self.clock()
+        if self._pending is not None and not self._pending.done():
+            return None
+        if (
+            self._last_escalation is not None
+            and now - self._last_escalation < self.cooldown
+        ):
+            return None
+        self._last_escalation = now
+        self.escalations.append((now, reason))
+        self.logger.event(
+            "adaptive.escalation",
+            "warning",
+            address=self.address,
+            reason=reason,
+            stages=",".join(self.stages),
+        )
+        self._pending = self._executor.submit(self._run_stages, reason)
+        return reason
+
+    def _run_stages(self, reason):
+        for name, stage in self.stages.items():
+            try:
+                stage(self.address)
+            except Exception as e:
+                self.logger.error(
+                    f"Errore stadio {name} per {self.address}: {e}", exc_info=True
+                )
+        self.logger.info(f"Escalation completata per {self.address} ({reason}).")
+
+    def tick(self):
+        rtt = self.probe(self.address)
+        self.probes += 1
+        return self.observe(rtt)
+
+    def configure(
+        self,
+        window=None,
+        min_samples=None,
+        rtt_threshold_ms=None,
+        loss_threshold_pct=None,
+        cooldown=None,
+    ):
+        """
+        Aggiorna le soglie (configurazione ricaricata) senza perdere lo storico:
+        con una finestra di dimensione diversa restano gli ultimi campioni.
+        """
+        if window is not None and window != self.window.samples.maxlen:
+            resized = RollingWindow(window)
+            for rtt in self.window.samples:
+                resized.add(rtt)
+            self.window = resized
+        if min_samples is not None:
+            self.min_samples = min_samples
+        if rtt_threshold_ms is not None:
+            self.rtt_threshold_ms = rtt_threshold_ms
+        if loss_threshold_pct is not None:
+            self.loss_threshold_pct = loss_threshold_pct
+        if cooldown is not None:
+            self.cooldown = cooldown
+
+    def close(self, wait=True):
+        """Attende (o annulla) l'escalation in corso e libera il worker."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def cheap_probe(address, logger: LogManager, timeout=2, store=None, transport=None):
+    """
+    Probe base: una sola echo request (ping3 o trasporto ICMP condiviso);
+    RTT in ms o None se perso.
+    """
+    row = _probe_host(address, logger, timeout=timeout, transport=transport)
+    if store is not None:
+        _store_rows(store, [row], logger)
+    return row[2] if row[2] != "" else None
+
+
+def default_stages(
+    logger: LogManager,
+    os_type,
+    names=DEFAULT_STAGES,
+    csvfile=None,
+    store=None,
+    transport=None,
+):
+    """Stadi costosi standard, nell'ordine richiesto: burst, traceroute, dns."""
+    available = {
+        "burst": lambda addr: run_ping_diag(
+            addr,
+            logger,
+            os_type,
+            advanced=True,
+            csvfile=csvfile,
+            store=store,
+            transport=transport,
+        ),
+        "traceroute": lambda addr: run_traceroute_diag(addr, logger, os_type),
+        "dns": lambda addr: run_dns_diag(addr, logger),
+    }
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Stadi non supportati: {', '.join(unknown)}")
+    return {name: available[name] for name in names}
+
+
+def _config_changed(config, logger: LogManager):
+    """True se la configurazione è stata ricaricata; un file non valido non la cambia."""
+    try:
+        return config.reload_if_changed()
+    except (OSError, ValueError, configparser.Error) as e:
+        logger.warning(f"Configurazione non ricaricata, resta la precedente: {e}")
+        return False
+
+
+def run_adaptive_diag(
+    address,
+    logger: LogManager,
+    os_type: str,
+    interval=1.0,
+    cycles=None,
+    timeout=2,
+    stages=None,
+    store=None,
+    transport=None,
+    config=None,
+    **thresholds,
+):
+    """
+    Monitoraggio adattivo di un target fino a Ctrl+C (o cycles probe):
+    - Probe ping3 a cadenza fissa con correzione della deriva
+    - Escalation agli stadi costosi su soglia, con cooldown
+    - Con config (ConfigManager): intervallo, timeout e soglie riletti quando
+      il file cambia (gli stadi restano quelli di avvio)
+    thresholds: window, min_samples, rtt_threshold_ms, loss_threshold_pct, cooldown.
+    Ritorna il monitor (probe eseguiti ed escalation).
+    """
+    if not validate_address(address):
+        logger.error(f"Indirizzo non valido: {address}")
+        print("ERRORE: Indirizzo non valido.")
+        return None
+
+    monitor = AdaptiveMonitor(
+        address,
+        logger,
+        (
+            stages
+            if stages is not None
+            else default_stages(logger, os_type, transport=transport)
+        ),
+        probe=lambda addr: cheap_probe(addr, logger, timeout, store, transport),
+        **thresholds,
+    )
+    logger.info(
+        f"Monitoraggio adattivo di {address}: probe ogni {interval}s, "
+        f"soglie RTT {monitor.rtt_threshold_ms} ms / loss {monitor.loss_threshold_pct}%"
+    )
+    next_tick = time.monotonic()
+    try:
+        while cycles is None or monitor.probes < cycles:
+            reason = monitor.tick()
+            if reason:
+                print(f"Degrado su {address}: {reason} -> diagnostica approfondita")
+            if config is not None and _config_changed(config, logger):
+                settings = config.settings
+                configure_budget(settings.security)
+                interval = settings.adaptive.interval
+                # Letto dalla lambda del probe a ogni tick
+                timeout = settings.network.timeout
+                monitor.configure(**settings.adaptive.thresholds())
+                logger.info(f"Monitoraggio adattivo di {address}: soglie aggiornate.")
+            next_tick += interval
+            pause = next_tick - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            else:
+                next_tick = time.monotonic()
+    except KeyboardInterrupt:
+        logger.info("Monitoraggio adattivo interrotto dall'utente.")
+    monitor.close()
+
+    print(
+        f"--- Monitoraggio adattivo {address}: {monitor.probes} probe, "
+        f"{len(monitor.escalations)} escalation ---"
+    )
+    for _, reason in monitor.escalations:
+        print(f"Escalation: {reason}")
+    logger.info("Fine monitoraggio adattivo.")
+    return monitor
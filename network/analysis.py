@@ -0,0 +1,302 @@
+# network/analysis.py - Analisi statistica vettorizzata dei risultati ping salvati.
+"""
+Modulo di analisi dei risultati di diagnostica (NumPy, nessun loop per campione).
+- Caricamento da CSV (network.ping) o da store binario (storage.columnar_store)
+- Percentili p50/p95/p99, jitter e loss per target
+- Finestre temporali di loss per target
+- Aggregati mobili per target (media sugli ultimi N campioni)
+"""
+
+import csv
+import os
+import time
+import warnings
+
+from logs.custom_logging import LogManager
+from network.backends import backend
+
+# NumPy al primo uso: l'import del modulo (menu) non lo carica
+np = backend("numpy")
+
+# Colonne CSV di network.ping -> colonne dello store binario
+CSV_COLUMNS = {
+    "ping3_ms": "ping_ms",
+    "pingparsing_min": "min_ms",
+    "pingparsing_avg": "avg_ms",
+    "pingparsing_max": "max_ms",
+    "pingparsing_packet_loss": "loss_pct",
+}
+
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+
+def _to_float(strings):
+    """Conversione vettorizzata di stringhe CSV in float32 ("" -> NaN)."""
+    array = np.asarray(strings, dtype=str)
+    return np.where(array == "", "nan", array).astype(np.float32)
+
+
+def _local_to_epoch(naive):
+    """
+    Secondi "naive" (ora locale letta come UTC) -> epoch, come time.mktime:
+    offset del fuso calcolato una volta per ora distinta (ora legale inclusa).
+    """
+    hours, inverse = np.unique(naive // 3600, return_inverse=True)
+    offsets = np.array(
+        [
+            time.mktime(time.gmtime(int(hour) * 3600)[:8] + (-1,)) - int(hour) * 3600
+            for hour in hours
+        ],
+        dtype=np.float64,
+    )
+    return naive + offsets[inverse.ravel()]
+
+
+def load_ping_csv(path):
+    """
+    Carica un CSV della diagnostica ping in colonne NumPy:
+    timestamp (epoch s dall'orario locale del CSV, stessa base dello store binario),
+    target (id), targets (id -> indirizzo) e le colonne RTT/loss con i nomi dello store.
+    Parsing vettorizzato (np.loadtxt) delle sole colonne usate, le colonne scapy
+    non vengono lette; per storici molto grandi usare lo store binario (load_ping_store).
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), [])
+    wanted = [name for name in ("timestamp", "address", *CSV_COLUMNS) if name in header]
+    with warnings.catch_warnings():
+        # CSV con il solo header: tabella vuota, senza UserWarning
+        warnings.simplefilter("ignore", UserWarning)
+        table = np.loadtxt(
+            path,
+            dtype=str,
+            delimiter=",",
+            skiprows=1,
+            usecols=[header.index(name) for name in wanted],
+            ndmin=2,
+            encoding="utf-8",
+            quotechar='"',
+        )
+    raw = {name: table[:, i] for i, name in enumerate(wanted)}
+
+    timestamps = np.asarray(raw["timestamp"], dtype="datetime64[s]")
+    targets, target_ids = np.unique(np.asarray(raw["address"]), return_inverse=True)
+    data = {
+        "timestamp": _local_to_epoch(timestamps.astype(np.int64).astype(np.float64)),
+        "target": target_ids.astype(np.uint32),
+        "targets": [str(t) for t in targets],
+    }
+    for csv_name, name in CSV_COLUMNS.items():
+        if csv_name in raw:
+            data[name] = _to_float(raw[csv_name])
+    return data
+
+
+def load_ping_store(path):
+    """
+    Carica i risultati ping dallo store binario (una sola copia dei segmenti).
+    FileNotFoundError se path non è uno store esistente: nessuno store vuoto creato.
+    """
+    from storage.columnar_store import PING_SCHEMA, ColumnarStore
+
+    if not os.path.isfile(os.path.join(path, "schema.json")):
+        raise FileNotFoundError(f"Store binario non trovato: {path}")
+
+    store = ColumnarStore(path, PING_SCHEMA)
+    data = store.read()
+    data["targets"] = list(store.targets)
+    return data
+
+
+def load_results(source):
+    """Carica da CSV (file .csv) o da store binario (directory)."""
+    if source.endswith(".csv"):
+        return load_ping_csv(source)
+    return load_ping_store(source)
+
+
+def _grouped_order(group, secondary):
+    """
+    Indici che ordinano per (group, secondary): ordinamento del secondario,
+    poi ordinamento stabile per gruppo (radix sort su interi a 16 bit).
+    """
+    if len(secondary) and np.all(secondary[1:] >= secondary[:-1]):
+        order = np.arange(len(secondary))  # già ordinato (store append-only)
+    else:
+        order = np.argsort(secondary)
+    small = len(group) == 0 or int(group.max()) < 1 << 16
+    keys = group[order].astype(np.uint16 if small else np.uint32)
+    return order[np.argsort(keys, kind="stable")]
+
+
+def _time_order(data):
+    """Indici che ordinano i campioni per (target, timestamp)."""
+    return _grouped_order(
+        np.asarray(data["target"]), np.asarray(data["timestamp"], dtype=np.float64)
+    )
+
+
+def _group_bounds(sorted_keys, n_groups):
+    """Inizio e dimensione di ogni gruppo in un array di chiavi ordinato."""
+    counts = np.bincount(sorted_keys, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return starts, counts
+
+
+def percentiles(values, pcts=DEFAULT_PERCENTILES):
+    """Percentili globali ignorando i campioni persi (NaN)."""
+    values = np.asarray(values, dtype=np.float64)
+    if not np.any(~np.isnan(values)):
+        return {p: float("nan") for p in pcts}
+    return dict(zip(pcts, np.nanpercentile(values, pcts).tolist()))
+
+
+def per_target_summary(data, column="ping_ms", pcts=DEFAULT_PERCENTILES):
+    """
+    Statistiche per target, calcolate per gruppi senza loop sui campioni:
+    - count, loss_pct (campioni NaN), mean
+    - percentili (interpolazione lineare, come np.percentile)
+    - jitter: media di |delta RTT| tra campioni consecutivi ricevuti
+    Ritorna un dict di array indicizzati per id target.
+    """
+    target = np.asarray(data["target"], dtype=np.int64)
+    values = np.asarray(data[column], dtype=np.float64)
+    n_targets = len(data["targets"])
+    valid = ~np.isnan(values)
+
+    count = np.bincount(target, minlength=n_targets)
+    received = np.bincount(target, weights=valid, minlength=n_targets)
+    totals = np.bincount(
+        target, weights=np.where(valid, values, 0.0), minlength=n_targets
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        summary = {
+            "count": count,
+            "loss_pct": 100.0 * (count - received) / count,
+            "mean": totals / received,
+        }
+
+    # Percentili: valori ricevuti ordinati per (target, valore)
+    valid_values, valid_target = values[valid], target[valid]
+    order = _grouped_order(valid_target, valid_values)
+    sorted_values = valid_values[order] if len(order) else np.zeros(1)
+    starts, sizes = _group_bounds(valid_target[order], n_targets)
+    last = max(len(order) - 1, 0)
+    for p in pcts:
+        pos = starts + (np.maximum(sizes, 1) - 1) * (p / 100.0)
+        lo = np.minimum(np.floor(pos).astype(np.int64), last)
+        hi = np.minimum(np.ceil(pos).astype(np.int64), last)
+        interpolated = sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (
+            pos - lo
+        )
+        summary[f"p{p}"] = np.where(sizes > 0, interpolated, np.nan)
+
+    # Jitter: differenze tra ricevuti consecutivi dello stesso target, in ordine di tempo
+    time_order = _time_order(data)
+    ordered_valid = valid[time_order]
+    seq_values = values[time_order][ordered_valid]
+    seq_target = target[time_order][ordered_valid]
+    same_target = seq_target[1:] == seq_target[:-1]
+    deltas = np.abs(np.diff(seq_values))[same_target]
+    delta_target = seq_target[1:][same_target]
+    jitter_sum = np.bincount(delta_target, weights=deltas, minlength=n_targets)
+    jitter_count = np.bincount(delta_target, minlength=n_targets)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        summary["jitter"] = jitter_sum / jitter_count
+    return summary
+
+
+def loss_windows(data, window_s=60, column="ping_ms"):
+    """
+    Loss per target su finestre temporali fisse di window_s secondi.
+    Ritorna array allineati (solo finestre con campioni): target, window_start,
+    sent, lost, loss_pct.
+    """
+    timestamps = np.asarray(data["timestamp"], dtype=np.float64)
+    target = np.asarray(data["target"], dtype=np.int64)
+    lost = np.isnan(np.asarray(data[column], dtype=np.float64))
+    if not len(timestamps):
+        empty = np.empty(0)
+        return {
+            k: empty for k in ("target", "window_start", "sent", "lost", "loss_pct")
+        }
+
+    t0 = np.floor(timestamps.min() / window_s) * window_s
+    window = ((timestamps - t0) // window_s).astype(np.int64)
+    n_windows = int(window.max()) + 1
+    key = target * n_windows + window
+    # np.unique (ordinamento) invece di bincount: memoria O(campioni), non O(finestre)
+    keys, inverse, sent = np.unique(key, return_inverse=True, return_counts=True)
+    lost_count = np.bincount(inverse.ravel(), weights=lost, minlength=len(keys))
+    return {
+        "target": keys // n_windows,
+        "window_start": t0 + (keys % n_windows) * window_s,
+        "sent": sent,
+        "lost": lost_count.astype(np.int64),
+        "loss_pct": 100.0 * lost_count / sent,
+    }
+
+
+def rolling_mean(data, window=10, column="ping_ms"):
+    """
+    Media mobile per target sugli ultimi window campioni (persi esclusi).
+    Calcolata con somme cumulative: O(n) indipendentemente da window.
+    Ritorna (indici in ordine (target, tempo), medie allineate a quegli indici).
+    """
+    order = _time_order(data)
+    target = np.asarray(data["target"], dtype=np.int64)[order]
+    values = np.asarray(data[column], dtype=np.float64)[order]
+    n = len(values)
+    if not n:
+        return order, np.empty(0)
+    valid = ~np.isnan(values)
+    cum_sum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    cum_count = np.concatenate(([0], np.cumsum(valid)))
+
+    starts, _ = _group_bounds(target, int(target.max()) + 1)
+    idx = np.arange(n)
+    lo = np.maximum(idx + 1 - window, starts[target])
+    sums = cum_sum[idx + 1] - cum_sum[lo]
+    counts = cum_count[idx + 1] - cum_count[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return order, sums / counts
+
+
+def run_analysis_diag(source, logger: LogManager, column="ping_ms"):
+    """
+    Analizza i risultati salvati (CSV o store binario):
+    - Percentili globali e statistiche per target
+    - Log e stampa del riepilogo
+    Ritorna il riepilogo per target (None in caso di errore).
+    """
+    if not np:
+        logger.error("Modulo numpy non disponibile per l'analisi.")
+        print("ERRORE: modulo numpy non disponibile.")
+        return None
+    try:
+        data = load_results(source)
+    except Exception as e:
+        logger.error(f"Errore caricamento risultati da {source}: {e}", exc_info=True)
+        print("ERRORE: Caricamento risultati fallito.")
+        return None
+    if column not in data:
+        logger.error(f"Colonna {column} non presente in {source}.")
+        print(f"ERRORE: colonna {column} non presente.")
+        return None
+
+    logger.info(f"Analisi di {len(data['timestamp'])} campioni da {source}")
+    overall = percentiles(data[column])
+    logger.info(f"Percentili globali {column}: {overall}")
+    summary = per_target_summary(data, column)
+    print(f"--- Analisi {column} ({len(data['timestamp'])} campioni) ---")
+    for target_id, target in enumerate(data["targets"]):
+        if not summary["count"][target_id]:
+            continue
+        line = (
+            f"{target}: n={summary['count'][target_id]} "
+            f"loss={summary['loss_pct'][target_id]:.1f}% "
+            f"p50={summary['p50'][target_id]:.2f} p95={summary['p95'][target_id]:.2f} "
+            f"p99={summary['p99'][target_id]:.2f} jitter={summary['jitter'][target_id]:.2f} ms"
+        )
+        logger.info(f"Analisi {line}")
+        print(line)
+    return summary
@@ -0,0 +1,164 @@
+# network/backends.py - Registro dei backend opzionali con import lazy.
+"""
+Backend opzionali (scapy, pingparsing, ping3, speedtest, numpy, dnspython) caricati al primo uso:
+- Nessun import pesante all'avvio (scapy.all carica centinaia di moduli, numpy e dnspython decine)
+- Disponibilità verificata senza importare (importlib.util.find_spec)
+- Proxy di modulo e di attributo usabili come i nomi importati direttamente
+- Report di disponibilità/caricamento per il logging
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+
+from logs.custom_logging import LogManager
+
+# Nome backend -> modulo da importare al primo uso
+BACKENDS = {
+    "scapy": "scapy.all",
+    "pingparsing": "pingparsing",
+    "ping3": "ping3",
+    "speedtest": "speedtest",
+    "numpy": "numpy",
+    "dnspython": "dns.asyncresolver",
+}
+
+# Backend il cui proxy espone il package radice (dns.resolver, dns.exception, ...)
+# dopo l'import del modulo registrato, che ne carica i sottomoduli
+PACKAGE_BACKENDS = {"dnspython"}
+
+
+class LazyModule:
+    """
+    Proxy di un modulo opzionale:
+    - bool(): installato (find_spec sul package radice, senza import)
+    - accesso ad attributo: import al primo uso, poi delega al modulo
+    - package=True: delega al package radice invece che al modulo importato
+    """
+
+    def __init__(self, name, module_name, package=False):
+        self._name = name
+        self._module_name = module_name
+        self._package = package
+        self._module = None
+        self._error = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Importa il modulo (una sola volta); ImportError se non disponibile."""
+        if self._module is None and self._error is None:
+            with self._lock:
+                if self._module is None and self._error is None:
+                    try:
+                        module = importlib.import_module(self._module_name)
+                        if self._package:
+                            module = sys.modules[self._module_name.split(".", 1)[0]]
+                        self._module = module
+                    except ImportError as e:
+                        self._error = e
+        if self._error is not None:
+            raise ImportError(
+                f"Backend {self._name} non disponibile: {self._error}"
+            ) from self._error
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    @property
+    def installed(self):
+        if self._module is not None:
+            return True
+        if self._error is not None:
+            return False
+        root = self._module_name.split(".", 1)[0]
+        if root in sys.modules:
+            return True
+        try:
+            return importlib.util.find_spec(root) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def __bool__(self):
+        return self.installed
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "caricato" if self.loaded else "lazy"
+        return f"<LazyModule {self._module_name} ({state})>"
+
+
+class LazyAttr:
+    """
+    Proxy di un attributo di un backend (es. scapy.all.sr, ping3.ping):
+    chiamabile come l'originale, risolto al primo uso.
+    """
+
+    def __init__(self, backend, attr):
+        self._backend = backend
+        self._attr = attr
+
+    def resolve(self):
+        return getattr(self._backend.load(), self._attr)
+
+    def __bool__(self):
+        return bool(self._backend)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f"<LazyAttr {self._backend._module_name}.{self._attr}>"
+
+
+_registry = {
+    name: LazyModule(name, module, package=name in PACKAGE_BACKENDS)
+    for name, module in BACKENDS.items()
+}
+
+
+def backend(name):
+    """Proxy lazy del backend registrato."""
+    return _registry[name]
+
+
+def lazy_attr(name, attr):
+    """Proxy lazy di un attributo del backend (per i nomi importati con from)."""
+    return LazyAttr(_registry[name], attr)
+
+
+def resolve(obj):
+    """
+    Oggetto reale dietro un proxy (es. classi scapy usate come chiave di layer,
+    rcv[ICMP]); gli oggetti non proxy sono restituiti invariati.
+    """
+    if isinstance(obj, LazyAttr):
+        return obj.resolve()
+    if isinstance(obj, LazyModule):
+        return obj.load()
+    return obj
+
+
+def availability():
+    """Stato dei backend: {nome: {"installed": bool, "loaded": bool}}."""
+    return {
+        name: {"installed": proxy.installed, "loaded": proxy.loaded}
+        for name, proxy in _registry.items()
+    }
+
+
+def log_availability(logger: LogManager):
+    """Log dello stato dei backend opzionali (non ne forza l'import)."""
+    for name, state in availability().items():
+        logger.event("backend", backend=name, **state)
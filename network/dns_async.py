@@ -0,0 +1,409 @@
+# network/dns_async.py - Motore DNS asincrono (dnspython asyncresolver, query concorrenti).
+"""
+Motore di diagnostica DNS asincrono sicuro e robusto.
+- Query di tutti i record type e reverse lookup in parallelo
+- Diagnostica di liste di domini con concorrenza limitata
+- Nameserver e porta configurabili (anche stub locale su 127.0.0.1)
+- Cache TTL-aware opzionale (vedi network.dns_cache)
+- Confronto di più nameserver in parallelo (latenza, divergenza, timeout)
+- Query distribuite nel tempo dal budget di rate limiting (per nameserver)
+- Validazione e sanitizzazione input
+"""
+
+import asyncio
+import ipaddress
+import time
+
+from logs.custom_logging import LogManager
+from network.backends import backend
+from network.dns_cache import DEFAULT_CACHE, DEFAULT_NEGATIVE_TTL, negative_ttl
+from security.rate_limiter import DNS_KEY_PREFIX, athrottle
+from security.security import validate_address, validate_many
+
+# dnspython al primo uso (package dns con asyncresolver, resolver ed exception)
+dns = backend("dnspython")
+
+DEFAULT_RECORD_TYPES = ["A", "AAAA", "MX", "TXT"]
+
+# Limite di default di domini diagnosticati contemporaneamente
+DEFAULT_CONCURRENCY = 100
+
+
+def make_resolver(dns_timeout=3, nameservers=None, port=53):
+    """
+    Crea un resolver asincrono:
+    - nameservers=None: configurazione di sistema
+    - timeout per singola query e lifetime complessivo pari a dns_timeout
+    """
+    resolver = dns.asyncresolver.Resolver(configure=not nameservers)
+    if nameservers:
+        resolver.nameservers = list(nameservers)
+    resolver.port = port
+    resolver.timeout = dns_timeout
+    resolver.lifetime = dns_timeout
+    return resolver
+
+
+def _budget_key(resolver):
+    """Chiave del budget di probe: le query pesano sui nameserver, non sul nome."""
+    return DNS_KEY_PREFIX + ",".join(str(ns) for ns in resolver.nameservers)
+
+
+def _cache_scope(resolver):
+    """Parte della chiave di cache che identifica il resolver (nameserver, porta)."""
+    return tuple(str(ns) for ns in resolver.nameservers), resolver.port
+
+
+async def _query(resolver, name, rtype, cache=None):
+    """
+    Esegue una query; ritorna (lista record, errore o None).
+    Con una cache: risposte e NXDOMAIN/NoAnswer servite localmente fino a scadenza.
+    """
+    if cache is not None:
+        cached = cache.get(name, rtype, _cache_scope(resolver))
+        if cached is not None:
+            return cached
+    try:
+        await athrottle(_budget_key(resolver))
+        answer = await resolver.resolve(name, rtype)
+        result = [rdata.to_text() for rdata in answer], None
+        ttl = answer.rrset.ttl
+    except dns.resolver.NXDOMAIN as e:
+        result = [], "il nome DNS non esiste"
+        ttl = negative_ttl(next(iter(e.responses().values()), None))
+    except dns.resolver.NoAnswer as e:
+        result = [], "nessun record"
+        ttl = negative_ttl(e.response())
+    except dns.exception.Timeout:
+        return [], "timeout"
+    except Exception as e:
+        return [], str(e)
+    if cache is not None:
+        cache.put(name, rtype, result, ttl, _cache_scope(resolver))
+    return result
+
+
+async def _reverse(resolver, ip, cache=None):
+    """Reverse lookup di un IP; ritorna (hostname o None, errore o None)."""
+    if cache is not None:
+        cached = cache.get(ip, "PTR", _cache_scope(resolver))
+        if cached is not None:
+            return cached
+    try:
+        await athrottle(_budget_key(resolver))
+        answer = await resolver.resolve_address(ip)
+        result = answer[0].to_text().rstrip("."), None
+        ttl = answer.rrset.ttl
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+        result = None, str(e)
+        ttl = DEFAULT_NEGATIVE_TTL
+    except dns.exception.Timeout:
+        return None, "timeout"
+    except Exception as e:
+        return None, str(e)
+    if cache is not None:
+        cache.put(ip, "PTR", result, ttl, _cache_scope(resolver))
+    return result
+
+
+def _is_ip(address):
+    try:
+        ipaddress.ip_address(address)
+        return True
+    except ValueError:
+        return False
+
+
+async def diagnose(address, resolver, record_types=None, cache=None):
+    """
+    Diagnostica DNS di un singolo nome, con tutte le query in parallelo:
+    - Un task per record type (A sempre incluso per ricavare l'IP)
+    - Reverse lookup avviato appena il record A è disponibile
+    - cache opzionale (DnsCache) consultata prima di ogni query
+    Ritorna un dict con address, ip, reverse, records ed errors.
+    """
+    rtlist = list(dict.fromkeys(record_types or DEFAULT_RECORD_TYPES))
+    result = {
+        "address": address,
+        "ip": None,
+        "reverse": None,
+        "records": {},
+        "errors": {},
+    }
+
+    if _is_ip(address):
+        # IP letterale: solo reverse lookup, niente query forward
+        result["ip"] = address
+        result["reverse"], error = await _reverse(resolver, address, cache)
+        if error:
+            result["errors"]["reverse"] = error
+        return result
+
+    queries = {
+        rtype: asyncio.ensure_future(_query(resolver, address, rtype, cache))
+        for rtype in dict.fromkeys(rtlist + ["A"])
+    }
+
+    async def reverse_from_a():
+        records, _ = await queries["A"]
+        if not records:
+            return None, "nessun indirizzo IPv4 da risolvere"
+        result["ip"] = records[0]
+        return await _reverse(resolver, records[0], cache)
+
+    reverse_task = asyncio.ensure_future(reverse_from_a())
+    await asyncio.gather(reverse_task, *queries.values())
+
+    for rtype in rtlist:
+        records, error = queries[rtype].result()
+        if error:
+            result["errors"][rtype] = error
+        else:
+            result["records"][rtype] = records
+    result["reverse"], error = reverse_task.result()
+    if error:
+        result["errors"]["reverse"] = error
+    return result
+
+
+async def diagnose_many(
+    addresses,
+    record_types=None,
+    dns_timeout=3,
+    concurrency=DEFAULT_CONCURRENCY,
+    nameservers=None,
+    port=53,
+    cache=None,
+):
+    """
+    Diagnostica DNS di una lista di nomi con un unico resolver condiviso.
+    Al massimo concurrency nomi sono in diagnostica contemporaneamente.
+    Ritorna i risultati nello stesso ordine di addresses.
+    """
+    resolver = make_resolver(dns_timeout, nameservers, port)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(address):
+        async with semaphore:
+            return await diagnose(address, resolver, record_types, cache)
+
+    return await asyncio.gather(*(bounded(address) for address in addresses))
+
+
+def log_dns_result(result, logger: LogManager):
+    """Log di un risultato di diagnose() nel formato della diagnostica DNS."""
+    address = result["address"]
+    if result["ip"]:
+        logger.event("dns.resolve", address=address, ip=result["ip"])
+    if result["reverse"]:
+        logger.event("dns.reverse", ip=result["ip"], hostname=result["reverse"])
+    elif "reverse" in result["errors"]:
+        logger.event(
+            "dns.reverse_error",
+            "warning",
+            ip=result["ip"],
+            error=result["errors"]["reverse"],
+        )
+    for rtype, records in result["records"].items():
+        logger.event("dns.record", address=address, rtype=rtype, records=records)
+    for rtype, error in result["errors"].items():
+        if rtype != "reverse":
+            logger.event(
+                "dns.record_error", "warning", address=address, rtype=rtype, error=error
+            )
+
+
+def run_dns_bulk_diag(
+    addresses,
+    logger: LogManager,
+    record_types=None,
+    dns_timeout=3,
+    concurrency=DEFAULT_CONCURRENCY,
+    nameservers=None,
+    port=53,
+    cache=DEFAULT_CACHE,
+):
+    """
+    Esegue la diagnostica DNS su una lista di domini:
+    - Valida ogni dominio, scarta quelli non validi
+    - Query concorrenti con limite di concorrenza
+    - Risposte servite dalla cache finché il TTL è valido (cache=None per disattivarla)
+    - Log di ogni risultato
+    Ritorna la lista dei risultati (vuota se dnspython non è disponibile).
+    """
+    if not dns:
+        logger.error("Modulo dnspython non disponibile per query asincrone.")
+        print("ERRORE: modulo dnspython non disponibile.")
+        return []
+
+    valid = []
+    for address, ok in zip(addresses, validate_many(addresses)):
+        if ok:
+            valid.append(address)
+        else:
+            logger.warning(f"Dominio non valido scartato: {address}")
+
+    logger.info(
+        f"Avvio diagnostica DNS su {len(valid)} domini (concorrenza: {concurrency})"
+    )
+    results = asyncio.run(
+        diagnose_many(
+            valid, record_types, dns_timeout, concurrency, nameservers, port, cache
+        )
+    )
+    for result in results:
+        log_dns_result(result, logger)
+    if cache is not None:
+        logger.info(f"Cache DNS: {cache.stats()}")
+    failed = sum(1 for result in results if result["ip"] is None)
+    logger.info(
+        f"Fine diagnostica DNS: {len(results) - failed}/{len(results)} domini risolti."
+    )
+    return results
+
+
+def _percentile(sorted_values, pct):
+    """Percentile nearest-rank su una lista già ordinata."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+async def _timed_query(resolver, name, rtype):
+    """Query senza cache; ritorna (latenza ms, esito, risposta normalizzata)."""
+    await athrottle(_budget_key(resolver))
+    start = time.perf_counter()
+    try:
+        answer = await resolver.resolve(name, rtype)
+        status, records = "ok", tuple(sorted(r.to_text() for r in answer))
+    except dns.resolver.NXDOMAIN:
+        status, records = "nxdomain", ()
+    except dns.resolver.NoAnswer:
+        status, records = "noanswer", ()
+    except dns.exception.Timeout:
+        status, records = "timeout", None
+    except Exception:
+        status, records = "error", None
+    return (time.perf_counter() - start) * 1000, status, records
+
+
+async def compare_resolvers(
+    address, nameservers, record_types=None, dns_timeout=3, rounds=3, port=53
+):
+    """
+    Interroga lo stesso nome su tutti i nameserver in parallelo:
+    - rounds giri in sequenza, in ogni giro tutte le query (server x tipo) insieme
+    - per server: distribuzione di latenza, tasso di timeout, risposte divergenti
+      rispetto alla risposta di maggioranza per ogni record type
+    Ritorna un report per server, ordinato per latenza mediana.
+    """
+    rtlist = list(dict.fromkeys(record_types or DEFAULT_RECORD_TYPES))
+    resolvers = {ns: make_resolver(dns_timeout, [ns], port) for ns in nameservers}
+    latencies = {ns: [] for ns in nameservers}
+    failures = {ns: {"timeout": 0, "error": 0} for ns in nameservers}
+    answers = {ns: {} for ns in nameservers}
+
+    for _ in range(max(1, rounds)):
+        jobs = [(ns, rtype) for ns in nameservers for rtype in rtlist]
+        samples = await asyncio.gather(
+            *(_timed_query(resolvers[ns], address, rtype) for ns, rtype in jobs)
+        )
+        for (ns, rtype), (latency, status, records) in zip(jobs, samples):
+            if status in failures[ns]:
+                failures[ns][status] += 1
+                continue
+            latencies[ns].append(latency)
+            answers[ns][rtype] = (status, records)
+
+    # Risposta di maggioranza per record type tra i server che hanno risposto
+    majority = {}
+    for rtype in rtlist:
+        votes = {}
+        for ns in nameservers:
+            if rtype in answers[ns]:
+                votes[answers[ns][rtype]] = votes.get(answers[ns][rtype], 0) + 1
+        if votes:
+            majority[rtype] = max(votes, key=votes.get)
+
+    total = max(1, rounds) * len(rtlist)
+    report = []
+    for ns in nameservers:
+        values = sorted(latencies[ns])
+        divergent = {
+            rtype: list(answer[1])
+            for rtype, answer in answers[ns].items()
+            if answer != majority.get(rtype)
+        }
+        report.append(
+            {
+                "server": ns,
+                "queries": total,
+                "answered": len(values),
+                "timeout_rate": round(failures[ns]["timeout"] / total, 3),
+                "error_rate": round(failures[ns]["error"] / total, 3),
+                "p50_ms": _percentile(values, 50),
+                "p95_ms": _percentile(values, 95),
+                "max_ms": values[-1] if values else None,
+                "divergent": divergent,
+            }
+        )
+    report.sort(key=lambda r: (r["p50_ms"] is None, r["p50_ms"] or 0))
+    return report
+
+
+def run_resolver_comparison(
+    address,
+    logger: LogManager,
+    nameservers,
+    record_types=None,
+    dns_timeout=3,
+    rounds=3,
+    port=53,
+):
+    """
+    Confronta più resolver sullo stesso nome:
+    - Valida nome e indirizzi dei nameserver
+    - Query concorrenti su tutti i server (un server morto costa un solo timeout)
+    - Log e stampa di latenza, timeout e divergenze per server
+    Ritorna il report di compare_resolvers() (vuoto in caso di errore).
+    """
+    if not dns:
+        logger.error("Modulo dnspython non disponibile per query asincrone.")
+        print("ERRORE: modulo dnspython non disponibile.")
+        return []
+    if not validate_address(address):
+        logger.error(f"Indirizzo/Dominio non valido: {address}")
+        print("ERRORE: Indirizzo/Dominio non valido.")
+        return []
+    servers = []
+    for ns in nameservers:
+        if _is_ip(ns):
+            servers.append(ns)
+        else:
+            logger.warning(f"Nameserver non valido scartato: {ns}")
+    if not servers:
+        logger.error("Nessun nameserver valido da confrontare.")
+        print("ERRORE: Nessun nameserver configurato.")
+        return []
+
+    logger.info(f"Confronto resolver per {address} su {len(servers)} nameserver")
+    report = asyncio.run(
+        compare_resolvers(address, servers, record_types, dns_timeout, rounds, port)
+    )
+    print(f"--- Confronto resolver per {address} ---")
+    for entry in report:
+        logger.info(f"Resolver {entry['server']}: {entry}")
+        if entry["p50_ms"] is None:
+            print(f"{entry['server']}: nessuna risposta")
+            continue
+        print(
+            f"{entry['server']}: p50={entry['p50_ms']:.1f} ms "
+            f"p95={entry['p95_ms']:.1f} ms max={entry['max_ms']:.1f} ms "
+            f"timeout={entry['timeout_rate']:.0%} "
+            f"divergenze={sorted(entry['divergent']) or '-'}"
+        )
+    if report and report[0]["p50_ms"] is not None:
+        logger.info(f"Resolver più veloce per {address}: {report[0]['server']}")
+        print(f"Resolver più veloce: {report[0]['server']}")
+    return report
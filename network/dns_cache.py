@@ -0,0 +1,98 @@
+# network/dns_cache.py - Cache DNS in-process con TTL, negative caching e LRU.
+"""
+Cache dei risultati DNS per diagnostiche ripetute:
+- Chiave (nome, record type, resolver), scadenza secondo il TTL del record
+- Negative caching di NXDOMAIN/NoAnswer con il minimum del SOA (RFC 2308)
+- Dimensione limitata con eviction LRU
+- Contatori hit/miss per il reporting
+- Thread-safe (condivisa tra CLI, scheduler e orchestratore)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# TTL negativo di default se la risposta non contiene un SOA
+DEFAULT_NEGATIVE_TTL = 60
+
+# TTL massimo accettato, evita record "eterni" con TTL anomali
+MAX_TTL = 86400
+
+
+def negative_ttl(response, fallback=DEFAULT_NEGATIVE_TTL):
+    """
+    TTL per il negative caching di una risposta DNS:
+    minimo tra TTL del SOA in authority e campo minimum del SOA.
+    """
+    if response is not None:
+        for rrset in response.authority:
+            if rrset.rdtype == 6:  # SOA
+                return min(rrset.ttl, rrset[0].minimum)
+    return fallback
+
+
+class DnsCache:
+    """
+    Cache LRU con scadenza per (nome, record type, resolver) -> (records, errore).
+    resolver: identifica i nameserver interrogati (es. tupla nameserver + porta),
+    così risposte di resolver diversi non si mescolano; () = resolver unico.
+    """
+
+    def __init__(self, maxsize=1024, max_ttl=MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, rtype, resolver=()):
+        return name.rstrip(".").lower(), rtype.upper(), resolver
+
+    def get(self, name, rtype, resolver=()):
+        """Ritorna (records, errore) se presente e non scaduto, altrimenti None."""
+        key = self._key(name, rtype, resolver)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, name, rtype, value, ttl, resolver=()):
+        """Memorizza value = (records, errore) per ttl secondi (0 = non memorizzare)."""
+        ttl = min(ttl, self.max_ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        key = self._key(name, rtype, resolver)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Contatori di utilizzo della cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+# Cache condivisa dal processo (CLI e diagnostiche ripetute)
+DEFAULT_CACHE = DnsCache()
@@ -1,69 +1,110 @@
 """
 Modulo di diagnostica DNS sicuro e robusto.
-- Risoluzione nome, reverse, check record (A, AAAA, MX, TXT)
+- Risoluzione nome, reverse, check record (A, AAAA, MX, TXT) in parallelo
+- Query soggette al budget di rate limiting per nameserver
 - Logging dettagliato per auditing
 - Validazione e sanitizzazione input
 - Gestione errori granulare
 """
 
+import asyncio
 import socket
+from typing import Dict, List, NamedTuple, Optional
 
 from logs.custom_logging import LogManager
+from network import dns_async
+from network.dns_cache import DEFAULT_CACHE
+from security.rate_limiter import DNS_KEY_PREFIX, throttle
 from security.security import validate_address
 
+# Chiave di budget delle query via resolver di sistema (fallback socket)
+SYSTEM_RESOLVER_KEY = DNS_KEY_PREFIX + "system"
 
-def run_dns_diag(address, logger: LogManager, record_types=None, dns_timeout=3):
+
+class DnsResult(NamedTuple):
+    """Esito della diagnostica DNS: ip None se la risoluzione è fallita (vedi errors)."""
+
+    address: str
+    ip: Optional[str]
+    reverse: Optional[str]
+    records: Dict[str, List[str]]
+    errors: Dict[str, str]
+
+
+def run_dns_diag(
+    address,
+    logger: LogManager,
+    record_types=None,
+    dns_timeout=3,
+    nameservers=None,
+    cache=DEFAULT_CACHE,
+):
     """
     Esegue diagnostica DNS:
     - Valida address per sicurezza
-    - Risolve nome, reverse, record DNS
+    - Risolve nome, reverse, record DNS (in parallelo con il motore asincrono)
+    - Riusa i risultati in cache finché il TTL è valido
     - Log di ogni passo
+    Ritorna un DnsResult (None se l'indirizzo non è valido); stampa in cli.render.
     """
     if not validate_address(address):
         logger.error(f"Indirizzo/Dominio non valido: {address}")
-        print("ERRORE: Indirizzo/Dominio non valido.")
-        return
+        return None
 
     logger.info(f"Avvio diagnostica DNS per {address}")
+    if dns_async.dns:
+        try:
+            result = asyncio.run(
+                dns_async.diagnose_many(
+                    [address],
+                    record_types,
+                    dns_timeout,
+                    nameservers=nameservers,
+                    cache=cache,
+                )
+            )[0]
+            dns_async.log_dns_result(result, logger)
+            if cache is not None:
+                logger.info(f"Cache DNS: {cache.stats()}")
+            if result["ip"] is None:
+                logger.error(f"Errore DNS: {result['errors'].get('A')}", exc_info=False)
+            dns_result = DnsResult(
+                address,
+                result["ip"],
+                result["reverse"],
+                result["records"],
+                result["errors"],
+            )
+        except Exception as e:
+            logger.error(f"Errore DNS: {e}", exc_info=False)
+            dns_result = DnsResult(address, None, None, {}, {"A": str(e)})
+    else:
+        dns_result = _run_socket_dns_diag(address, logger)
+    logger.info("Fine diagnostica DNS.")
+    return dns_result
+
+
+def _run_socket_dns_diag(address, logger: LogManager):
+    """Fallback senza dnspython: solo risoluzione e reverse via socket."""
+    logger.warning(
+        "Modulo dnspython non disponibile per query avanzate.", exc_info=False
+    )
+    ip = hostname = None
+    errors = {"records": "modulo dnspython non disponibile"}
     try:
         # Risoluzione nome -> IP
+        throttle(SYSTEM_RESOLVER_KEY)
         ip = socket.gethostbyname(address)
         logger.info(f"Risoluzione {address} -> {ip}")
-        print(f"{address} -> {ip}")
         # Reverse DNS
         try:
+            throttle(SYSTEM_RESOLVER_KEY)
             hostname, _, _ = socket.gethostbyaddr(ip)
             logger.info(f"Reverse {ip} -> {hostname}")
-            print(f"Reverse: {ip} -> {hostname}")
         except Exception as e:
             logger.warning(f"Reverse DNS non disponibile: {e}", exc_info=False)
-        # Check record DNS (A, AAAA, MX, TXT, ecc)
-        try:
-            import dns.resolver
-
-            rtlist = record_types if record_types else ["A", "AAAA", "MX", "TXT"]
-            resolver = dns.resolver.Resolver()
-            resolver.timeout = dns_timeout
-            for rtype in rtlist:
-                try:
-                    answers = resolver.resolve(address, rtype)
-                    logger.info(f"Record {rtype}: {[str(a) for a in answers]}")  # type: ignore
-                    print(f"{rtype}: {[str(a) for a in answers]}")  # type: ignore
-                except dns.resolver.NXDOMAIN:
-                    logger.warning(
-                        f"Record {rtype} non trovato: il nome DNS non esiste: {address}",
-                        exc_info=False,
-                    )
-                except Exception as e:
-                    logger.warning(f"Record {rtype} errore: {e}", exc_info=False)
-        except ImportError:
-            logger.warning(
-                "Modulo dnspython non disponibile per query avanzate.", exc_info=False
-            )
-            print("ERRORE: modulo dnspython non disponibile per query avanzate.")
+            errors["reverse"] = str(e)
     except Exception as e:
         logger.error(f"Errore DNS: {e}", exc_info=False)
-        print("ERRORE: DNS fallito, vedi log.")
-    logger.info("Fine diagnostica DNS.")
-    print("Diagnostica DNS completata.")
-    logger.info("Fine diagnostica DNS.")
+        errors["A"] = str(e)
+    return DnsResult(address, ip, hostname, {}, errors)
@@ -0,0 +1,305 @@
+# network/icmp_transport.py - Trasporto ICMP condiviso (socket unico, demultiplexer id/seq).
+"""
+Trasporto ICMP echo a lunga vita condiviso tra probe concorrenti:
+- Un solo socket ICMP: SOCK_DGRAM non privilegiato (Linux/macOS) o SOCK_RAW
+- Thread ricevitore unico che instrada le risposte per identifier/sequence
+- Timestamp di invio e ricezione con time.perf_counter (sub-millisecondo)
+- Nessun socket o processo creato per singolo probe
+- Burst nativo a cadenza fissa con statistiche min/avg/max/loss (senza subprocess ping)
+- Solo IPv4 (socket AF_INET): destinazioni IPv6 rifiutate con ValueError
+- API: IcmpTransport.ping(), send()/wait(), burst(), burst_stats(), get_transport()
+"""
+
+import atexit
+import ipaddress
+import itertools
+import logging
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+TRANSPORT_KINDS = ("auto", "dgram", "raw")
+
+# Spaziatura minima tra echo di un burst (secondi): niente flood
+MIN_BURST_SPACING = 0.01
+
+_HEADER = struct.Struct("!BBHHH")
+
+# Logger del tool (configurato da LogManager): il trasporto è condiviso dal processo
+_logger = logging.getLogger("network_diag_tool")
+
+
+def checksum(data):
+    """Checksum Internet (RFC 1071) in complemento a uno su 16 bit."""
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo(ident, seq, payload=b""):
+    """Pacchetto ICMP echo request con checksum."""
+    header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return _HEADER.pack(
+        ICMP_ECHO_REQUEST, 0, checksum(header + payload), ident, seq
+    ) + bytes(payload)
+
+
+def resolve_ipv4(dst):
+    """
+    Indirizzo IPv4 di dst (getaddrinfo limitato ad AF_INET).
+    ValueError per un indirizzo IPv6, socket.gaierror se il nome non ha record IPv4.
+    """
+    try:
+        version = ipaddress.ip_address(dst).version
+    except ValueError:
+        version = None  # nome host
+    if version == 6:
+        raise ValueError(f"Trasporto ICMP solo IPv4, destinazione IPv6: {dst}")
+    infos = socket.getaddrinfo(dst, None, socket.AF_INET, socket.SOCK_DGRAM)
+    return infos[0][4][0]
+
+
+def parse_reply(packet):
+    """
+    (type, ident, seq) di un pacchetto ICMP ricevuto; None se troppo corto.
+    I socket raw (e DGRAM su macOS) ricevono anche l'header IP: riconosciuto dalla
+    versione 4 nel primo nibble (nessun tipo ICMP echo inizia con 0x4_),
+    lunghezza da IHL.
+    """
+    offset = (packet[0] & 0x0F) * 4 if packet and packet[0] >> 4 == 4 else 0
+    if len(packet) < offset + _HEADER.size:
+        return None
+    icmp_type, _, _, ident, seq = _HEADER.unpack_from(packet, offset)
+    return icmp_type, ident, seq
+
+
+class _Probe:
+    """Probe in attesa di risposta."""
+
+    __slots__ = ("seq", "dst", "sent_at", "rtt", "event")
+
+    def __init__(self, seq, dst):
+        self.seq = seq
+        self.dst = dst
+        self.sent_at = None
+        self.rtt = None
+        self.event = threading.Event()
+
+
+class IcmpTransport:
+    """
+    Socket ICMP condiviso con demultiplexer:
+    - send(dst) invia un echo e ritorna l'handle del probe
+    - wait(probe, timeout) ritorna l'RTT in ms o None (perso)
+    - ping(dst, timeout) = send + wait; thread-safe, richiamabile in parallelo
+    """
+
+    def __init__(self, kind="auto"):
+        if kind not in TRANSPORT_KINDS:
+            raise ValueError(f"Tipo di trasporto ICMP non valido: {kind}")
+        self.sock, self.kind = self._open(kind)
+        if self.kind == "dgram":
+            # Il kernel assegna l'identifier (porta locale) e filtra le risposte
+            self.sock.bind(("", 0))
+            self.ident = self.sock.getsockname()[1]
+        else:
+            self.ident = (os.getpid() ^ id(self)) & 0xFFFF
+        self.closed = False
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread = threading.Thread(
+            target=self._receive_loop, name="icmp-transport", daemon=True
+        )
+        self._thread.start()
+
+    @staticmethod
+    def _open(kind):
+        if kind in ("auto", "dgram"):
+            try:
+                sock = socket.socket(
+                    socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP
+                )
+                return sock, "dgram"
+            except OSError:
+                if kind == "dgram":
+                    raise
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        return sock, "raw"
+
+    def _next_seq(self):
+        """Sequence libera a 16 bit (wrap), registrata tra i probe in attesa."""
+        for _ in range(0x10000):
+            seq = next(self._seq) & 0xFFFF
+            if seq not in self._pending:
+                return seq
+        raise RuntimeError("Troppi probe ICMP in attesa")
+
+    def send(self, dst, payload=b""):
+        if self.closed:
+            raise ValueError("Trasporto ICMP chiuso")
+        ip = resolve_ipv4(dst)
+        with self._lock:
+            probe = _Probe(self._next_seq(), ip)
+            packet = build_echo(self.ident, probe.seq, payload)
+            # sent_at prima della registrazione: il ricevitore non vede mai None
+            probe.sent_at = time.perf_counter()
+            self._pending[probe.seq] = probe
+        try:
+            self.sock.sendto(packet, (ip, 0))
+        except OSError:
+            self._forget(probe)
+            raise
+        return probe
+
+    def wait(self, probe, timeout=2.0):
+        """RTT in ms del probe, None se nessuna risposta entro timeout."""
+        probe.event.wait(timeout)
+        self._forget(probe)
+        return probe.rtt
+
+    def ping(self, dst, timeout=2.0, payload=b""):
+        return self.wait(self.send(dst, payload), timeout)
+
+    def burst(self, dst, count, spacing=0.2, timeout=2.0):
+        """
+        Invia count echo a cadenza fissa (spacing secondi, ancorata al primo invio)
+        senza attendere le risposte tra un invio e l'altro.
+        Ritorna la lista degli RTT in ms (None = perso), nell'ordine di invio.
+        """
+        spacing = max(spacing, MIN_BURST_SPACING)
+        ip = resolve_ipv4(dst)
+        probes = []
+        start = time.perf_counter()
+        for i in range(count):
+            pause = start + i * spacing - time.perf_counter()
+            if pause > 0:
+                time.sleep(pause)
+            probes.append(self.send(ip))
+        return [
+            self.wait(probe, max(0.0, probe.sent_at + timeout - time.perf_counter()))
+            for probe in probes
+        ]
+
+    def _forget(self, probe):
+        with self._lock:
+            if self._pending.get(probe.seq) is probe:
+                del self._pending[probe.seq]
+
+    def _dispatch(self, packet, src, received_at):
+        """Instrada una risposta al probe in attesa (id/seq/sorgente); True se abbinata."""
+        parsed = parse_reply(packet)
+        if parsed is None:
+            return False
+        icmp_type, ident, seq = parsed
+        if icmp_type != ICMP_ECHO_REPLY:
+            return False
+        # DGRAM: il kernel ha già filtrato per identifier (e lo riscrive)
+        if self.kind == "raw" and ident != self.ident:
+            return False
+        with self._lock:
+            probe = self._pending.get(seq)
+            if probe is None or probe.dst != src or probe.rtt is not None:
+                return False
+            probe.rtt = (received_at - probe.sent_at) * 1000
+        probe.event.set()
+        return True
+
+    def _receive_loop(self):
+        sock, wake = self.sock, self._wake_r
+        while not self.closed:
+            try:
+                ready, _, _ = select.select([sock, wake], [], [])
+                if wake in ready:
+                    return
+                packet, addr = sock.recvfrom(65535)
+            except OSError:
+                if self.closed:
+                    return
+                continue
+            try:
+                self._dispatch(packet, addr[0], time.perf_counter())
+            except Exception as e:
+                # Un pacchetto malformato non deve fermare il ricevitore condiviso
+                _logger.error(f"Errore instradamento risposta ICMP: {e}", exc_info=True)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._wake_w.send(b"\0")
+        self._thread.join(timeout=2)
+        for s in (self.sock, self._wake_r, self._wake_w):
+            s.close()
+        with self._lock:
+            for probe in self._pending.values():
+                probe.event.set()
+            self._pending.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def burst_stats(rtts):
+    """
+    Statistiche di un burst con i nomi dei campi di pingparsing:
+    min_rtt/avg_rtt/max_rtt in ms, packet_loss_rate in percentuale.
+    RTT vuoti ("") se nessuna risposta.
+    """
+    received = [rtt for rtt in rtts if rtt is not None]
+    sent = len(rtts)
+    stats = {
+        "packet_transmit": sent,
+        "packet_receive": len(received),
+        "packet_loss_rate": (
+            round(100.0 * (sent - len(received)) / sent, 3) if sent else ""
+        ),
+        "min_rtt": "",
+        "avg_rtt": "",
+        "max_rtt": "",
+    }
+    if received:
+        stats["min_rtt"] = round(min(received), 3)
+        stats["avg_rtt"] = round(sum(received) / len(received), 3)
+        stats["max_rtt"] = round(max(received), 3)
+    return stats
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_transport(kind="auto"):
+    """
+    Trasporto condiviso dal processo, aperto al primo uso (PermissionError/OSError
+    se il sistema non consente socket ICMP), chiuso all'uscita.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None or _shared.closed:
+            _shared = IcmpTransport(kind)
+        return _shared
+
+
+def close_transport():
+    global _shared
+    with _shared_lock:
+        transport, _shared = _shared, None
+    if transport is not None:
+        transport.close()
+
+
+atexit.register(close_transport)
@@ -0,0 +1,254 @@
+# network/mtr.py - Traceroute continuo stile MTR con header Paris (flow-stable).
+"""
+Modulo di diagnostica Traceroute continuo sicuro e robusto.
+- Probe ICMP a cadenza fissa su ogni hop (stile MTR)
+- Header Paris: checksum ICMP costante, stesso flusso sui load balancer ECMP
+- Statistiche per hop in O(1) memoria (min/avg/max/stdev/jitter/loss, Welford)
+- Emissione incrementale su CSV e log ad ogni ciclo
+- Probe di ogni ciclo soggetti al budget di rate limiting (security.rate_limiter)
+- Validazione e sanitizzazione input (no injection)
+"""
+
+import math
+import socket
+import time
+from typing import Dict
+
+from csv_utils.csv_writer import get_sink
+from logs.custom_logging import LogManager
+from network.backends import lazy_attr, resolve
+from security.rate_limiter import throttle
+from security.security import validate_address
+
+# Backend opzionale scapy, importato al primo uso (bool() = installato)
+sr = lazy_attr("scapy", "sr")
+IP = lazy_attr("scapy", "IP")
+ICMP = lazy_attr("scapy", "ICMP")
+
+MTR_CSV_HEADER = [
+    "timestamp",
+    "address",
+    "ttl",
+    "hop",
+    "sent",
+    "received",
+    "loss_pct",
+    "last_ms",
+    "min_ms",
+    "avg_ms",
+    "max_ms",
+    "stdev_ms",
+    "jitter_ms",
+]
+
+# Somma (complemento a uno) id + seq mantenuta costante per tutti i probe
+DEFAULT_FLOW_SUM = 0x4D54
+
+
+class HopStats:
+    """
+    Accumulatore online per un hop (memoria costante):
+    - Media e varianza con l'algoritmo di Welford
+    - Jitter come media mobile di |delta RTT| (RFC 3550)
+    """
+
+    __slots__ = (
+        "hop_ip",
+        "sent",
+        "received",
+        "last",
+        "min",
+        "max",
+        "mean",
+        "_m2",
+        "jitter",
+    )
+
+    def __init__(self):
+        self.hop_ip = None
+        self.sent = 0
+        self.received = 0
+        self.last = None
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.jitter = 0.0
+
+    def add(self, rtt, hop_ip=None):
+        """Registra un probe: rtt in ms, None se perso."""
+        self.sent += 1
+        if rtt is None:
+            return
+        if hop_ip is not None:
+            self.hop_ip = hop_ip
+        if self.last is not None:
+            self.jitter += (abs(rtt - self.last) - self.jitter) / 16
+        self.received += 1
+        self.last = rtt
+        self.min = min(self.min, rtt)
+        self.max = max(self.max, rtt)
+        delta = rtt - self.mean
+        self.mean += delta / self.received
+        self._m2 += delta * (rtt - self.mean)
+
+    @property
+    def loss(self):
+        """Percentuale di probe persi."""
+        return 100.0 * (self.sent - self.received) / self.sent if self.sent else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self._m2 / (self.received - 1)) if self.received > 1 else 0.0
+
+    def as_row(self):
+        """Campi statistici nel formato di MTR_CSV_HEADER (da hop in poi)."""
+        if not self.received:
+            return [self.hop_ip or "*", self.sent, 0, 100.0, "", "", "", "", "", ""]
+        return [
+            self.hop_ip,
+            self.sent,
+            self.received,
+            round(self.loss, 2),
+            round(self.last, 2),
+            round(self.min, 2),
+            round(self.mean, 2),
+            round(self.max, 2),
+            round(self.stdev, 2),
+            round(self.jitter, 2),
+        ]
+
+
+def _paris_ident(seq, flow_sum=DEFAULT_FLOW_SUM):
+    """
+    Calcola l'id ICMP che, sommato a seq in complemento a uno, dà flow_sum:
+    il checksum ICMP resta costante e i load balancer vedono sempre lo stesso flusso.
+    """
+    return (flow_sum - seq) % 0xFFFF
+
+
+def _send_cycle(address, max_ttl, timeout, seq_base, flow_sum=DEFAULT_FLOW_SUM):
+    """
+    Invia un probe per ogni TTL (1..max_ttl) con un'unica chiamata sr().
+    Ritorna {ttl: (hop_ip, rtt_ms, fine)}; hop_ip/rtt None se nessuna risposta.
+    """
+    packets = []
+    for ttl in range(1, max_ttl + 1):
+        seq = (seq_base + ttl) % 0xFFFF
+        ident = _paris_ident(seq, flow_sum)
+        packets.append(IP(dst=address, ttl=ttl) / ICMP(id=ident, seq=seq))
+    throttle(address, max_ttl)
+    answered, _ = sr(packets, timeout=timeout, verbose=0)
+    icmp = resolve(ICMP)
+    results = {ttl: (None, None, False) for ttl in range(1, max_ttl + 1)}
+    for snd, rcv in answered:
+        rtt = (rcv.time - snd.sent_time) * 1000
+        results[snd.ttl] = (rcv.src, rtt, rcv[icmp].type != 11)
+    return results
+
+
+def run_mtr_diag(
+    address,
+    logger: LogManager,
+    os_type: str,
+    max_hops=20,
+    timeout=2,
+    interval=1.0,
+    cycles=None,
+    csvfile=None,
+):
+    """
+    Esegue un traceroute continuo stile MTR:
+    - Un ciclo di probe (tutti i TTL in batch) ogni interval secondi
+    - Statistiche per hop aggiornate online, senza conservare i campioni
+    - Righe per hop emesse su CSV/log ad ogni ciclo
+    - cycles=None: esecuzione fino a interruzione (Ctrl+C)
+    Ritorna {ttl: HopStats}.
+    """
+    if not validate_address(address):
+        logger.error(f"Indirizzo non valido: {address}")
+        print("ERRORE: Indirizzo non valido.")
+        return {}
+    if not (sr and IP and ICMP):
+        logger.error("Modulo traceroute/scapy non disponibile.")
+        print("ERRORE: modulo traceroute non disponibile.")
+        return {}
+    try:
+        dst_ip = socket.gethostbyname(address)
+    except OSError as e:
+        logger.error(f"Risoluzione fallita per {address}: {e}")
+        print("ERRORE: Risoluzione indirizzo fallita.")
+        return {}
+
+    logger.info(
+        f"Inizio traceroute continuo verso {address} (OS: {os_type}, intervallo: {interval}s)"
+    )
+    sink = None
+    if csvfile:
+        try:
+            sink = get_sink(csvfile, MTR_CSV_HEADER)
+        except Exception as e:
+            logger.error(f"Errore apertura CSV: {e}", exc_info=True)
+    stats: Dict[int, HopStats] = {}
+    path_len = max_hops
+    cycle = 0
+    next_tick = time.monotonic()
+    try:
+        while cycles is None or cycle < cycles:
+            try:
+                results = _send_cycle(
+                    dst_ip, path_len, timeout, seq_base=cycle * max_hops
+                )
+            except Exception as e:
+                logger.error(f"Errore ciclo traceroute: {e}", exc_info=True)
+                results = {}
+            # Il percorso si accorcia al primo TTL che raggiunge la destinazione
+            # e si riallunga di un hop per ciclo se la destinazione non risponde
+            for ttl in sorted(results):
+                if results[ttl][2]:
+                    path_len = ttl
+                    break
+            else:
+                path_len = min(path_len + 1, max_hops)
+            for ttl in range(1, path_len + 1):
+                hop_ip, rtt, _ = results.get(ttl, (None, None, False))
+                stats.setdefault(ttl, HopStats()).add(rtt, hop_ip)
+            for ttl in [t for t in stats if t > path_len]:
+                del stats[ttl]
+
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            rows = [
+                [timestamp, address, ttl, *stats[ttl].as_row()] for ttl in sorted(stats)
+            ]
+            logger.event("mtr.cycle", address=address, cycle=cycle + 1, rows=rows)
+            if sink:
+                try:
+                    sink.write_rows(rows)
+                except Exception as e:
+                    logger.error(f"Errore scrittura CSV: {e}", exc_info=True)
+            cycle += 1
+
+            # Cadenza fissa: il prossimo ciclo è ancorato al precedente, non alla fine
+            next_tick += interval
+            pause = next_tick - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            else:
+                next_tick = time.monotonic()
+    except KeyboardInterrupt:
+        logger.info("Traceroute continuo interrotto dall'utente.")
+    if sink:
+        sink.flush()
+
+    print(f"--- Traceroute continuo {address} ({cycle} cicli) ---")
+    for ttl in sorted(stats):
+        hop = stats[ttl]
+        print(
+            f"{ttl:2d} {hop.hop_ip or '*'} loss={hop.loss:.1f}% "
+            f"avg={hop.mean:.2f} min={hop.min:.2f} max={hop.max:.2f} "
+            f"jitter={hop.jitter:.2f} ms"
+            if hop.received
+            else f"{ttl:2d} * (timeout)"
+        )
+    logger.info("Fine diagnostica traceroute continuo.")
+    return stats
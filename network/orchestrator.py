@@ -0,0 +1,323 @@
+# network/orchestrator.py - Diagnosi avanzata: tutti i sottosistemi in parallelo su un target.
+"""
+Orchestratore della diagnosi avanzata di un target:
+- Stadi indipendenti (ping, burst, batch ICMP, traceroute, DNS, ratei interfacce)
+  avviati insieme in un pool di thread dedicato
+- Timeout per stadio: uno stadio lento viene marcato "timeout" senza bloccare il report
+- Durata complessiva ~ stadio più lento invece della somma
+- Report consolidato (DiagnosisReport) con esito, durata e risultato di ogni stadio
+- Riga ping/burst/batch scritta su CSV e store binario come la diagnostica avanzata
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from logs.custom_logging import LogManager
+from network import dns_async
+from network import ping as ping_module
+from network import traceroute as traceroute_module
+from network.dns_cache import DEFAULT_CACHE
+from network.ping import (
+    DEFAULT_BURST_SPACING,
+    DEFAULT_SCAPY_COUNT,
+    _store_rows,
+    batch_probe,
+    burst_probe,
+    ping_csv_header,
+    ping_row,
+    single_ping,
+    write_csv,
+)
+from network.stats import InterfaceSampler, counter_reader
+from security.security import validate_address
+
+STAGES = ("ping", "burst", "batch", "traceroute", "dns", "stats")
+
+# Timeout di default per stadio (secondi), sovrascrivibile per nome
+DEFAULT_STAGE_TIMEOUT = 30.0
+
+# Finestra di campionamento dei contatori per lo stadio stats (secondi)
+STATS_WINDOW = 1.0
+
+
+class StageSkipped(Exception):
+    """Stadio non eseguibile (backend opzionale assente)."""
+
+
+class StageResult:
+    """Esito di uno stadio: ok, error, timeout o skipped."""
+
+    __slots__ = ("name", "status", "value", "elapsed", "error")
+
+    def __init__(self, name, status, value=None, elapsed=0.0, error=None):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    def __repr__(self):
+        return f"StageResult({self.name!r}, {self.status!r}, {self.elapsed:.3f}s)"
+
+
+class DiagnosisReport:
+    """Report consolidato: {nome stadio: StageResult} nell'ordine degli stadi."""
+
+    __slots__ = ("address", "started", "elapsed", "stages")
+
+    def __init__(self, address, started, elapsed, stages):
+        self.address = address
+        self.started = started
+        self.elapsed = elapsed
+        self.stages = stages
+
+    def value(self, name, default=None):
+        """Risultato dello stadio se riuscito, altrimenti default."""
+        result = self.stages.get(name)
+        return result.value if result is not None and result.ok else default
+
+    def ping_row(self, scapy_count=DEFAULT_SCAPY_COUNT):
+        """Riga ping (formato ping_csv_header) dagli stadi ping, burst e batch."""
+        return ping_row(
+            self.address,
+            self.value("ping"),
+            self.value("burst"),
+            self.value("batch", []),
+            scapy_count,
+        )
+
+    def as_dict(self):
+        return {
+            "address": self.address,
+            "elapsed_s": round(self.elapsed, 3),
+            "stages": {
+                name: {
+                    "status": r.status,
+                    "elapsed_s": round(r.elapsed, 3),
+                    "error": r.error,
+                    "value": r.value,
+                }
+                for name, r in self.stages.items()
+            },
+        }
+
+
+def _stats_rates(window=STATS_WINDOW):
+    reader = counter_reader()
+    if reader is None:
+        raise StageSkipped("psutil e /proc/net/dev assenti")
+    sampler = InterfaceSampler(reader, history=2)
+    try:
+        sampler.sample()
+        time.sleep(window)
+        sampler.sample()
+        return sampler.rates()
+    finally:
+        sampler.close()
+
+
+def _dns_records(address, record_types, dns_timeout, nameservers):
+    if not dns_async.dns:
+        raise StageSkipped("dnspython non disponibile")
+    return asyncio.run(
+        dns_async.diagnose_many(
+            [address],
+            record_types,
+            dns_timeout,
+            nameservers=nameservers,
+            cache=DEFAULT_CACHE,
+        )
+    )[0]
+
+
+def _ping(address, logger, timeout, transport):
+    if transport is None and not ping_module.ping3_ping:
+        raise StageSkipped("ping3 non disponibile")
+    return single_ping(address, logger, timeout, transport)
+
+
+def _burst(address, logger, count, timeout, transport, burst_spacing):
+    if transport is None and not ping_module.pingparsing:
+        raise StageSkipped("pingparsing non disponibile")
+    return burst_probe(address, logger, count, timeout, transport, burst_spacing)
+
+
+def _batch(address, logger, count, timeout, transport):
+    if transport is None and not (
+        ping_module.sr and ping_module.IP and ping_module.ICMP
+    ):
+        raise StageSkipped("scapy non disponibile")
+    return batch_probe(address, logger, count, timeout, transport)
+
+
+def _traceroute(address, max_hops, timeout):
+    if not traceroute_module.traceroute:
+        raise StageSkipped("scapy non disponibile")
+    return traceroute_module.trace_hops(address, max_hops, timeout)
+
+
+def default_stages(
+    logger: LogManager,
+    max_ping_count=10,
+    scapy_count=DEFAULT_SCAPY_COUNT,
+    timeout=2,
+    max_hops=20,
+    record_types=None,
+    dns_timeout=3,
+    nameservers=None,
+    transport=None,
+    burst_spacing=DEFAULT_BURST_SPACING,
+    names=STAGES,
+):
+    """Stadi standard {nome: callable(address)}, limitati come la diagnostica avanzata."""
+    available = {
+        "ping": lambda addr: _ping(addr, logger, timeout, transport),
+        "burst": lambda addr: _burst(
+            addr,
+            logger,
+            min(max_ping_count, 10),
+            timeout,
+            transport,
+            burst_spacing,
+        ),
+        "batch": lambda addr: _batch(
+            addr, logger, min(scapy_count, max_ping_count), timeout, transport
+        ),
+        "traceroute": lambda addr: _traceroute(addr, max_hops, timeout),
+        "dns": lambda addr: _dns_records(addr, record_types, dns_timeout, nameservers),
+        "stats": lambda addr: _stats_rates(),
+    }
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Stadi non supportati: {', '.join(unknown)}")
+    return {name: available[name] for name in names}
+
+
+def _timed(stage, address):
+    start = time.perf_counter()
+    value = stage(address)
+    return value, time.perf_counter() - start
+
+
+def diagnose(
+    address,
+    stages,
+    logger: LogManager,
+    timeouts=None,
+    default_timeout=DEFAULT_STAGE_TIMEOUT,
+):
+    """
+    Esegue tutti gli stadi in parallelo verso address (già validato).
+    timeouts: {nome: secondi} per stadio, default_timeout per gli altri.
+    Gli stadi oltre il timeout restano nel pool fino al loro timeout di rete,
+    ma non ritardano il report. Ritorna un DiagnosisReport.
+    """
+    timeouts = timeouts or {}
+    started = time.time()
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, len(stages)), thread_name_prefix="diag-stage"
+    )
+    futures = {
+        name: executor.submit(_timed, stage, address) for name, stage in stages.items()
+    }
+    results = {}
+    # Attesa in ordine di scadenza: ogni stadio ha la propria, dall'avvio comune
+    deadlines = {name: start + timeouts.get(name, default_timeout) for name in stages}
+    for name in sorted(stages, key=lambda n: deadlines[n]):
+        future = futures[name]
+        try:
+            value, elapsed = future.result(
+                timeout=max(0.0, deadlines[name] - time.monotonic())
+            )
+            results[name] = StageResult(name, "ok", value, elapsed)
+        except FutureTimeout:
+            future.cancel()
+            limit = timeouts.get(name, default_timeout)
+            results[name] = StageResult(
+                name, "timeout", elapsed=limit, error=f"oltre {limit}s"
+            )
+        except StageSkipped as e:
+            results[name] = StageResult(name, "skipped", error=str(e))
+        except Exception as e:
+            logger.error(f"Errore stadio {name} per {address}: {e}", exc_info=True)
+            results[name] = StageResult(
+                name, "error", elapsed=time.monotonic() - start, error=str(e)
+            )
+        result = results[name]
+        logger.event(
+            "diag.stage",
+            "info" if result.status in ("ok", "skipped") else "warning",
+            address=address,
+            stage=name,
+            status=result.status,
+            elapsed_ms=round(result.elapsed * 1000, 1),
+        )
+    executor.shutdown(wait=False, cancel_futures=True)
+    report = DiagnosisReport(
+        address,
+        started,
+        time.monotonic() - start,
+        {name: results[name] for name in stages},
+    )
+    logger.event(
+        "diag.report",
+        address=address,
+        elapsed_ms=round(report.elapsed * 1000, 1),
+        failed=",".join(
+            n for n, r in results.items() if r.status in ("error", "timeout")
+        ),
+    )
+    return report
+
+
+def run_full_diag(
+    address,
+    logger: LogManager,
+    os_type: str,
+    stages=None,
+    timeouts=None,
+    stage_timeout=DEFAULT_STAGE_TIMEOUT,
+    csvfile=None,
+    store=None,
+    scapy_count=DEFAULT_SCAPY_COUNT,
+    **stage_options,
+):
+    """
+    Diagnosi avanzata di un target con tutti gli stadi in parallelo:
+    - Valida address
+    - Stadi di default_stages(**stage_options) se stages non è fornito
+    - Logga il report, scrive la riga ping su CSV/store
+    Ritorna il DiagnosisReport (None se l'indirizzo non è valido); stampa in cli.render.
+    """
+    if not validate_address(address):
+        logger.error(f"Indirizzo non valido: {address}")
+        print("ERRORE: Indirizzo non valido.")
+        return None
+
+    if stages is None:
+        stages = default_stages(logger, scapy_count=scapy_count, **stage_options)
+    logger.info(
+        f"Inizio diagnosi avanzata di {address} (OS: {os_type}, stadi: {', '.join(stages)})"
+    )
+    report = diagnose(address, stages, logger, timeouts, stage_timeout)
+
+    if any(name in report.stages for name in ("ping", "burst", "batch")):
+        row = report.ping_row(scapy_count)
+        if csvfile:
+            try:
+                write_csv(csvfile, ping_csv_header(scapy_count), [row])
+                logger.info(f"Scrittura diagnostica avanzata su CSV: {csvfile}")
+            except Exception as e:
+                logger.error(f"Errore scrittura CSV: {e}", exc_info=True)
+                print("ERRORE: Scrittura CSV fallita.")
+        if store is not None:
+            _store_rows(store, [row], logger)
+    logger.info(f"Diagnosi avanzata completata in {report.elapsed:.2f} s.")
+    return report
@@ -2,55 +2,321 @@
 """
 Modulo di diagnostica ICMP Ping sicuro e robusto.
 - Ping semplice e avanzato (pingparsing, ping3, scapy)
+- Opzionale: trasporto ICMP condiviso (network.icmp_transport) al posto di ping3/scapy
+  e burst nativo al posto di pingparsing (nessun subprocess ping)
 - Logging dettagliato per auditing
-- Rate limiting su ping avanzati (evita flood)
+- Rate limiting dei probe (budget globale e per target, security.rate_limiter)
 - Scrittura CSV sicura (append, header, validazione input)
 - Compatibilità multipiattaforma (Windows/Linux/Mac)
 - Validazione e sanitizzazione input per sicurezza
 """
 
+import ipaddress
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional, Tuple
 
+from csv_utils.csv_writer import get_sink
 from logs.custom_logging import LogManager
-from security.security import validate_address
+from network.backends import backend, lazy_attr, resolve
+from network.icmp_transport import burst_stats
+from security.rate_limiter import throttle
+from security.security import validate_address, validate_many
 
-try:
-    import pingparsing
-except ImportError:
-    pingparsing = None
+# Backend opzionali, importati al primo uso (bool() = installato)
+pingparsing = backend("pingparsing")
+ping3_ping = lazy_attr("ping3", "ping")
+sr = lazy_attr("scapy", "sr")
+IP = lazy_attr("scapy", "IP")
+ICMP = lazy_attr("scapy", "ICMP")
 
-try:
-    from ping3 import ping as ping3_ping
-except ImportError:
-    ping3_ping = None
 
-try:
-    from scapy.all import ICMP, IP, sr1  # type: ignore
-except ImportError:
-    sr1 = IP = ICMP = None
-
-
-def write_csv(csvfile, header, rows):
+def write_csv(csvfile, header, rows, max_bytes=None):
     """
     Scrive le righe su CSV in modo sicuro.
     - Crea header solo se necessario
     - Append, no overwrite
     - Protezione da path traversal e injection
+    - File handle persistente (sink condiviso), righe su disco al ritorno
     """
     if not isinstance(csvfile, str) or ".." in csvfile or csvfile.startswith("/"):
         raise ValueError("Path CSV non valido o potenzialmente rischioso.")
-    write_header = not os.path.isfile(csvfile) or os.path.getsize(csvfile) == 0
-    with open(csvfile, mode="a", newline="", encoding="utf-8") as f:
-        import csv  # type: ignore
+    sink = get_sink(csvfile, header, folder="", max_bytes=max_bytes, sanitize=True)
+    sink.write_rows(rows)
+    sink.flush()
+
+
+# Numero di default di probe scapy (colonne scapy_ping_N_ms nel CSV)
+DEFAULT_SCAPY_COUNT = 4
+
+# Spaziatura di default tra gli echo del burst nativo (secondi)
+DEFAULT_BURST_SPACING = 0.2
+
+
+def ping_csv_header(scapy_count=DEFAULT_SCAPY_COUNT):
+    """Header CSV della diagnostica ping, con una colonna per ogni probe scapy."""
+    return [
+        "timestamp",
+        "address",
+        "ping3_ms",
+        "pingparsing_min",
+        "pingparsing_avg",
+        "pingparsing_max",
+        "pingparsing_packet_loss",
+        *(f"scapy_ping_{i + 1}_ms" for i in range(scapy_count)),
+    ]
+
+
+PING_CSV_HEADER = ping_csv_header()
+
+
+def ping_record(row):
+    """
+    Converte una riga ping (formato ping_csv_header) nel record tipizzato
+    dello store binario (storage.columnar_store.PING_SCHEMA).
+    """
+    scapy = [x for x in row[7:] if x != ""]
+    scapy_total = len(row) - 7
+    return {
+        "timestamp": time.mktime(time.strptime(row[0], "%Y-%m-%d %H:%M:%S")),
+        "target": row[1],
+        "ping_ms": row[2],
+        "min_ms": row[3],
+        "avg_ms": row[4],
+        "max_ms": row[5],
+        "loss_pct": row[6],
+        "scapy_avg_ms": sum(scapy) / len(scapy) if scapy else "",
+        "scapy_loss_pct": (
+            100.0 * (scapy_total - len(scapy)) / scapy_total if scapy_total else ""
+        ),
+    }
+
+
+# Limite massimo di host per uno sweep (evita scansioni involontarie di reti enormi)
+MAX_SWEEP_HOSTS = 4096
+
+
+def _scapy_batch_probe(address, count, timeout=2):
+    """
+    Invia count echo request ICMP con un'unica chiamata sr():
+    - Un solo socket L3 per tutto il batch, caso peggiore = un timeout
+    - Budget di probe prenotato per l'intero batch prima dell'invio
+    - Risposte abbinate per ICMP id/seq
+    - RTT calcolato dai timestamp di invio/ricezione del kernel
+    Ritorna una lista di RTT in ms ("" per i pacchetti persi).
+    """
+    ident = (os.getpid() ^ threading.get_ident()) & 0xFFFF
+    throttle(address, count)
+    packets = [IP(dst=address) / ICMP(id=ident, seq=seq) for seq in range(count)]
+    answered, _ = sr(packets, timeout=timeout, verbose=0)
+    icmp = resolve(ICMP)
+    rtts = [""] * count
+    for snd, rcv in answered:
+        echo = rcv[icmp]
+        if echo.id != ident or not 0 <= echo.seq < count:
+            continue
+        rtts[echo.seq] = round((rcv.time - snd.sent_time) * 1000, 2)
+    return rtts
+
+
+def _transport_batch_probe(transport, address, count, timeout=2):
+    """
+    Come _scapy_batch_probe, sul trasporto ICMP condiviso:
+    tutti gli echo inviati subito, attesa unica con scadenza comune.
+    Ritorna una lista di RTT in ms ("" per i pacchetti persi).
+    """
+    probes = []
+    for _ in range(count):
+        # Echo distribuiti secondo il budget, non inviati a raffica
+        throttle(address)
+        probes.append(transport.send(address))
+    deadline = time.monotonic() + timeout
+    rtts = []
+    for probe in probes:
+        rtt = transport.wait(probe, max(0.0, deadline - time.monotonic()))
+        rtts.append(round(rtt, 2) if rtt is not None else "")
+    return rtts
+
+
+def single_ping(address, logger: LogManager, timeout=None, transport=None):
+    """
+    Un solo echo (trasporto condiviso se fornito, altrimenti ping3).
+    Ritorna l'RTT in ms, None se perso o se nessun backend è disponibile.
+    """
+    if transport is None and not ping3_ping:
+        return None
+    rtt = None
+    try:
+        throttle(address)
+        if transport is not None:
+            rtt = transport.ping(address, timeout or 2)
+        else:
+            kwargs = {"timeout": timeout} if timeout else {}
+            rtt = ping3_ping(address, unit="ms", **kwargs)
+        if rtt is False:
+            # ping3 ritorna False su errore (es. host non risolvibile): perso
+            rtt = None
+        if rtt is not None:
+            logger.event("ping.ping3", address=address, rtt_ms=round(rtt, 2))
+        else:
+            logger.event("ping.ping3_timeout", "warning", address=address)
+    except Exception as e:
+        logger.error(f"Errore ping3: {e}", exc_info=True)
+    return rtt
+
+
+BURST_FIELDS = ("min_rtt", "avg_rtt", "max_rtt", "packet_loss_rate")
+
+
+def burst_probe(
+    address,
+    logger: LogManager,
+    count=10,
+    timeout=None,
+    transport=None,
+    burst_spacing=DEFAULT_BURST_SPACING,
+):
+    """
+    Burst di echo: nativo sul trasporto condiviso o pingparsing (subprocess ping).
+    Ritorna {min_rtt, avg_rtt, max_rtt, packet_loss_rate} ("" se non disponibili).
+    """
+    stats = dict.fromkeys(BURST_FIELDS, "")
+    if transport is not None:
+        try:
+            throttle(address, count)
+            rtts = transport.burst(
+                address,
+                count,
+                spacing=burst_spacing,
+                timeout=timeout or 2,
+            )
+            result = burst_stats(rtts)
+            for k in stats:
+                stats[k] = result[k]
+            logger.event("ping.burst", address=address, **result)
+        except Exception as e:
+            logger.error(f"Errore burst ICMP: {e}", exc_info=True)
+    elif pingparsing:
+        try:
+            parser = pingparsing.PingParsing()
+            transmitter = pingparsing.PingTransmitter()
+            transmitter.destination = address
+            transmitter.count = count
+            throttle(address, transmitter.count)
+            result = parser.parse(transmitter.ping()).as_dict()
+            for k in stats:
+                stats[k] = result.get(k, "")  # type: ignore
+            logger.event("ping.pingparsing", address=address, **stats)
+        except Exception as e:
+            logger.error(f"Errore pingparsing: {e}", exc_info=True)
+    return stats
+
+
+def batch_probe(address, logger: LogManager, count, timeout=None, transport=None):
+    """
+    Batch di echo inviati insieme (trasporto condiviso o scapy).
+    Ritorna la lista degli RTT in ms ("" = perso), vuota se scapy manca.
+    """
+    rtts = []
+    if transport is not None:
+        try:
+            rtts = _transport_batch_probe(transport, address, count, timeout or 2)
+        except Exception as e:
+            logger.error(f"Errore ping batch ICMP: {e}", exc_info=True)
+        logger.event("ping.batch", address=address, rtt_ms=rtts)
+    elif sr and IP and ICMP:
+        try:
+            rtts = _scapy_batch_probe(address, count, timeout or 2)
+        except Exception as e:
+            logger.error(f"Errore ping scapy: {e}", exc_info=True)
+        logger.event("ping.scapy", address=address, rtt_ms=rtts)
+    else:
+        logger.warning("Modulo scapy non disponibile.")
+    return rtts
 
-        writer = csv.writer(f)
-        if write_header:
-            writer.writerow(header)
+
+def ping_row(address, rtt, stats, rtts, scapy_count=DEFAULT_SCAPY_COUNT):
+    """Riga nel formato di ping_csv_header(scapy_count) dai risultati dei probe."""
+    stats = stats or {}
+    return [
+        time.strftime("%Y-%m-%d %H:%M:%S"),
+        address,
+        rtt if rtt is not None else "",
+        *(stats.get(k, "") for k in BURST_FIELDS),
+        *(rtts[i] if i < len(rtts) else "" for i in range(scapy_count)),
+    ]
+
+
+def _value(cell):
+    return None if cell == "" else cell
+
+
+class PingResult(NamedTuple):
+    """Esito della diagnostica ping; RTT in ms e loss in %, None = non disponibile/perso."""
+
+    timestamp: str
+    address: str
+    rtt_ms: Optional[float]
+    min_rtt: Optional[float]
+    avg_rtt: Optional[float]
+    max_rtt: Optional[float]
+    loss_pct: Optional[float]
+    batch_rtts: Tuple[Optional[float], ...]
+
+    @classmethod
+    def from_row(cls, row):
+        """Da una riga nel formato di ping_csv_header."""
+        return cls(*row[:2], *map(_value, row[2:7]), tuple(map(_value, row[7:])))
+
+    @property
+    def reachable(self):
+        return self.rtt_ms is not None or any(
+            rtt is not None for rtt in self.batch_rtts
+        )
+
+
+def _probe_host(
+    address,
+    logger: LogManager,
+    advanced=False,
+    max_ping_count=10,
+    timeout=None,
+    scapy_count=DEFAULT_SCAPY_COUNT,
+    transport=None,
+    burst_spacing=DEFAULT_BURST_SPACING,
+):
+    """
+    Esegue i probe ICMP verso un singolo host già validato.
+    Con transport (IcmpTransport) ping semplice, burst e batch usano il socket
+    condiviso invece di ping3, pingparsing e scapy.
+    Ritorna la riga nel formato di ping_csv_header(scapy_count).
+    """
+    rtt = single_ping(address, logger, timeout, transport)
+    stats = rtts = None
+    if advanced:
+        # Burst e batch limitati (max_ping_count, budget di probe): niente flood
+        stats = burst_probe(
+            address,
+            logger,
+            min(max_ping_count, 10),
+            timeout,
+            transport,
+            burst_spacing,
+        )
+        rtts = batch_probe(
+            address, logger, min(scapy_count, max_ping_count), timeout, transport
+        )
+    return ping_row(address, rtt, stats, rtts or [], scapy_count)
+
+
+def _store_rows(store, rows, logger: LogManager):
+    try:
         for row in rows:
-            # Protezione: nessun campo deve contenere newline o caratteri di escape
-            safe_row = [str(x).replace("\n", " ").replace("\r", "") for x in row]
-            writer.writerow(safe_row)
+            store.append(ping_record(row))
+    except Exception as e:
+        logger.error(f"Errore scrittura store binario: {e}", exc_info=True)
 
 
 def run_ping_diag(
@@ -61,6 +327,10 @@ def run_ping_diag(
     csvfile=None,
     delay=5,
     max_ping_count=10,
+    scapy_count=DEFAULT_SCAPY_COUNT,
+    store=None,
+    transport=None,
+    burst_spacing=DEFAULT_BURST_SPACING,
 ):
     """
     Esegue la diagnostica ICMP Ping in modo sicuro:
@@ -68,100 +338,130 @@ def run_ping_diag(
     - Rate limiting su ping avanzati
     - Log di ogni passo per auditing
     - Scrive su CSV solo dati validati
+    - Opzionale: accoda il risultato allo store binario (ColumnarStore)
+    - Opzionale: probe sul trasporto ICMP condiviso (IcmpTransport), con burst
+      nativo a burst_spacing secondi tra gli echo al posto di pingparsing
+    Ritorna un PingResult (None se l'indirizzo non è valido); stampa in cli.render.
     """
     if not validate_address(address):
         logger.error(f"Indirizzo non valido: {address}")
         print("ERRORE: Indirizzo non valido.")
-        return
+        return None
 
     logger.info(f"Inizio diagnostica ping verso {address} (OS: {os_type})")
-    ping3_res = None
-    pingparse_stats = {
-        "min_rtt": "",
-        "avg_rtt": "",
-        "max_rtt": "",
-        "packet_loss_rate": "",
-    }
-    scapy_times = []
-
-    # Ping semplice con ping3
-    if ping3_ping:
-        try:
-            ping3_res = ping3_ping(address, unit="ms")
-            if ping3_res is not None:
-                logger.info(f"Risultato ping3: {ping3_res:.2f} ms")
-            else:
-                logger.warning("Nessuna risposta da ping3.")
-        except Exception as e:
-            logger.error(f"Errore ping3: {e}", exc_info=True)
-
-    # Ping avanzato con pingparsing (rate limited)
-    if pingparsing and advanced:
-        try:
-            parser = pingparsing.PingParsing()
-            transmitter = pingparsing.PingTransmitter()
-            transmitter.destination = address
-            transmitter.count = min(max_ping_count, 10)
-            stats = parser.parse(transmitter.ping()).as_dict()
-            for k in pingparse_stats:
-                pingparse_stats[k] = stats.get(k, "")  # type: ignore
-            logger.info(f"Risultato pingparsing: {pingparse_stats}")
-        except Exception as e:
-            logger.error(f"Errore pingparsing: {e}", exc_info=True)
-
-    # Ping con scapy (ICMP raw, rate limited)
-    if sr1 and IP and ICMP and advanced:
-        for i in range(min(4, max_ping_count)):
-            try:
-                pkt = IP(dst=address) / ICMP()
-                ans = sr1(pkt, timeout=2, verbose=0)
-                if (
-                    ans is not None
-                    and hasattr(ans, "time")
-                    and hasattr(pkt, "sent_time")
-                ):
-                    rtt = (ans.time - pkt.sent_time) * 1000
-                    scapy_times.append(round(rtt, 2))
-                else:
-                    scapy_times.append("")
-            except Exception as e:
-                logger.error(f"Errore ping scapy: {e}", exc_info=True)
-                scapy_times.append("")
-        logger.info(f"Ping scapy: {scapy_times}")
-    elif not (sr1 and IP and ICMP):
-        logger.warning("Modulo scapy non disponibile.")
+    row = _probe_host(
+        address,
+        logger,
+        advanced=advanced,
+        max_ping_count=max_ping_count,
+        scapy_count=scapy_count,
+        transport=transport,
+        burst_spacing=burst_spacing,
+    )
 
     # Diagnostica avanzata: scrittura su CSV sicura
     if advanced and csvfile:
-        header = [
-            "timestamp",
-            "address",
-            "ping3_ms",
-            "pingparsing_min",
-            "pingparsing_avg",
-            "pingparsing_max",
-            "pingparsing_packet_loss",
-            "scapy_ping_1_ms",
-            "scapy_ping_2_ms",
-            "scapy_ping_3_ms",
-            "scapy_ping_4_ms",
-        ]
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        row = [
-            timestamp,
-            address,
-            ping3_res if ping3_res is not None else "",
-            pingparse_stats.get("min_rtt", ""),
-            pingparse_stats.get("avg_rtt", ""),
-            pingparse_stats.get("max_rtt", ""),
-            pingparse_stats.get("packet_loss_rate", ""),
-            *(scapy_times[i] if i < len(scapy_times) else "" for i in range(4)),
-        ]
         try:
-            write_csv(csvfile, header, [row])
+            write_csv(csvfile, ping_csv_header(scapy_count), [row])
             logger.info(f"Scrittura diagnostica avanzata su CSV: {csvfile}")
         except Exception as e:
             logger.error(f"Errore scrittura CSV: {e}", exc_info=True)
             print("ERRORE: Scrittura CSV fallita.")
+    if store is not None:
+        _store_rows(store, [row], logger)
 
     logger.info("Diagnostica ping completata.")
+    return PingResult.from_row(row)
+
+
+def load_targets(spec, max_hosts=MAX_SWEEP_HOSTS):
+    """
+    Espande una specifica di target in una lista di indirizzi:
+    - Path di un file (un target per riga, righe vuote e commenti '#' ignorati)
+    - Rete CIDR (es. 10.0.0.0/24), anche come riga del file
+    - Singolo IP o dominio
+    Solleva ValueError se i target superano max_hosts.
+    """
+    if os.path.isfile(spec):
+        with open(spec, encoding="utf-8") as f:
+            entries = [line.split("#", 1)[0].strip() for line in f]
+    else:
+        entries = [spec.strip()]
+
+    targets = []
+    for entry in entries:
+        if not entry:
+            continue
+        if "/" in entry:
+            network = ipaddress.ip_network(entry, strict=False)
+            if network.num_addresses > max_hosts:
+                raise ValueError(f"Rete {entry} troppo grande (max {max_hosts} host).")
+            hosts = network.hosts() if network.num_addresses > 2 else network
+            targets.extend(str(ip) for ip in hosts)
+        else:
+            targets.append(entry)
+        if len(targets) > max_hosts:
+            raise ValueError(f"Troppi target (max {max_hosts} host).")
+    # Rimuove duplicati mantenendo l'ordine
+    return list(dict.fromkeys(targets))
+
+
+def run_ping_sweep(
+    targets,
+    logger: LogManager,
+    os_type: str,
+    max_workers=64,
+    timeout=1,
+    csvfile=None,
+    store=None,
+    transport=None,
+):
+    """
+    Esegue un ping sweep concorrente su una lista di target:
+    - Valida ogni target, scarta quelli non validi
+    - Pool di worker limitato (max_workers) per non saturare host e rete
+    - Ritorna una riga per host nel formato di PING_CSV_HEADER
+    - Opzionale: accoda i risultati allo store binario (ColumnarStore)
+    - Opzionale: tutti i worker condividono il trasporto ICMP (un solo socket)
+    """
+    valid = []
+    for address, ok in zip(targets, validate_many(targets)):
+        if ok:
+            valid.append(address)
+        else:
+            logger.warning(f"Target non valido scartato: {address}")
+    if not valid:
+        logger.error("Nessun target valido per lo sweep.")
+        print("ERRORE: Nessun target valido.")
+        return []
+
+    logger.info(
+        f"Inizio ping sweep su {len(valid)} host (OS: {os_type}, worker: {max_workers})"
+    )
+    start = time.monotonic()
+    workers = max(1, min(max_workers, len(valid)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        rows = list(
+            executor.map(
+                lambda addr: _probe_host(
+                    addr, logger, timeout=timeout, transport=transport
+                ),
+                valid,
+            )
+        )
+    elapsed = time.monotonic() - start
+    alive = sum(1 for row in rows if row[2] != "")
+    logger.info(
+        f"Ping sweep completato: {alive}/{len(rows)} host raggiungibili in {elapsed:.2f} s"
+    )
+
+    if csvfile:
+        try:
+            write_csv(csvfile, PING_CSV_HEADER, rows)
+            logger.info(f"Scrittura ping sweep su CSV: {csvfile}")
+        except Exception as e:
+            logger.error(f"Errore scrittura CSV: {e}", exc_info=True)
+            print("ERRORE: Scrittura CSV fallita.")
+    if store is not None:
+        _store_rows(store, rows, logger)
+    return rows
@@ -5,43 +5,173 @@ Modulo di diagnostica Speedtest sicuro e robusto.
 - Logging dettagliato per auditing
 - Limitazione richieste (no flood)
 - Gestione errori granulare
+- Cache su disco (JSON, con TTL) della lista server e del server migliore
+- Server fissabile da configurazione ([speedtest] server_id)
 """
 
+import json
+import os
+import time
+from typing import NamedTuple, Optional
+
 from logs.custom_logging import LogManager
+from network.backends import backend
+
+# Backend opzionale, importato al primo uso (bool() = installato)
+speedtest = backend("speedtest")
+
+DEFAULT_CACHE_TTL = 86400
+
+
+class SpeedtestCache:
+    """
+    Cache JSON della selezione server:
+    - servers: lista server già scaricata e parsata
+    - best: ultimo server migliore scelto
+    Contenuto ignorato oltre ttl secondi; scrittura atomica (file temporaneo + rename).
+    """
+
+    def __init__(self, path, ttl=DEFAULT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def load(self):
+        """Dati in cache se presenti e non scaduti, altrimenti None."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (
+            not isinstance(data, dict)
+            or time.time() - data.get("saved_at", 0) > self.ttl
+        ):
+            return None
+        return data
+
+    def save(self, servers, best):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.time(), "servers": servers, "best": best}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _flatten_servers(servers):
+    """Lista piatta dei server da Speedtest.servers ({distanza: [server]})."""
+    return [server for group in servers.values() for server in group]
+
+
+def _group_servers(servers):
+    """Ricostruisce Speedtest.servers ({distanza: [server]}) dalla lista in cache."""
+    grouped = {}
+    for server in servers:
+        grouped.setdefault(server.get("d", 0), []).append(server)
+    return grouped
+
+
+def select_server(st, logger: LogManager, cache=None, server_id=None):
+    """
+    Sceglie il server di test riusando la cache quando valida:
+    - server_id fissato: solo quel server (lista in cache o scaricata filtrata)
+    - best in cache: misura di latenza solo su quel server
+    - altrimenti: lista server, server più vicini, test di latenza completo
+    Ritorna il server scelto.
+    """
+    data = cache.load() if cache else None
+    downloaded = False
+    if data and data.get("servers"):
+        st.servers = _group_servers(data["servers"])
+        logger.info(f"Speedtest: lista server da cache ({len(data['servers'])}).")
+    elif not server_id:
+        st.get_servers()
+        downloaded = True
+
+    if server_id:
+        candidates = [
+            s
+            for s in _flatten_servers(st.servers)
+            if str(s.get("id")) == str(server_id)
+        ]
+        if not candidates:
+            st.get_servers([int(server_id)])
+            candidates = _flatten_servers(st.servers)
+        logger.info(f"Speedtest: server fissato da configurazione {server_id}.")
+    elif data and data.get("best"):
+        candidates = [data["best"]]
+        logger.info(f"Speedtest: server migliore da cache {data['best'].get('id')}.")
+    else:
+        candidates = st.get_closest_servers()
+
+    best = st.get_best_server(candidates)
+    # best include la latenza appena misurata: confronto per id
+    cached_id = (data.get("best") or {}).get("id") if data else None
+    if cache and not server_id and (downloaded or cached_id != best.get("id")):
+        try:
+            cache.save(_flatten_servers(st.servers), best)
+        except OSError as e:
+            logger.warning(f"Cache speedtest non scrivibile: {e}")
+    return best
+
+
+class SpeedtestResult(NamedTuple):
+    """Esito dello speedtest: banda in bit/s, ping in ms, server usato."""
 
-try:
-    import speedtest
-except ImportError:
-    speedtest = None
+    download_bps: float
+    upload_bps: float
+    ping_ms: float
+    server_id: Optional[str]
 
 
-def run_speedtest_diag(logger: LogManager, max_attempts=2):
+def run_speedtest_diag(
+    logger: LogManager,
+    max_attempts=2,
+    cache_file=None,
+    cache_ttl=DEFAULT_CACHE_TTL,
+    server_id=None,
+):
     """
     Esegue speedtest diagnostico:
     - Limita tentativi per evitare abusi
+    - Riusa lista server e server migliore da cache_file entro cache_ttl secondi
+    - Un solo client Speedtest tra i tentativi (config scaricata una volta)
     - Log di ogni passo
+    Ritorna uno SpeedtestResult (None se non riuscito); stampa in cli.render.
     """
     logger.info("Avvio speedtest diagnostico.")
+    result = None
     if speedtest:
+        cache = SpeedtestCache(cache_file, cache_ttl) if cache_file else None
+        st = None
         attempt = 0
         while attempt < max_attempts:
             try:
-                st = speedtest.Speedtest()
-                st.get_best_server()
-                results = {
-                    "download_bps": round(st.download(), 2),
-                    "upload_bps": round(st.upload(), 2),
-                    "ping_ms": round(st.results.ping, 2),
-                }
-                logger.info(f"Speedtest: {results}")
-                print(f"Download: {results['download_bps'] / 1e6:.2f} Mbps")
-                print(f"Upload:   {results['upload_bps'] / 1e6:.2f} Mbps")
-                print(f"Ping:     {results['ping_ms']} ms")
+                if st is None:
+                    st = speedtest.Speedtest()
+                best = select_server(st, logger, cache, server_id) or {}
+                result = SpeedtestResult(
+                    round(st.download(), 2),
+                    round(st.upload(), 2),
+                    round(st.results.ping, 2),
+                    str(best["id"]) if "id" in best else None,
+                )
+                logger.info(f"Speedtest: {result._asdict()}")
                 break
             except Exception as e:
                 logger.error(f"Errore speedtest: {e}", exc_info=True)
                 attempt += 1
                 print(f"ERRORE: Speedtest fallito (tentativo {attempt}).")
+                if cache:
+                    # Server in cache forse non più valido: nuova selezione completa
+                    cache.clear()
         if attempt == max_attempts:
             logger.error("Speedtest non riuscito dopo tentativi massimi.")  # type: ignore
             print("ERRORE: Speedtest non riuscito.")
@@ -49,3 +179,4 @@ def run_speedtest_diag(logger: LogManager, max_attempts=2):
         logger.error("Modulo speedtest non disponibile.")
         print("ERRORE: modulo speedtest non disponibile.")
     logger.info("Fine diagnostica speedtest.")
+    return result
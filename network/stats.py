@@ -2,38 +2,291 @@
 """
 Modulo di diagnostica statistiche di rete sicuro e robusto.
 - Statistiche per interfaccia (bytes, pacchetti, errori, drop)
+- Contatori letti da /proc/net/dev su Linux (network.netdev), psutil altrove
+- Campionamento periodico con ratei (bps, pps, errori/s, drop/s) dai delta
+- Storico in ring buffer a dimensione fissa per interfaccia (array, nessuna lista)
 - Logging dettagliato per auditing
 - Gestione errori granulare
 """
 
+import time
+from array import array
+from typing import NamedTuple
+
 from logs.custom_logging import LogManager
+from network import netdev
 
 try:
     import psutil
 except ImportError:
     psutil = None
 
+# Contatori per interfaccia, nell'ordine di psutil.net_io_counters()
+COUNTER_FIELDS = (
+    "bytes_sent",
+    "bytes_recv",
+    "packets_sent",
+    "packets_recv",
+    "errin",
+    "errout",
+    "dropin",
+    "dropout",
+)
+N_COUNTERS = len(COUNTER_FIELDS)
+
+# Campioni conservati per interfaccia (ring buffer)
+DEFAULT_HISTORY = 600
+
+
+class InterfaceCounters(NamedTuple):
+    """Contatori di un'interfaccia (ritornati da run_stats_diag), campi come COUNTER_FIELDS."""
+
+    iface: str
+    bytes_sent: int
+    bytes_recv: int
+    packets_sent: int
+    packets_recv: int
+    errin: int
+    errout: int
+    dropin: int
+    dropout: int
+
+
+def psutil_counters():
+    """Contatori cumulativi per interfaccia via psutil: {iface: (8 contatori)}."""
+    return {
+        iface: data[:N_COUNTERS]
+        for iface, data in psutil.net_io_counters(pernic=True).items()
+    }
+
+
+def counter_reader():
+    """
+    Sorgente dei contatori per interfaccia: lettore nativo /proc/net/dev se
+    disponibile, altrimenti psutil; None se nessuna delle due.
+    """
+    if netdev.available():
+        try:
+            return netdev.ProcNetDevReader()
+        except OSError:
+            pass
+    if psutil:
+        return psutil_counters
+    return None
+
+
+class CounterRing:
+    """
+    Ring buffer a dimensione fissa dei contatori di un'interfaccia:
+    timestamp in array('d'), contatori in array('Q') preallocati.
+    """
+
+    __slots__ = ("size", "count", "pos", "times", "values", "_view")
+
+    def __init__(self, size=DEFAULT_HISTORY):
+        self.size = size
+        self.count = 0
+        self.pos = 0
+        self.times = array("d", bytes(8 * size))
+        self.values = array("Q", bytes(8 * size * N_COUNTERS))
+        self._view = memoryview(self.values)
+
+    def append(self, timestamp, counters):
+        start = self.pos * N_COUNTERS
+        if isinstance(counters, memoryview):
+            # Lettore nativo: copia diretta tra buffer, nessun oggetto int
+            end = start + N_COUNTERS
+            self._view[start:end] = counters
+        else:
+            values = self.values
+            for i in range(N_COUNTERS):
+                values[start + i] = counters[i]
+        self.times[self.pos] = timestamp
+        self.pos = (self.pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def _slot(self, age):
+        """Indice del campione di età age (0 = più recente)."""
+        return (self.pos - 1 - age) % self.size
+
+    def sample(self, age=0):
+        """(timestamp, contatori) del campione di età age."""
+        slot = self._slot(age)
+        start = slot * N_COUNTERS
+        end = start + N_COUNTERS
+        return self.times[slot], self.values[start:end]
+
+    def rates(self, window=1):
+        """
+        Ratei tra il campione più recente e quello di window campioni prima:
+        bps/pps in uscita e ingresso, errori/s e drop/s (in+out).
+        None se i campioni non bastano o i contatori sono stati azzerati.
+        """
+        window = min(window, self.count - 1)
+        if window < 1:
+            return None
+        t1, new = self.sample(0)
+        t0, old = self.sample(window)
+        elapsed = t1 - t0
+        if elapsed <= 0:
+            return None
+        delta = [n - o for n, o in zip(new, old)]
+        if min(delta) < 0:
+            # Contatori azzerati (interfaccia ricreata o wrap): nessun rateo
+            return None
+        return {
+            "bps_sent": 8 * delta[0] / elapsed,
+            "bps_recv": 8 * delta[1] / elapsed,
+            "pps_sent": delta[2] / elapsed,
+            "pps_recv": delta[3] / elapsed,
+            "errors_per_s": (delta[4] + delta[5]) / elapsed,
+            "drops_per_s": (delta[6] + delta[7]) / elapsed,
+            "interval_s": elapsed,
+        }
+
+
+class InterfaceSampler:
+    """
+    Campionatore dei contatori di tutte le interfacce:
+    - sample() legge i contatori e li accoda al ring buffer di ogni NIC
+    - rates() calcola i ratei per NIC sugli ultimi window intervalli
+    - Le interfacce scomparse vengono rimosse (niente crescita illimitata)
+    """
+
+    def __init__(self, read_counters=None, history=DEFAULT_HISTORY, clock=None):
+        self.read_counters = read_counters or counter_reader() or psutil_counters
+        self.history = max(2, history)
+        self.clock = clock or time.monotonic
+        self.rings = {}
+
+    def sample(self):
+        counters = self.read_counters()
+        now = self.clock()
+        rings = self.rings
+        for iface, values in counters.items():
+            ring = rings.get(iface)
+            if ring is None:
+                ring = rings[iface] = CounterRing(self.history)
+            ring.append(now, values)
+        if len(rings) != len(counters):
+            for iface in [i for i in rings if i not in counters]:
+                del rings[iface]
+        return now
+
+    def rates(self, window=1):
+        """{iface: ratei} per le interfacce con almeno due campioni validi."""
+        result = {}
+        for iface, ring in self.rings.items():
+            rates = ring.rates(window)
+            if rates is not None:
+                result[iface] = rates
+        return result
+
+    def close(self):
+        """Chiude la sorgente dei contatori, se la prevede (file descriptor)."""
+        close = getattr(self.read_counters, "close", None)
+        if close is not None:
+            close()
+
 
 def run_stats_diag(logger: LogManager):
     """
     Raccoglie statistiche di rete:
     - Per interfaccia
     - Log di ogni passo
+    Ritorna una lista di InterfaceCounters (vuota se fallita); stampa in cli.render.
     """
-    logger.info("Raccolta statistiche di rete (psutil).")
-    if psutil:
-        try:
-            net_io = psutil.net_io_counters(pernic=True)
-            for iface, data in net_io.items():
-                logger.info(
-                    f"Interface: {iface} | Bytes sent: {data.bytes_sent} | Bytes recv: {data.bytes_recv} | Packets sent: {data.packets_sent} | Packets recv: {data.packets_recv}"
-                )
-                print(
-                    f"{iface}: Bytes sent={data.bytes_sent}, recv={data.bytes_recv}, Packets sent={data.packets_sent}, recv={data.packets_recv}, Err in/out={data.errin}/{data.errout}, Drop in/out={data.dropin}/{data.dropout}"
-                )
-        except Exception as e:
-            logger.error(f"Errore stats psutil: {e}", exc_info=True)
-            print("ERRORE: Statistiche di rete fallite.")
-    else:
-        logger.error("Modulo psutil non disponibile.")
+    reader = counter_reader()
+    if reader is None:
+        logger.error("Nessuna sorgente statistiche: psutil e /proc/net/dev assenti.")
         print("ERRORE: modulo psutil non disponibile.")
+        return []
+    source = "psutil" if reader is psutil_counters else reader.path
+    logger.info(f"Raccolta statistiche di rete ({source}).")
+    interfaces = []
+    try:
+        for iface, counters in reader().items():
+            record = InterfaceCounters(iface, *counters)
+            logger.event("stats.interface", **record._asdict())
+            interfaces.append(record)
+    except Exception as e:
+        logger.error(f"Errore stats {source}: {e}", exc_info=True)
+        print("ERRORE: Statistiche di rete fallite.")
+    finally:
+        close = getattr(reader, "close", None)
+        if close is not None:
+            close()
+    return interfaces
+
+
+def run_stats_sampling_diag(
+    logger: LogManager,
+    interval=1.0,
+    duration=10.0,
+    history=DEFAULT_HISTORY,
+    top=10,
+    sampler=None,
+):
+    """
+    Campiona i contatori delle interfacce ogni interval secondi per duration secondi:
+    - Cadenza fissa con correzione della deriva
+    - Ratei medi sull'intera finestra (nei limiti dello storico) per interfaccia
+    - Stampa delle top interfacce per throughput, log di tutte
+    Ritorna {iface: ratei}.
+    """
+    owned = sampler is None
+    if owned:
+        reader = counter_reader()
+        if reader is None:
+            logger.error(
+                "Nessuna sorgente statistiche: psutil e /proc/net/dev assenti."
+            )
+            print("ERRORE: modulo psutil non disponibile.")
+            return {}
+        sampler = InterfaceSampler(reader, history=history)
+
+    n_samples = max(2, int(round(duration / interval)) + 1)
+    logger.info(
+        f"Campionamento interfacce: {n_samples} campioni ogni {interval}s "
+        f"(storico {sampler.history})."
+    )
+    taken = 0
+    next_tick = time.monotonic()
+    try:
+        while taken < n_samples:
+            sampler.sample()
+            taken += 1
+            if taken == n_samples:
+                break
+            next_tick += interval
+            pause = next_tick - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            else:
+                next_tick = time.monotonic()
+    except KeyboardInterrupt:
+        logger.info("Campionamento interfacce interrotto dall'utente.")
+    except Exception as e:
+        logger.error(f"Errore campionamento interfacce: {e}", exc_info=True)
+        print("ERRORE: Campionamento interfacce fallito.")
+    finally:
+        if owned:
+            sampler.close()
+
+    rates = sampler.rates(window=min(taken, sampler.history) - 1)
+    for iface, r in rates.items():
+        logger.event(
+            "stats.rates", iface=iface, **{k: round(v, 2) for k, v in r.items()}
+        )
+    ranked = sorted(
+        rates.items(), key=lambda item: -(item[1]["bps_sent"] + item[1]["bps_recv"])
+    )
+    print(f"--- Ratei interfacce ({taken} campioni, top {min(top, len(ranked))}) ---")
+    for iface, r in ranked[:top]:
+        print(
+            f"{iface}: out={r['bps_sent'] / 1e6:.3f} Mbps in={r['bps_recv'] / 1e6:.3f} Mbps "
+            f"pps out/in={r['pps_sent']:.1f}/{r['pps_recv']:.1f} "
+            f"err/s={r['errors_per_s']:.2f} drop/s={r['drops_per_s']:.2f}"
+        )
+    return rates
@@ -2,19 +2,58 @@
 """
 Modulo di diagnostica Traceroute sicuro e robusto.
 - Traceroute con scapy (ICMP)
+- Traceroute multi-destinazione con scoperta condivisa degli hop (topologia)
 - Compatibilità multipiattaforma (Windows/Linux/Mac)
 - Validazione e sanitizzazione input (no injection)
+- Probe soggetti al budget di rate limiting (security.rate_limiter)
 - Logging dettagliato per auditing
 - Gestione errori granulare
 """
 
+import os
+import socket
+from typing import Dict, NamedTuple, Optional, Tuple
+
 from logs.custom_logging import LogManager
-from security.security import validate_address
+from network.backends import lazy_attr, resolve
+from security.rate_limiter import throttle, throttle_many
+from security.security import validate_address, validate_many
+
+# Backend opzionale scapy, importato al primo uso (bool() = installato)
+traceroute = lazy_attr("scapy", "traceroute")
+sr = lazy_attr("scapy", "sr")
+IP = lazy_attr("scapy", "IP")
+ICMP = lazy_attr("scapy", "ICMP")
+
+# TTL di partenza di default per il traceroute multi-destinazione (Doubletree)
+DEFAULT_START_TTL = 3
+
+
+class Hop(NamedTuple):
+    """Hop di un traceroute: IP ("*" se nessuna risposta) e RTT in ms (None = timeout)."""
+
+    ip: str
+    rtt_ms: Optional[float]
 
-try:
-    from scapy.all import traceroute  # type: ignore
-except ImportError:
-    traceroute = None
+
+class TracerouteResult(NamedTuple):
+    address: str
+    hops: Tuple[Hop, ...]
+
+
+def trace_hops(address, max_hops=20, timeout=2):
+    """
+    Traceroute scapy verso un indirizzo già validato (solleva in caso di errore).
+    Ritorna la lista degli Hop in ordine di TTL.
+    """
+    throttle(address, max_hops)
+    res, _ = traceroute([address], maxttl=max_hops, timeout=timeout, verbose=0)
+    hops = []
+    for snd, rcv in res:
+        hop_ip = rcv.src if rcv else "*"
+        rtt = (rcv.time - snd.sent_time) * 1000 if rcv else None
+        hops.append(Hop(hop_ip, round(rtt, 2) if rtt is not None else None))
+    return hops
 
 
 def run_traceroute_diag(
@@ -25,29 +64,22 @@ def run_traceroute_diag(
     - Valida address per sicurezza
     - Usa scapy, limita max_hops e timeout per evitare abusi
     - Log di ogni passo
+    Ritorna un TracerouteResult (None su errore); stampa in cli.render.
     """
     if not validate_address(address):
         logger.error(f"Indirizzo non valido: {address}")
         print("ERRORE: Indirizzo non valido.")
-        return
+        return None
 
     logger.info(f"Inizio traceroute verso {address} (OS: {os_type})")
+    result = None
     if traceroute:
         try:
-            res, _ = traceroute([address], maxttl=max_hops, timeout=timeout, verbose=0)
-            hops = []
-            for idx, (snd, rcv) in enumerate(res):
-                hop_ip = rcv.src if rcv else "*"
-                rtt = (rcv.time - snd.sent_time) * 1000 if rcv else None
-                hops.append((hop_ip, round(rtt, 2) if rtt is not None else None))
-            logger.info(f"Traceroute hops: {hops}")
-            print("--- Traceroute ---")
-            for hop in hops:
-                print(
-                    f"{hop[0]} ({hop[1]} ms)"
-                    if hop[1] is not None
-                    else f"{hop[0]} (timeout)"
-                )
+            hops = trace_hops(address, max_hops, timeout)
+            logger.event(
+                "traceroute.hops", address=address, hops=[tuple(h) for h in hops]
+            )
+            result = TracerouteResult(address, tuple(hops))
         except Exception as e:
             logger.error(f"Errore traceroute: {e}", exc_info=True)
             print("ERRORE: Traceroute fallito.")
@@ -55,3 +87,191 @@ def run_traceroute_diag(
         logger.error("Modulo traceroute/scapy non disponibile.")
         print("ERRORE: modulo traceroute non disponibile.")
     logger.info("Fine diagnostica traceroute.")
+    return result
+
+
+class TracerouteTopology:
+    """
+    Topologia raccolta da un traceroute multi-destinazione:
+    - graph: lista di adiacenza hop -> insieme degli hop successivi
+    - paths: per destinazione, {ttl: (hop_ip, rtt_ms)} (hop_ip None = timeout)
+    - probes_sent: numero totale di probe inviati
+    - destinations: IP destinazione -> indirizzo richiesto
+    """
+
+    def __init__(self):
+        self.graph = {}
+        self.paths = {}
+        self.probes_sent = 0
+        self.destinations = {}
+
+    def hops(self):
+        """Insieme degli hop unici scoperti."""
+        nodes = set(self.graph)
+        for successors in self.graph.values():
+            nodes.update(successors)
+        return nodes
+
+    def _add_path_edges(self, path):
+        previous = None
+        for ttl in sorted(path):
+            hop_ip = path[ttl][0]
+            if hop_ip is None:
+                continue
+            self.graph.setdefault(hop_ip, set())
+            if previous is not None and previous != hop_ip:
+                self.graph[previous].add(hop_ip)
+            previous = hop_ip
+
+
+def _probe_ttl(destinations, ttl, timeout):
+    """
+    Invia con un'unica chiamata sr() un probe ICMP a TTL fisso per ogni destinazione.
+    Ritorna {destinazione: (hop_ip, rtt_ms, fine)} dove fine indica che il percorso
+    è terminato (risposta diversa da time-exceeded).
+    """
+    ident = os.getpid() & 0xFFFF
+    throttle_many(destinations)
+    packets = [IP(dst=dst, ttl=ttl) / ICMP(id=ident, seq=ttl) for dst in destinations]
+    answered, _ = sr(packets, timeout=timeout, verbose=0)
+    icmp = resolve(ICMP)
+    results = {dst: (None, None, False) for dst in destinations}
+    for snd, rcv in answered:
+        rtt = round((rcv.time - snd.sent_time) * 1000, 2)
+        results[snd.dst] = (rcv.src, rtt, rcv[icmp].type != 11)
+    return results
+
+
+def _discover_paths(destinations, max_hops, timeout, start_ttl):
+    """
+    Scoperta dei percorsi in stile Doubletree:
+    - Fase forward da start_ttl verso max_hops, un batch per TTL su tutte le
+      destinazioni ancora attive; ogni destinazione esce appena raggiunta
+    - Fase backward da start_ttl - 1 verso 1; una destinazione si ferma al primo
+      hop già noto ed eredita il tratto a monte da chi lo ha scoperto
+    """
+    topology = TracerouteTopology()
+    paths = {dst: {} for dst in destinations}
+    # hop -> (destinazione, ttl) di chi lo ha visto per primo
+    seen = {}
+    # destinazione -> (hop condiviso, ttl locale) da cui ereditare il tratto a monte
+    inherits = {}
+
+    active = list(destinations)
+    for ttl in range(start_ttl, max_hops + 1):
+        if not active:
+            break
+        results = _probe_ttl(active, ttl, timeout)
+        topology.probes_sent += len(active)
+        still_active = []
+        for dst in active:
+            hop_ip, rtt, done = results[dst]
+            paths[dst][ttl] = (hop_ip, rtt)
+            if hop_ip is not None:
+                seen.setdefault(hop_ip, (dst, ttl))
+            if not done:
+                still_active.append(dst)
+        active = still_active
+
+    active = list(destinations)
+    for ttl in range(min(start_ttl, max_hops + 1) - 1, 0, -1):
+        if not active:
+            break
+        results = _probe_ttl(active, ttl, timeout)
+        topology.probes_sent += len(active)
+        still_active = []
+        for dst in active:
+            hop_ip, rtt, _ = results[dst]
+            if hop_ip is not None and hop_ip in seen and seen[hop_ip][0] != dst:
+                inherits[dst] = (hop_ip, ttl)
+                paths[dst][ttl] = (hop_ip, rtt)
+                continue
+            paths[dst][ttl] = (hop_ip, rtt)
+            if hop_ip is not None:
+                seen.setdefault(hop_ip, (dst, ttl))
+            still_active.append(dst)
+        active = still_active
+
+    resolved = {}
+
+    def resolve(dst, visiting=()):
+        if dst in resolved:
+            return resolved[dst]
+        path = dict(paths[dst])
+        if dst in inherits and dst not in visiting:
+            hop_ip, local_ttl = inherits[dst]
+            owner, owner_ttl = seen[hop_ip]
+            owner_path = resolve(owner, visiting + (dst,))
+            shift = local_ttl - owner_ttl
+            for ttl, hop in owner_path.items():
+                if ttl < owner_ttl and ttl + shift > 0:
+                    path.setdefault(ttl + shift, hop)
+        # Tronca il percorso al primo TTL che raggiunge la destinazione
+        for ttl in sorted(path):
+            if path[ttl][0] == dst:
+                path = {t: hop for t, hop in path.items() if t <= ttl}
+                break
+        resolved[dst] = path
+        return path
+
+    for dst in destinations:
+        topology.paths[dst] = resolve(dst)
+        topology._add_path_edges(topology.paths[dst])
+    return topology
+
+
+def run_multi_traceroute_diag(
+    addresses,
+    logger: LogManager,
+    os_type: str,
+    max_hops=20,
+    timeout=2,
+    start_ttl=DEFAULT_START_TTL,
+):
+    """
+    Esegue un traceroute verso più destinazioni in un'unica passata:
+    - Valida e risolve ogni destinazione
+    - Probe a TTL limitato inviati in batch su tutte le destinazioni
+    - Hop condivisi deduplicati in un grafo di topologia in memoria
+    Ritorna una TracerouteTopology (None su errore); stampa in cli.render.
+    """
+    destinations: Dict[str, str] = {}
+    for address, ok in zip(addresses, validate_many(addresses)):
+        if not ok:
+            logger.warning(f"Destinazione non valida scartata: {address}")
+            continue
+        try:
+            destinations.setdefault(socket.gethostbyname(address), address)
+        except OSError as e:
+            logger.warning(f"Risoluzione fallita per {address}: {e}")
+    if not destinations:
+        logger.error("Nessuna destinazione valida per il traceroute.")
+        print("ERRORE: Nessuna destinazione valida.")
+        return None
+
+    logger.info(
+        f"Inizio traceroute multi-destinazione verso {len(destinations)} host (OS: {os_type})"
+    )
+    if not (sr and IP and ICMP):
+        logger.error("Modulo traceroute/scapy non disponibile.")
+        print("ERRORE: modulo traceroute non disponibile.")
+        return None
+
+    try:
+        topology = _discover_paths(
+            list(destinations), max_hops, timeout, max(1, min(start_ttl, max_hops))
+        )
+    except Exception as e:
+        logger.error(f"Errore traceroute multi-destinazione: {e}", exc_info=True)
+        print("ERRORE: Traceroute fallito.")
+        return None
+
+    topology.destinations = destinations
+    for ip, path in topology.paths.items():
+        hops = [path[ttl] for ttl in sorted(path)]
+        logger.event("traceroute.hops", address=destinations[ip], ip=ip, hops=hops)
+    logger.info(
+        f"Topologia: {len(topology.hops())} hop unici, {topology.probes_sent} probe inviati."
+    )
+    logger.info("Fine diagnostica traceroute multi-destinazione.")
+    return topology
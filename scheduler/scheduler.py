@@ -0,0 +1,371 @@
+# scheduler/scheduler.py - Esecuzione non interattiva (daemon) di diagnostiche pianificate.
+"""
+Scheduler headless per diagnostiche periodiche:
+- Job letti da config.ini (sezioni [job:<nome>]: action, targets, interval)
+- Azioni: ping, traceroute, dns, stats, adaptive (un probe per tick, escalation su soglia)
+- Cadenza fissa con timer a correzione di deriva (niente accumulo di ritardi)
+- Concorrenza limitata (ThreadPoolExecutor), esecuzioni sovrapposte saltate
+- Arresto ordinato (SIGTERM/SIGINT): attesa job in corso, flush di CSV e store
+- Ricarica della configurazione a caldo (mtime): job, target, intervalli e
+  parametri dei moduli aggiornati senza riavvio
+"""
+
+import configparser
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+from csv_utils.csv_writer import flush_all_sinks
+from logs.custom_logging import LogManager
+from network.adaptive import AdaptiveMonitor, cheap_probe, default_stages
+from network.dns_async import run_dns_bulk_diag
+from network.icmp_transport import get_transport
+from network.ping import load_targets, run_ping_sweep
+from network.stats import run_stats_diag
+from network.traceroute import run_multi_traceroute_diag, run_traceroute_diag
+from security.rate_limiter import configure_budget
+from security.security import validate_address
+from storage.columnar_store import close_all_stores, get_store
+
+ACTIONS = ("ping", "traceroute", "dns", "stats", "adaptive")
+
+DEFAULT_MAX_WORKERS = 4
+
+JOB_PREFIX = "job:"
+
+# Secondi massimi tra due controlli di modifica del file di configurazione
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+class Job:
+    """Job pianificato: azione, target e intervallo in secondi."""
+
+    def __init__(self, name, action, targets, interval):
+        if action not in ACTIONS:
+            raise ValueError(f"Job {name}: azione non supportata '{action}'")
+        if interval <= 0:
+            raise ValueError(f"Job {name}: intervallo non valido {interval}")
+        if action != "stats" and not targets:
+            raise ValueError(f"Job {name}: nessun target per l'azione {action}")
+        self.name = name
+        self.action = action
+        self.targets = targets
+        self.interval = interval
+        self.next_run = 0.0
+        self.runs = 0
+        self.skipped = 0
+        self.future = None
+
+
+def load_jobs(config):
+    """Legge i job dalle sezioni [job:<nome>] della configurazione."""
+    jobs = []
+    for section in config.sections():
+        if not section.startswith(JOB_PREFIX):
+            continue
+        targets = config.get(section, "targets", fallback="")
+        jobs.append(
+            Job(
+                section.split(":", 1)[1].strip(),
+                config.get(section, "action", fallback="").strip().lower(),
+                [t.strip() for t in targets.split(",") if t.strip()],
+                config.getfloat(section, "interval", fallback=60.0),
+            )
+        )
+    return jobs
+
+
+def next_deadline(deadline, interval, now):
+    """
+    Prossima scadenza ancorata alla precedente (non alla fine del job):
+    i tick persi vengono saltati, senza raffiche di recupero.
+    """
+    deadline += interval
+    if deadline <= now:
+        deadline += ((now - deadline) // interval + 1) * interval
+    return deadline
+
+
+class JobRunner:
+    """Esegue un job con i moduli diagnostici e i parametri di config.ini."""
+
+    def __init__(self, config, logger: LogManager, os_type: str):
+        self.config = config
+        self.logger = logger
+        self.os_type = os_type
+        self._monitors: Dict[Tuple[str, str], AdaptiveMonitor] = {}
+        # Parametri con cui è stato creato ogni monitor (snapshot immutabili)
+        self._monitor_settings: Dict[Tuple[str, str], tuple] = {}
+        self._monitors_lock = threading.Lock()
+
+    def __call__(self, job):
+        getattr(self, f"_run_{job.action}")(job)
+
+    def close(self):
+        """Attende le escalation in corso dei monitor adattivi."""
+        with self._monitors_lock:
+            monitors = list(self._monitors.values())
+            self._monitors.clear()
+            self._monitor_settings.clear()
+        for monitor in monitors:
+            monitor.close()
+
+    def prune(self, jobs):
+        """
+        Chiude i monitor di job o target rimossi (configurazione ricaricata);
+        l'escalation in corso non viene attesa.
+        """
+        active = {
+            (job.name, address)
+            for job in jobs
+            if job.action == "adaptive"
+            for address in job.targets
+        }
+        with self._monitors_lock:
+            stale = [key for key in self._monitors if key not in active]
+            monitors = [self._monitors.pop(key) for key in stale]
+            for key in stale:
+                del self._monitor_settings[key]
+        for monitor in monitors:
+            monitor.close(wait=False)
+
+    def _store(self):
+        path = self.config.settings.diagnostics.binary_store
+        if not path:
+            return None
+        try:
+            return get_store(path)
+        except (ImportError, OSError, ValueError) as e:
+            self.logger.error(f"Store binario non disponibile: {e}")
+            return None
+
+    def _transport(self):
+        kind = self.config.settings.diagnostics.icmp_transport
+        if kind in ("", "off"):
+            return None
+        try:
+            return get_transport(kind)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Trasporto ICMP non disponibile ({kind}): {e}")
+            return None
+
+    def _run_ping(self, job):
+        settings = self.config.settings
+        max_hosts = settings.security.max_sweep_hosts
+        targets = {}
+        for spec in job.targets:
+            targets.update(dict.fromkeys(load_targets(spec, max_hosts)))
+        run_ping_sweep(
+            list(targets)[:max_hosts],
+            self.logger,
+            self.os_type,
+            max_workers=settings.network.sweep_workers,
+            timeout=settings.network.timeout,
+            csvfile=settings.diagnostics.csvfile,
+            store=self._store(),
+            transport=self._transport(),
+        )
+
+    def _run_traceroute(self, job):
+        max_hops = self.config.settings.network.max_hops
+        timeout = self.config.settings.network.timeout
+        if len(job.targets) == 1:
+            run_traceroute_diag(
+                job.targets[0], self.logger, self.os_type, max_hops, timeout
+            )
+        else:
+            run_multi_traceroute_diag(
+                job.targets, self.logger, self.os_type, max_hops, timeout
+            )
+
+    def _run_dns(self, job):
+        dns = self.config.settings.dns
+        run_dns_bulk_diag(
+            job.targets,
+            self.logger,
+            record_types=list(dns.record_types),
+            dns_timeout=dns.dns_timeout,
+        )
+
+    def _run_stats(self, job):
+        run_stats_diag(self.logger)
+
+    def _monitor(self, job, address):
+        """
+        Monitor adattivo persistente per (job, target), creato al primo tick
+        e ricreato se [adaptive], [network] o [diagnostics] sono cambiati.
+        """
+        key = (job.name, address)
+        settings = self.config.settings
+        current = (settings.adaptive, settings.network, settings.diagnostics)
+        with self._monitors_lock:
+            monitor = self._monitors.get(key)
+            if monitor is not None and self._monitor_settings[key] != current:
+                del self._monitors[key]
+                monitor.close(wait=False)
+                monitor = None
+            if monitor is None:
+                monitor = self._monitors[key] = self._new_monitor(address, settings)
+                self._monitor_settings[key] = current
+        return monitor
+
+    def _new_monitor(self, address, settings):
+        store = self._store()
+        transport = self._transport()
+        stages = default_stages(
+            self.logger,
+            self.os_type,
+            settings.adaptive.stages,
+            csvfile=settings.diagnostics.csvfile,
+            store=store,
+            transport=transport,
+        )
+        timeout = settings.network.timeout
+        return AdaptiveMonitor(
+            address,
+            self.logger,
+            stages,
+            probe=lambda addr: cheap_probe(
+                addr, self.logger, timeout, store, transport
+            ),
+            **settings.adaptive.thresholds(),
+        )
+
+    def _run_adaptive(self, job):
+        for address in job.targets:
+            if not validate_address(address):
+                self.logger.warning(f"Job {job.name}: target non valido {address}")
+                continue
+            self._monitor(job, address).tick()
+
+
+class Scheduler:
+    """
+    Loop di pianificazione nel thread principale, job nel pool di worker.
+    stop() è sicuro da chiamare da un signal handler o da un altro thread.
+    Con config (ConfigManager) i job vengono riletti quando il file cambia;
+    max_workers resta quello di avvio.
+    clock e sleep iniettabili (test deterministici); sleep di default
+    interrompibile da stop().
+    """
+
+    def __init__(
+        self,
+        jobs,
+        runner,
+        logger: LogManager,
+        max_workers=DEFAULT_MAX_WORKERS,
+        clock=time.monotonic,
+        config=None,
+        sleep=None,
+    ):
+        self.jobs = jobs
+        self.runner = runner
+        self.logger = logger
+        self.max_workers = max_workers
+        self.clock = clock
+        self.config = config
+        self._stop = threading.Event()
+        self.sleep = sleep if sleep is not None else self._stop.wait
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def _execute(self, job):
+        start = self.clock()
+        try:
+            self.runner(job)
+        except Exception as e:
+            self.logger.error(f"Errore job {job.name}: {e}", exc_info=True)
+        job.runs += 1
+        self.logger.event(
+            "scheduler.job",
+            job=job.name,
+            action=job.action,
+            duration_s=round(self.clock() - start, 3),
+        )
+
+    def _reload(self, now):
+        """Rilegge i job se il file di configurazione è cambiato."""
+        try:
+            if not self.config.reload_if_changed():
+                return
+            configure_budget(self.config.settings.security)
+            jobs = load_jobs(self.config)
+        except (OSError, ValueError, configparser.Error) as e:
+            self.logger.warning(
+                f"Configurazione non ricaricata, resta la precedente: {e}"
+            )
+            return
+        current = {job.name: job for job in self.jobs}
+        for job in jobs:
+            old = current.get(job.name)
+            if old is None:
+                job.next_run = now
+                continue
+            # Stesso job: conservo stato e scadenza (anticipata se l'intervallo si accorcia)
+            job.runs, job.skipped, job.future = old.runs, old.skipped, old.future
+            job.next_run = min(old.next_run, now + job.interval)
+        self.jobs = jobs
+        prune = getattr(self.runner, "prune", None)
+        if prune is not None:
+            prune(jobs)
+        self.logger.info(f"Configurazione ricaricata: {len(jobs)} job.")
+
+    def _dispatch(self, executor, now):
+        for job in self.jobs:
+            if job.next_run > now:
+                continue
+            if job.future is not None and not job.future.done():
+                # Esecuzione precedente ancora in corso: salto il tick
+                job.skipped += 1
+                self.logger.warning(
+                    f"Job {job.name} ancora in esecuzione, tick saltato "
+                    f"({job.skipped} finora)."
+                )
+            else:
+                job.future = executor.submit(self._execute, job)
+            job.next_run = next_deadline(job.next_run, job.interval, now)
+
+    def run(self):
+        """Esegue i job fino a stop(), poi attende i job in corso e svuota i sink."""
+        if not self.jobs:
+            self.logger.warning("Nessun job configurato per lo scheduler.")
+            return
+        self.logger.info(
+            f"Scheduler avviato: {len(self.jobs)} job, {self.max_workers} worker."
+        )
+        start = self.clock()
+        for job in self.jobs:
+            job.next_run = start
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="diag-job"
+        ) as executor:
+            while not self._stop.is_set():
+                now = self.clock()
+                if self.config is not None:
+                    self._reload(now)
+                self._dispatch(executor, now)
+                wait = (
+                    min(
+                        (job.next_run for job in self.jobs),
+                        default=now + RELOAD_CHECK_INTERVAL,
+                    )
+                    - self.clock()
+                )
+                if self.config is not None:
+                    wait = min(wait, RELOAD_CHECK_INTERVAL)
+                if wait > 0:
+                    self.sleep(wait)
+            self.logger.info("Arresto scheduler: attesa dei job in corso.")
+        close = getattr(self.runner, "close", None)
+        if close is not None:
+            close()
+        flush_all_sinks()
+        close_all_stores()
+        for job in self.jobs:
+            self.logger.info(
+                f"Job {job.name}: {job.runs} esecuzioni, {job.skipped} tick saltati."
+            )
+        self.logger.info("Scheduler arrestato.")
@@ -0,0 +1,226 @@
+# security/rate_limiter.py - Rate limiting dei probe: token bucket globale e per target.
+"""
+Budget di probe condiviso da ping, traceroute, MTR e DNS:
+- Token bucket globale (probe al secondo su tutto il processo)
+- Token bucket per target (evita il rate limiting ICMP dei router, che appare come loss)
+- Query DNS (chiavi "dns:<nameserver>") con rate/burst propri per resolver:
+  i limiti ICMP per target non si applicano, dns_rate = 0 = solo budget globale
+- Prenotazione: reserve() scala subito i token e ritorna il ritardo di invio,
+  così i probe concorrenti vengono distribuiti nel tempo invece di partire a raffica
+- Parametri da [security] in config.ini (probe_rate = 0 disattiva il limite),
+  riapplicati a ogni ricarica a caldo della configurazione
+- API: TokenBucket, ProbeBudget, configure_budget(security), throttle(), athrottle()
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+# Default di [security]: probe al secondo e burst, globali e per target
+DEFAULT_PROBE_RATE = 1000.0
+DEFAULT_PROBE_BURST = 50.0
+DEFAULT_TARGET_RATE = 20.0
+DEFAULT_TARGET_BURST = 10.0
+# Query DNS per resolver: 0 = nessun limite per resolver (solo budget globale)
+DEFAULT_DNS_RATE = 0.0
+DEFAULT_DNS_BURST = 100.0
+
+# Prefisso delle chiavi di budget delle query DNS (una per resolver)
+DNS_KEY_PREFIX = "dns:"
+
+# Bucket per target conservati (LRU): oltre, i meno recenti vengono scartati
+MAX_TRACKED_TARGETS = 65536
+
+
+class TokenBucket:
+    """
+    Token bucket a prenotazione (virtual scheduling):
+    i token possono andare in negativo, il debito è il tempo di attesa di chi prenota.
+    Non thread-safe: la sincronizzazione è di ProbeBudget.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate e capacity del token bucket devono essere > 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = now
+
+    def reserve(self, n, now):
+        """Scala n token; ritorna i secondi di attesa prima di poter inviare (0 = subito)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= n
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class ProbeBudget:
+    """
+    Budget condiviso tra thread: un bucket globale e uno per target.
+    reserve(target, n) prenota n probe e ritorna il ritardo da rispettare.
+    I target DNS_KEY_PREFIX usano dns_rate/dns_burst (dns_rate = 0: solo globale).
+    """
+
+    def __init__(
+        self,
+        rate=DEFAULT_PROBE_RATE,
+        burst=DEFAULT_PROBE_BURST,
+        target_rate=DEFAULT_TARGET_RATE,
+        target_burst=DEFAULT_TARGET_BURST,
+        max_targets=MAX_TRACKED_TARGETS,
+        clock=time.monotonic,
+        dns_rate=DEFAULT_DNS_RATE,
+        dns_burst=DEFAULT_DNS_BURST,
+    ):
+        self.clock = clock
+        self.target_rate = target_rate
+        self.target_burst = target_burst
+        self.dns_rate = dns_rate
+        self.dns_burst = dns_burst
+        self.max_targets = max_targets
+        self._global = TokenBucket(rate, burst, clock())
+        # Verifica dei parametri per target alla creazione, non al primo probe
+        TokenBucket(target_rate, target_burst, 0.0)
+        if dns_rate:
+            TokenBucket(dns_rate, dns_burst, 0.0)
+        self._targets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _target_bucket(self, target, now):
+        """Bucket del target; None per le query DNS senza limite per resolver."""
+        bucket = self._targets.get(target)
+        if bucket is None:
+            if target.startswith(DNS_KEY_PREFIX):
+                if not self.dns_rate:
+                    return None
+                rate, burst = self.dns_rate, self.dns_burst
+            else:
+                rate, burst = self.target_rate, self.target_burst
+            if len(self._targets) >= self.max_targets:
+                # Il target meno recente ha quasi certamente il bucket di nuovo pieno
+                self._targets.popitem(last=False)
+            bucket = self._targets[target] = TokenBucket(rate, burst, now)
+        else:
+            self._targets.move_to_end(target)
+        return bucket
+
+    def _reserve_target(self, target, n, now):
+        bucket = self._target_bucket(target, now)
+        return bucket.reserve(n, now) if bucket is not None else 0.0
+
+    def reserve(self, target, n=1):
+        """Prenota n probe verso target; ritorna i secondi di attesa."""
+        with self._lock:
+            now = self.clock()
+            return max(
+                self._global.reserve(n, now),
+                self._reserve_target(target, n, now),
+            )
+
+    def reserve_many(self, targets, n=1):
+        """Prenota n probe per ciascun target (batch); ritorna l'attesa massima."""
+        with self._lock:
+            now = self.clock()
+            delay = self._global.reserve(n * len(targets), now)
+            for target in targets:
+                delay = max(delay, self._reserve_target(target, n, now))
+            return delay
+
+    def tracked(self):
+        return len(self._targets)
+
+
+_budget = None
+# Parametri [security] del budget installato da configure_budget (None = nessuno)
+_budget_params = None
+
+
+def _params(security):
+    return (
+        security.probe_rate,
+        security.probe_burst,
+        security.target_rate,
+        security.target_burst,
+        security.dns_rate,
+        security.dns_burst,
+    )
+
+
+def budget_from_settings(security):
+    """
+    ProbeBudget da config.settings.security (SecuritySettings);
+    None se probe_rate = 0 (nessun limite).
+    """
+    if security.probe_rate <= 0:
+        return None
+    return ProbeBudget(
+        rate=security.probe_rate,
+        burst=security.probe_burst,
+        target_rate=security.target_rate,
+        target_burst=security.target_burst,
+        dns_rate=security.dns_rate,
+        dns_burst=security.dns_burst,
+    )
+
+
+def set_budget(budget):
+    """Imposta il budget di processo (None = nessun limite); ritorna il precedente."""
+    global _budget, _budget_params
+    previous, _budget = _budget, budget
+    _budget_params = None
+    return previous
+
+
+def get_budget():
+    return _budget
+
+
+def configure_budget(security):
+    """
+    Budget di processo da config.settings.security, all'avvio e dopo ogni
+    ricarica della configurazione: ricreato (bucket pieni) solo se i parametri
+    di rate limiting sono cambiati, altrimenti resta quello in uso.
+    """
+    global _budget_params
+    params = _params(security)
+    if params != _budget_params:
+        set_budget(budget_from_settings(security))
+        _budget_params = params
+    return _budget
+
+
+def throttle(target, n=1):
+    """Attende il proprio turno per n probe verso target; ritorna i secondi attesi."""
+    budget = _budget
+    if budget is None:
+        return 0.0
+    delay = budget.reserve(target, n)
+    if delay > 0:
+        time.sleep(delay)
+    return delay
+
+
+def throttle_many(targets, n=1):
+    """Come throttle, per un batch di probe verso più target inviati insieme."""
+    budget = _budget
+    if budget is None or not targets:
+        return 0.0
+    delay = budget.reserve_many(list(targets), n)
+    if delay > 0:
+        time.sleep(delay)
+    return delay
+
+
+async def athrottle(target, n=1):
+    """Come throttle, senza bloccare l'event loop (query DNS asincrone)."""
+    budget = _budget
+    if budget is None:
+        return 0.0
+    delay = budget.reserve(target, n)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    return delay
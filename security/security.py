@@ -1,22 +1,90 @@
 # security/security.py - Validazione input, protezione da abusi, sanitizzazione.
 """
 Security layer:
-- Validazione IP e domini (regex robusta)
+- Validazione IP (v4 e v6, semantica ipaddress) e domini, pattern precompilati
+- Risultati memorizzati in una cache LRU limitata (stesso indirizzo validato da CLI, ping, DNS)
+- Validazione di liste di target in blocco (sweep con molte voci)
 - Protezione da injection e abusi nei comandi
-- API: validate_address(address)
+- API: validate_address(address), validate_many(addresses)
 """
 
+import ipaddress
 import re
+from functools import lru_cache
 
+VALIDATION_CACHE_SIZE = 4096
 
-def validate_address(address):
-    # IP v4
-    ip_pattern = r"^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$"
-    # Dominio (semplificato)
-    domain_pattern = (
-    r"^(?!-)[A-Za-z0-9-]{1,63}(?<!-)"
+# Lunghezza massima di un nome di dominio (RFC 1035)
+MAX_DOMAIN_LENGTH = 253
+
+# IP v4 in notazione decimale puntata: ottetti 0-255, senza zeri iniziali (come ipaddress)
+_OCTET = r"(?:25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])"
+IPV4_PATTERN = rf"{_OCTET}(?:\.{_OCTET}){{3}}"
+
+# Dominio (semplificato): etichette alfanumeriche, TLD alfabetico
+DOMAIN_PATTERN = (
+    r"(?!-)[A-Za-z0-9-]{1,63}(?<!-)"
     r"(?:\.[A-Za-z0-9-]{1,63}(?<!-))*"
-    r"\.[A-Za-z]{2,}$"
-    )   
-    return bool(re.match(ip_pattern, address) or re.match(domain_pattern, address))
+    r"\.[A-Za-z]{2,}"
+)
+
+# Scope IPv6 (fe80::1%eth0): nome di interfaccia o indice, niente spazi/metacaratteri
+SCOPE_ID_RE = re.compile(r"[A-Za-z0-9_.-]{1,15}")
+
+# Un solo pattern compilato per IPv4 e domini (lunghezza inclusa): una scansione per indirizzo
+ADDRESS_RE = re.compile(
+    rf"(?=.{{1,{MAX_DOMAIN_LENGTH}}}\Z)(?:{IPV4_PATTERN}|{DOMAIN_PATTERN})"
+)
+
+
+def _check_address(address):
+    """Validazione senza cache; il pattern si applica all'intera stringa (fullmatch)."""
+    if not isinstance(address, str):
+        return False
+    if ADDRESS_RE.fullmatch(address):
+        return True
+    return _is_ipv6(address)
+
+
+def _is_ipv6(address):
+    """
+    IPv6 (anche con scope, es. fe80::1%eth0) con la semantica di ipaddress.
+    ipaddress accetta qualsiasi testo come scope: qui limitato a SCOPE_ID_RE.
+    """
+    if ":" not in address:
+        return False
+    _, sep, scope = address.partition("%")
+    if sep and not SCOPE_ID_RE.fullmatch(scope):
+        return False
+    try:
+        return ipaddress.ip_address(address).version == 6
+    except ValueError:
+        return False
+
+
+_cached_check = lru_cache(maxsize=VALIDATION_CACHE_SIZE)(_check_address)
+
+
+def validate_address(address):
+    """True se address è un IPv4, un IPv6 o un dominio valido (risultato in cache LRU)."""
+    if not isinstance(address, str):
+        return False
+    return _cached_check(address)
+
 
+def validate_many(addresses):
+    """
+    Valida una lista di target in blocco: ritorna una lista di bool allineata all'input.
+    - Ogni valore distinto è validato una sola volta
+    - Pattern applicato con map() sui valori distinti, IPv6 solo sugli scarti
+    - Nessun passaggio dalla cache LRU (liste grandi la svuoterebbero)
+    """
+    addresses = list(addresses)
+    try:
+        unique = dict.fromkeys(addresses)
+        valid = {match.string for match in map(ADDRESS_RE.fullmatch, unique) if match}
+    except TypeError:
+        # Voci non stringa (o non hashable): validazione una per una
+        return [_check_address(address) for address in addresses]
+    valid.update(filter(_is_ipv6, unique.keys() - valid))
+    return [address in valid for address in addresses]
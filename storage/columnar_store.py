@@ -0,0 +1,253 @@
+# storage/columnar_store.py - Store binario a colonne (segmenti NumPy .npy) per i risultati.
+"""
+Store binario dei risultati di diagnostica, affiancato al CSV:
+- Colonne tipizzate (float64/float32/uint32...) in segmenti .npy append-only
+- Colonna target codificata a dizionario (id uint32 + targets.json)
+- Segmenti immutabili pubblicati in modo atomico (rename della directory)
+- Lettura zero-copy tramite file memory-mapped (np.load mmap_mode="r")
+- API: ColumnarStore(path, schema), get_store(path, schema)
+"""
+
+import atexit
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from typing import Dict
+
+from network.backends import backend, lazy_attr
+
+# NumPy al primo uso (store aperto), non all'import del modulo
+np = backend("numpy")
+# np.load: sul proxy "load" è il caricamento del backend stesso
+np_load = lazy_attr("numpy", "load")
+
+# Schema dei risultati ping: una riga per probe/burst verso un target
+PING_SCHEMA = {
+    "timestamp": "f8",
+    "target": "u4",
+    "ping_ms": "f4",
+    "min_ms": "f4",
+    "avg_ms": "f4",
+    "max_ms": "f4",
+    "loss_pct": "f4",
+    "scapy_avg_ms": "f4",
+    "scapy_loss_pct": "f4",
+}
+
+# Righe per segmento di default (~2 MB per colonna float32)
+DEFAULT_SEGMENT_ROWS = 1 << 19
+
+# Intervallo massimo (s) tra due flush: limita i dati persi in caso di crash
+DEFAULT_FLUSH_INTERVAL = 300
+
+
+def _to_number(value):
+    """Valori mancanti ("" o None) diventano NaN."""
+    if value is None or value == "":
+        return math.nan
+    return value
+
+
+def _segment_number(segment):
+    """Numero progressivo dal nome della directory (seg_000042 -> 42)."""
+    return int(os.path.basename(segment)[4:])
+
+
+class ColumnarStore:
+    """
+    Store append-only a colonne su disco:
+    - path/schema.json, path/targets.json
+    - path/seg_000001/<colonna>.npy, un file per colonna per segmento
+    Le righe sono bufferizzate in memoria e scritte in un nuovo segmento
+    ogni segment_rows righe, ogni flush_interval secondi o su flush()/close().
+    """
+
+    def __init__(
+        self,
+        path,
+        schema,
+        segment_rows=DEFAULT_SEGMENT_ROWS,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+    ):
+        if not np:
+            raise ImportError("Modulo numpy non disponibile per lo store binario.")
+        self.path = path
+        self.segment_rows = segment_rows
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        schema_path = os.path.join(path, "schema.json")
+        if os.path.isfile(schema_path):
+            with open(schema_path, encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored != dict(schema):
+                raise ValueError(f"Schema diverso da quello dello store in {path}.")
+        else:
+            self._write_json(schema_path, dict(schema))
+        self.schema = {name: np.dtype(dtype) for name, dtype in schema.items()}
+
+        targets_path = os.path.join(path, "targets.json")
+        self.targets = []
+        if os.path.isfile(targets_path):
+            with open(targets_path, encoding="utf-8") as f:
+                self.targets = json.load(f)
+        self._target_ids = {name: i for i, name in enumerate(self.targets)}
+        self._targets_dirty = False
+        self._buffer = {name: [] for name in self.schema}
+        self._remove_orphans()
+        # Dopo compact() i numeri non sono contigui: si riparte dal più alto
+        self._next_segment = max(map(_segment_number, self.segments()), default=0) + 1
+
+    def _remove_orphans(self):
+        """Rimuove i segmenti temporanei lasciati da una scrittura interrotta."""
+        for entry in os.listdir(self.path):
+            if entry.startswith(".seg_") and entry.endswith(".tmp"):
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def target_id(self, target):
+        """Id numerico del target (assegnato al primo utilizzo)."""
+        target_id = self._target_ids.get(target)
+        if target_id is None:
+            target_id = self._target_ids[target] = len(self.targets)
+            self.targets.append(target)
+            self._targets_dirty = True
+        return target_id
+
+    def append(self, record):
+        """Accoda una riga (dict colonna -> valore, target come stringa)."""
+        with self._lock:
+            for name, values in self._buffer.items():
+                value = record.get(name)
+                if name == "target":
+                    value = self.target_id(value)
+                values.append(_to_number(value))
+            if (
+                len(self._buffer["timestamp"]) >= self.segment_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if self._targets_dirty:
+            self._write_json(os.path.join(self.path, "targets.json"), self.targets)
+            self._targets_dirty = False
+        if not self._buffer["timestamp"]:
+            return
+        self._write_segment(self._buffer)
+        for values in self._buffer.values():
+            values.clear()
+
+    def _write_segment(self, columns):
+        name = f"seg_{self._next_segment:06d}"
+        tmp_dir = os.path.join(self.path, f".{name}.tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        for column, values in columns.items():
+            array = np.asarray(values, dtype=self.schema[column])
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), array)
+        # Pubblicazione atomica: il segmento è visibile solo se completo
+        os.rename(tmp_dir, os.path.join(self.path, name))
+        self._next_segment += 1
+
+    def compact(self):
+        """
+        Riscrive i segmenti piccoli (flush frequenti) in segmenti da segment_rows.
+        I nuovi segmenti sono pubblicati prima di rimuovere i vecchi.
+        """
+        with self._lock:
+            self._flush_locked()
+            old_segments = self.segments()
+            if len(old_segments) < 2:
+                return
+            data = self.read()
+            total = len(data["timestamp"])
+            for start in range(0, total, self.segment_rows):
+                end = start + self.segment_rows
+                self._write_segment(
+                    {column: array[start:end] for column, array in data.items()}
+                )
+            for segment in old_segments:
+                shutil.rmtree(segment)
+
+    def close(self):
+        self.flush()
+
+    def segments(self):
+        """Directory dei segmenti pubblicati, in ordine di scrittura."""
+        return sorted(
+            os.path.join(self.path, entry)
+            for entry in os.listdir(self.path)
+            if entry.startswith("seg_") and entry[4:].isdigit()
+        )
+
+    def iter_segments(self, columns=None):
+        """
+        Itera i segmenti come dict colonna -> array memory-mapped (zero-copy).
+        Le righe ancora nel buffer non sono incluse (vedi flush()).
+        """
+        columns = list(columns or self.schema)
+        for segment in self.segments():
+            yield {
+                column: np_load(os.path.join(segment, f"{column}.npy"), mmap_mode="r")
+                for column in columns
+            }
+
+    def read(self, columns=None):
+        """Tutte le righe come dict colonna -> array contiguo (una sola copia)."""
+        columns = list(columns or self.schema)
+        parts = {column: [] for column in columns}
+        for segment in self.iter_segments(columns):
+            for column, array in segment.items():
+                parts[column].append(array)
+        return {
+            column: (
+                np.concatenate(arrays)
+                if arrays
+                else np.empty(0, dtype=self.schema[column])
+            )
+            for column, arrays in parts.items()
+        }
+
+
+_stores: Dict[str, ColumnarStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, schema=PING_SCHEMA, **kwargs):
+    """
+    Ritorna lo store condiviso per il path indicato, creandolo al primo uso.
+    Gli store condivisi vengono svuotati all'uscita del processo.
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ColumnarStore(path, schema, **kwargs)
+        return store
+
+
+def close_all_stores():
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
+
+
+atexit.register(close_all_stores)
@@ -0,0 +1,104 @@
+# tests/conftest.py - Fixture condivise (stub DNS locale su 127.0.0.1)
+import socket
+import threading
+import time
+
+import pytest
+
+from network.dns_cache import DEFAULT_CACHE
+
+try:
+    import dns.message
+    import dns.rcode
+    import dns.rdatatype
+    import dns.rrset
+except ImportError:
+    dns = None  # type: ignore
+
+
+class DnsStubServer:
+    """
+    Server DNS UDP minimale su 127.0.0.1 per i test:
+    - zone: {(nome, rtype): [rdata testuali]}
+    - delay: ritardo per risposta (verifica della concorrenza)
+    - i nomi assenti rispondono NXDOMAIN, le query vengono contate
+    - soa: rdata SOA inserito in authority nelle risposte negative
+    """
+
+    def __init__(self, zone, delay=0.0, ttl=300, soa=None, host="127.0.0.1", port=0):
+        self.zone = {
+            (name.rstrip(".").lower(), rtype): v for (name, rtype), v in zone.items()
+        }
+        self.delay = delay
+        self.ttl = ttl
+        self.soa = soa
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                wire, peer = self.sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            threading.Thread(
+                target=self._answer, args=(wire, peer), daemon=True
+            ).start()
+
+    def _answer(self, wire, peer):
+        query = dns.message.from_wire(wire)
+        question = query.question[0]
+        name = question.name.to_text().rstrip(".").lower()
+        rtype = dns.rdatatype.to_text(question.rdtype)
+        self.queries.append((name, rtype))
+        if self.delay:
+            time.sleep(self.delay)
+        response = dns.message.make_response(query)
+        records = self.zone.get((name, rtype))
+        if records:
+            response.answer.append(
+                dns.rrset.from_text_list(question.name, self.ttl, "IN", rtype, records)
+            )
+        else:
+            if not any(key[0] == name for key in self.zone):
+                response.set_rcode(dns.rcode.NXDOMAIN)
+            if self.soa:
+                response.authority.append(
+                    dns.rrset.from_text_list("test.", self.ttl, "IN", "SOA", [self.soa])
+                )
+        self.sock.sendto(response.to_wire(), peer)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+
+@pytest.fixture(autouse=True)
+def _clear_dns_cache():
+    # La cache DNS di processo non deve propagare risultati tra i test
+    DEFAULT_CACHE.clear()
+    yield
+    DEFAULT_CACHE.clear()
+
+
+@pytest.fixture
+def dns_stub():
+    if dns is None:
+        pytest.skip("dnspython non disponibile")
+    servers = []
+
+    def start(zone, **kwargs):
+        server = DnsStubServer(zone, **kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,181 @@
+# tests/test_adaptive.py - Test coverage per network/adaptive.py
+import pytest
+
+from network.adaptive import (
+    AdaptiveMonitor,
+    RollingWindow,
+    default_stages,
+    run_adaptive_diag,
+)
+
+
+class DummyLogger:
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg, exc_info=False):
+        pass
+
+    def event(self, name, level="info", **fields):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rolling_window_incremental_stats():
+    window = RollingWindow(size=4)
+    for rtt in [10.0, None, 30.0, 20.0]:
+        window.add(rtt)
+    assert window.mean_rtt == 20.0
+    assert window.loss_pct == 25.0
+    window.add(None)  # esce 10.0
+    window.add(None)  # esce None
+    assert window.mean_rtt == 25.0
+    assert window.loss_pct == 50.0
+
+
+def _monitor(calls, clock, **kwargs):
+    stages = {
+        "burst": lambda addr: calls.append(("burst", addr)),
+        "dns": lambda addr: calls.append(("dns", addr)),
+    }
+    params = dict(window=4, min_samples=3, rtt_threshold_ms=100, cooldown=60)
+    params.update(kwargs)
+    return AdaptiveMonitor("10.0.0.1", DummyLogger(), stages, clock=clock, **params)
+
+
+def test_no_escalation_while_healthy():
+    calls = []
+    monitor = _monitor(calls, FakeClock())
+    for _ in range(20):
+        assert monitor.observe(20.0) is None
+    monitor.close()
+    assert calls == []
+
+
+def test_escalation_on_rtt_with_cooldown():
+    calls, clock = [], FakeClock()
+    monitor = _monitor(calls, clock)
+    assert monitor.observe(300.0) is None  # sotto min_samples
+    assert monitor.observe(300.0) is None
+    reason = monitor.observe(300.0)
+    assert reason.startswith("RTT medio 300.0 ms")
+    monitor._pending.result()
+    assert calls == [("burst", "10.0.0.1"), ("dns", "10.0.0.1")]
+
+    clock.now = 30.0
+    assert monitor.observe(300.0) is None  # cooldown
+    clock.now = 61.0
+    assert monitor.observe(300.0) is not None
+    monitor.close()
+    assert len(calls) == 4
+    assert len(monitor.escalations) == 2
+
+
+def test_escalation_on_loss():
+    calls = []
+    monitor = _monitor(calls, FakeClock(), loss_threshold_pct=50)
+    monitor.observe(10.0)
+    monitor.observe(None)
+    assert monitor.observe(None).startswith("loss 66.7%")
+    monitor.close()
+    assert calls[0][0] == "burst"
+
+
+def test_default_stages_rejects_unknown():
+    with pytest.raises(ValueError):
+        default_stages(DummyLogger(), "linux", ["burst", "speedtest"])
+    assert list(default_stages(DummyLogger(), "linux", ["dns", "burst"])) == [
+        "dns",
+        "burst",
+    ]
+
+
+def test_run_adaptive_diag_probes_cheaply(monkeypatch, capsys):
+    rtts = iter([10.0, 12.0, None, None, None, 11.0])
+    probes = []
+
+    def fake_probe(address, logger, timeout=2, store=None, transport=None):
+        probes.append(address)
+        return next(rtts)
+
+    monkeypatch.setattr("network.adaptive.cheap_probe", fake_probe)
+    calls = []
+    monitor = run_adaptive_diag(
+        "10.0.0.1",
+        DummyLogger(),
+        "linux",
+        interval=0,
+        cycles=6,
+        stages={"burst": calls.append},
+        window=5,
+        min_samples=5,
+        loss_threshold_pct=60,
+    )
+    assert len(probes) == 6
+    assert calls == ["10.0.0.1"]
+    assert "Degrado su 10.0.0.1: loss 60.0%" in capsys.readouterr().out
+    assert monitor.probes == 6
+
+
+def test_monitor_configure_keeps_recent_samples():
+    monitor = AdaptiveMonitor(
+        "10.0.0.1", DummyLogger(), {}, probe=lambda addr: None, window=4
+    )
+    for rtt in (10.0, 20.0, 30.0, 40.0):
+        monitor.observe(rtt)
+    monitor.configure(window=2, rtt_threshold_ms=35.0, cooldown=1.0)
+    assert list(monitor.window.samples) == [30.0, 40.0]
+    assert monitor.window.mean_rtt == 35.0
+    assert (monitor.rtt_threshold_ms, monitor.cooldown) == (35.0, 1.0)
+    monitor.close()
+
+
+def test_run_adaptive_diag_reloads_config(monkeypatch):
+    from config.config_manager import AdaptiveSettings, Settings
+
+    timeouts = []
+    monkeypatch.setattr(
+        "network.adaptive.cheap_probe",
+        lambda address, logger, timeout=2, store=None, transport=None: timeouts.append(
+            timeout
+        ),
+    )
+
+    class FakeConfig:
+        settings = Settings(adaptive=AdaptiveSettings(interval=0, window=3))
+        checks = 0
+
+        def reload_if_changed(self):
+            self.checks += 1
+            return self.checks == 2
+
+    monitor = run_adaptive_diag(
+        "10.0.0.1",
+        DummyLogger(),
+        "linux",
+        interval=0,
+        cycles=4,
+        timeout=5,
+        stages={},
+        window=10,
+        config=FakeConfig(),
+    )
+    # Dal tick successivo alla ricarica: timeout e finestra della nuova configurazione
+    assert timeouts == [5, 5, 2, 2]
+    assert monitor.window.samples.maxlen == 3
+
+
+def test_run_adaptive_diag_invalid_address():
+    assert (
+        run_adaptive_diag("invalid_address", DummyLogger(), "linux", cycles=1) is None
+    )
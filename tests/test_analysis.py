@@ -0,0 +1,145 @@
+# tests/test_analysis.py - Test coverage per network/analysis.py
+import time
+
+import pytest
+
+from network.analysis import (
+    load_ping_csv,
+    load_results,
+    loss_windows,
+    per_target_summary,
+    percentiles,
+    rolling_mean,
+    run_analysis_diag,
+)
+from network.ping import PING_CSV_HEADER, ping_record
+from storage.columnar_store import PING_SCHEMA, ColumnarStore
+
+np = pytest.importorskip("numpy")
+
+
+class DummyLogger:
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg, exc_info=False):
+        pass
+
+
+def _random_data(n=5000, n_targets=7, seed=1):
+    rng = np.random.default_rng(seed)
+    values = rng.gamma(2.0, 10.0, n)
+    values[rng.random(n) < 0.1] = np.nan
+    return {
+        "timestamp": np.sort(rng.uniform(0, 3600, n)),
+        "target": rng.integers(0, n_targets, n).astype(np.uint32),
+        "targets": [f"10.0.0.{i}" for i in range(n_targets)],
+        "ping_ms": values.astype(np.float32),
+    }
+
+
+def test_per_target_summary_matches_reference():
+    data = _random_data()
+    data["targets"].append("10.0.0.99")  # target senza campioni
+    summary = per_target_summary(data)
+    for t in range(7):
+        mask = data["target"] == t
+        values = data["ping_ms"][mask].astype(np.float64)
+        received = values[~np.isnan(values)]
+        assert summary["count"][t] == mask.sum()
+        assert summary["loss_pct"][t] == pytest.approx(100 * np.isnan(values).mean())
+        for p in (50, 95, 99):
+            assert summary[f"p{p}"][t] == pytest.approx(np.percentile(received, p))
+        assert summary["jitter"][t] == pytest.approx(np.abs(np.diff(received)).mean())
+    assert np.isnan(summary["p50"][7]) and summary["count"][7] == 0
+    assert percentiles([1.0, np.nan, 3.0]) == {50: 2.0, 95: 2.9, 99: 2.98}
+
+
+def test_loss_windows_and_rolling_mean():
+    data = {
+        "timestamp": np.array([0, 10, 70, 80, 5, 65], dtype=np.float64),
+        "target": np.array([0, 0, 0, 0, 1, 1], dtype=np.uint32),
+        "targets": ["a", "b"],
+        "ping_ms": np.array([1, np.nan, 3, 5, 2, np.nan], dtype=np.float32),
+    }
+    windows = loss_windows(data, window_s=60)
+    assert windows["target"].tolist() == [0, 0, 1, 1]
+    assert windows["window_start"].tolist() == [0, 60, 0, 60]
+    assert windows["lost"].tolist() == [1, 0, 0, 1]
+    assert windows["loss_pct"].tolist() == [50.0, 0.0, 0.0, 100.0]
+
+    order, means = rolling_mean(data, window=2)
+    assert order.tolist() == [0, 1, 2, 3, 4, 5]
+    assert means[:4].tolist() == [1.0, 1.0, 3.0, 4.0]
+    assert means[4] == 2.0 and means[5] == 2.0
+
+
+def test_load_csv_and_store_agree(tmp_path):
+    rows = [
+        ["2025-01-01 10:00:00", "8.8.8.8", 10.5, 1, 2, 3, 0, "", "", "", ""],
+        ["2025-01-01 10:00:01", "1.1.1.1", "", "", "", "", "", "", "", "", ""],
+        ["2025-01-01 10:00:02", "8.8.8.8", 12.5, "", "", "", "", "", "", "", ""],
+    ]
+    csv_path = tmp_path / "ping.csv"
+    csv_path.write_text(
+        "\n".join(",".join(map(str, r)) for r in [PING_CSV_HEADER, *rows]) + "\n"
+    )
+    store = ColumnarStore(str(tmp_path / "store"), PING_SCHEMA)
+    for row in rows:
+        store.append(ping_record(row))
+    store.close()
+
+    from_csv = load_ping_csv(str(csv_path))
+    from_store = load_results(str(tmp_path / "store"))
+    for data in (from_csv, from_store):
+        summary = per_target_summary(data)
+        by_name = {name: i for i, name in enumerate(data["targets"])}
+        assert summary["mean"][by_name["8.8.8.8"]] == pytest.approx(11.5)
+        assert summary["loss_pct"][by_name["1.1.1.1"]] == 100.0
+    assert np.diff(from_csv["timestamp"]).tolist() == [1.0, 1.0]
+
+    summary = run_analysis_diag(str(csv_path), DummyLogger())
+    assert summary["count"].sum() == 3
+
+
+@pytest.mark.parametrize("tz", ["UTC", "Europe/Rome", "America/New_York"])
+def test_csv_and_store_timestamps_same_epoch(tmp_path, monkeypatch, tz):
+    monkeypatch.setenv("TZ", tz)
+    time.tzset()
+    try:
+        rows = [
+            [stamp, "8.8.8.8", 1.0, "", "", "", "", "", "", "", ""]
+            for stamp in ("2025-01-15 10:00:00", "2025-07-15 10:00:00")
+        ]
+        csv_path = tmp_path / "ping.csv"
+        csv_path.write_text(
+            "\n".join(",".join(map(str, r)) for r in [PING_CSV_HEADER, *rows]) + "\n"
+        )
+        expected = [ping_record(row)["timestamp"] for row in rows]
+        assert load_ping_csv(str(csv_path))["timestamp"].tolist() == expected
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_missing_store_not_created(tmp_path):
+    missing = tmp_path / "typo"
+    assert run_analysis_diag(str(missing), DummyLogger()) is None
+    assert not missing.exists()
+
+
+def test_load_csv_header_only_and_quoted_fields(tmp_path):
+    csv_path = tmp_path / "ping.csv"
+    csv_path.write_text(",".join(PING_CSV_HEADER) + "\n")
+    data = load_ping_csv(str(csv_path))
+    assert data["targets"] == [] and data["ping_ms"].size == 0
+
+    with open(csv_path, "a") as f:
+        f.write('2025-01-01 10:00:00,"8.8.8.8",4.5,,,,,1.0,2.0,,\n')
+    data = load_ping_csv(str(csv_path))
+    assert data["targets"] == ["8.8.8.8"]
+    assert data["ping_ms"].tolist() == [4.5]
+    assert np.isnan(data["avg_ms"]).all()
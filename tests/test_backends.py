@@ -0,0 +1,111 @@
+# tests/test_backends.py - Test coverage per network/backends.py
+import os
+import subprocess
+import sys
+
+import pytest
+
+from network import backends
+from network.backends import LazyAttr, LazyModule, resolve
+
+
+@pytest.fixture
+def fake_backend(tmp_path, monkeypatch):
+    (tmp_path / "fake_heavy_backend.py").write_text(
+        "LOADS = [1]\n\n\ndef probe(x):\n    return x * 2\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield LazyModule("fake", "fake_heavy_backend")
+    sys.modules.pop("fake_heavy_backend", None)
+
+
+def test_lazy_module_imports_on_first_use(fake_backend):
+    assert fake_backend
+    assert "fake_heavy_backend" not in sys.modules
+    assert not fake_backend.loaded
+    assert fake_backend.LOADS == [1]
+    assert fake_backend.loaded
+    assert "fake_heavy_backend" in sys.modules
+
+
+def test_lazy_attr_call_and_resolve(fake_backend):
+    probe = LazyAttr(fake_backend, "probe")
+    assert probe
+    assert "fake_heavy_backend" not in sys.modules
+    assert probe(21) == 42
+    assert resolve(probe) is sys.modules["fake_heavy_backend"].probe
+    assert resolve(probe) is resolve(resolve(probe))
+
+
+def test_package_backend_exposes_root(tmp_path, monkeypatch):
+    pkg = tmp_path / "fake_pkg"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "extra.py").write_text("VALUE = 3\n")
+    (pkg / "entry.py").write_text("import fake_pkg.extra\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    proxy = LazyModule("fake_pkg", "fake_pkg.entry", package=True)
+    try:
+        assert proxy.extra.VALUE == 3
+        assert resolve(proxy) is sys.modules["fake_pkg"]
+    finally:
+        for name in ("fake_pkg", "fake_pkg.entry", "fake_pkg.extra"):
+            sys.modules.pop(name, None)
+
+
+def test_cli_import_leaves_heavy_backends_unloaded():
+    # Interprete nuovo: nel processo di test numpy/dnspython sono già importati
+    code = (
+        "import sys, cli.cli\n"
+        "print(','.join(m for m in ('numpy', 'dns') if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_missing_backend_is_falsy_and_raises():
+    missing = LazyModule("missing", "surely_missing_backend_xyz.all")
+    assert not missing
+    with pytest.raises(ImportError, match="missing"):
+        missing.load()
+    attr = LazyAttr(missing, "sr")
+    assert not attr
+    with pytest.raises(ImportError):
+        attr()
+
+
+def test_availability_does_not_import():
+    before = set(sys.modules)
+    report = backends.availability()
+    assert set(report) == set(backends.BACKENDS)
+    assert all(set(state) == {"installed", "loaded"} for state in report.values())
+    assert not {"scapy.all", "speedtest", "pingparsing"} & (set(sys.modules) - before)
+
+
+def test_log_availability_with_log_manager(tmp_path, fake_backend, monkeypatch):
+    from logs.custom_logging import LogManager
+
+    class DummyConfig:
+        def get(self, section, key, fallback=None):
+            return str(tmp_path / "test.log") if key == "file" else fallback
+
+        def getint(self, section, key, fallback=None):
+            return fallback
+
+        def getboolean(self, section, key, fallback=None):
+            return fallback
+
+    monkeypatch.setitem(backends._registry, "fake", fake_backend)
+    log = LogManager(DummyConfig())
+    backends.log_availability(log)
+    log.close()
+    assert (
+        "backend backend=fake installed=True loaded=False"
+        in (tmp_path / "test.log").read_text()
+    )
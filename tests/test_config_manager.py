@@ -0,0 +1,87 @@
+# tests/test_config_manager.py - Test coverage per config/config_manager.py
+import dataclasses
+import os
+
+import pytest
+
+from config.config_manager import ConfigManager
+
+
+def _write(path, text, bump=0):
+    path.write_text(text)
+    if bump:
+        # mtime diverso anche su filesystem a bassa risoluzione
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 10**9))
+
+
+def test_settings_typed_snapshot(tmp_path):
+    ini = tmp_path / "config.ini"
+    _write(
+        ini,
+        "[network]\ntimeout = 4\nstats_interval = 0.5\n"
+        "[dns]\nrecord_types = A, MX ,\nnameservers =\n"
+        "[adaptive]\nstages = dns\n",
+    )
+    settings = ConfigManager(str(ini)).settings
+    assert settings.network.timeout == 4
+    assert settings.network.stats_interval == 0.5
+    # Chiavi assenti: default tipizzati
+    assert settings.network.max_hops == 20
+    assert settings.dns.record_types == ("A", "MX")
+    assert settings.dns.nameservers == ()
+    assert settings.adaptive.stages == ("dns",)
+    assert settings.adaptive.thresholds()["window"] == 20
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        settings.network.timeout = 1
+
+
+def test_repo_config_is_valid():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    settings = ConfigManager(os.path.join(root, "config.ini")).settings
+    assert settings.dns.record_types == ("A", "AAAA", "MX", "TXT")
+    assert settings.diagnostics.icmp_transport == "off"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[network]\ntimeout = due\n",
+        "[network]\ntimeout = 0\n",
+        "[security]\nprobe_rate = -1\n",
+        "[diagnostics]\nicmp_transport = udp\n",
+    ],
+)
+def test_settings_validation(tmp_path, text):
+    ini = tmp_path / "config.ini"
+    _write(ini, text)
+    with pytest.raises(ValueError):
+        ConfigManager(str(ini))
+
+
+def test_reload_if_changed(tmp_path):
+    ini = tmp_path / "config.ini"
+    _write(ini, "[network]\ntimeout = 2\n")
+    config = ConfigManager(str(ini))
+    before = config.settings
+    assert not config.reload_if_changed()
+    assert config.settings is before
+
+    _write(ini, "[network]\ntimeout = 5\n", bump=1)
+    assert config.reload_if_changed()
+    assert config.settings.network.timeout == 5
+    assert config.getint("network", "timeout") == 5
+    # Lo snapshot letto in precedenza non cambia
+    assert before.network.timeout == 2
+
+
+def test_reload_invalid_keeps_previous(tmp_path):
+    ini = tmp_path / "config.ini"
+    _write(ini, "[network]\ntimeout = 2\n")
+    config = ConfigManager(str(ini))
+    _write(ini, "[network]\ntimeout = -3\n", bump=1)
+    with pytest.raises(ValueError):
+        config.reload_if_changed()
+    assert config.settings.network.timeout == 2
+    # Stesso file non valido: nessun nuovo tentativo finché non cambia
+    assert not config.reload_if_changed()
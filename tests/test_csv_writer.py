@@ -0,0 +1,112 @@
+# tests/test_csv_writer.py - Test coverage per csv_utils/csv_writer.py
+import csv
+
+import pytest
+
+from csv_utils.csv_writer import CsvSink, get_sink, write_csv
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return 1700000000 + self.now
+
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_sink_buffers_until_row_threshold(tmp_path):
+    sink = CsvSink("out.csv", ["a", "b"], folder=str(tmp_path), flush_rows=3)
+    sink.write_rows([[1, 2], [3, 4]])
+    assert _read(tmp_path / "out.csv") == [["a", "b"]]
+    sink.write_row([5, "x\ny"])
+    assert _read(tmp_path / "out.csv") == [
+        ["a", "b"],
+        ["1", "2"],
+        ["3", "4"],
+        ["5", "x\ny"],
+    ]
+    sink.close()
+
+
+def test_csv_sink_time_flush_and_header_once(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("csv_utils.csv_writer.time", clock)
+    with CsvSink(
+        "out.csv", ["a"], folder=str(tmp_path), flush_interval=5, sanitize=True
+    ) as sink:
+        sink.write_row(["r\n1"])
+        assert len(_read(tmp_path / "out.csv")) == 1
+        clock.now += 6
+        sink.write_row(["r2"])
+        assert _read(tmp_path / "out.csv") == [["a"], ["r 1"], ["r2"]]
+    # Riapertura di un file esistente: niente header duplicato
+    with CsvSink("out.csv", ["a"], folder=str(tmp_path)) as sink:
+        sink.write_row(["r3"])
+    assert _read(tmp_path / "out.csv") == [["a"], ["r 1"], ["r2"], ["r3"]]
+
+
+def test_csv_sink_rollover(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("csv_utils.csv_writer.time", clock)
+    sink = CsvSink("big.csv", ["value"], folder=str(tmp_path), max_bytes=50)
+    for i in range(20):
+        sink.write_row([f"row-{i:04d}"])
+        sink.flush()
+    sink.close()
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files[0] == "big.csv" and len(files) > 2
+    rows = []
+    for name in files:
+        content = _read(tmp_path / name)
+        assert content[0] == ["value"]
+        rows.extend(content[1:])
+    assert sorted(rows) == [[f"row-{i:04d}"] for i in range(20)]
+
+
+def test_get_sink_shared_and_write_csv(tmp_path):
+    sink = get_sink("shared.csv", ["a"], folder=str(tmp_path))
+    assert get_sink("shared.csv", ["a"], folder=str(tmp_path)) is sink
+    write_csv("shared.csv", ["a"], [["1"]], folder=str(tmp_path))
+    write_csv("shared.csv", ["a"], [["2"]], folder=str(tmp_path))
+    assert _read(tmp_path / "shared.csv") == [["a"], ["1"], ["2"]]
+
+
+def test_get_sink_mixed_ping_headers_keep_columns(tmp_path, monkeypatch):
+    from network.ping import PING_CSV_HEADER, ping_csv_header
+
+    clock = FakeClock()
+    monkeypatch.setattr("csv_utils.csv_writer.time", clock)
+    wide = ping_csv_header(6)
+    folder = str(tmp_path)
+    write_csv("diag.csv", wide, [["t1", "a"] + [""] * (len(wide) - 2)], folder=folder)
+    write_csv(
+        "diag.csv",
+        PING_CSV_HEADER,
+        [["t2", "b"] + [""] * (len(PING_CSV_HEADER) - 2)],
+        folder=folder,
+    )
+    assert get_sink("diag.csv", wide, folder=folder) is not get_sink(
+        "diag.csv", PING_CSV_HEADER, folder=folder
+    )
+    # Ogni file ha un solo header e righe della sua larghezza
+    by_header = {}
+    for path in tmp_path.iterdir():
+        content = _read(path)
+        assert all(len(row) == len(content[0]) for row in content)
+        by_header[tuple(content[0])] = [row[1] for row in content[1:]]
+    assert by_header == {tuple(wide): ["a"], tuple(PING_CSV_HEADER): ["b"]}
+    assert _read(tmp_path / "diag.csv")[0] == wide
+
+
+def test_get_sink_rejects_conflicting_options(tmp_path):
+    get_sink("opts.csv", ["a"], folder=str(tmp_path), max_bytes=100)
+    with pytest.raises(ValueError):
+        get_sink("opts.csv", ["a"], folder=str(tmp_path), max_bytes=200)
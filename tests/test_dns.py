@@ -1,49 +1,88 @@
-# tests/test_dns.py - Test coverage per network/dns.py
+# tests/test_dns.py - Test coverage per network/dns_utils.py
 
-
-from network.dns_utils import run_dns_diag
+import network.dns_async
+from cli.render import render_dns
+from network.dns_async import make_resolver
+from network.dns_utils import DnsResult, run_dns_diag
 
 
 class DummyLogger:
     def info(self, msg):
         pass
 
-    def warning(self, msg):
+    def warning(self, msg, exc_info=False):
         pass
 
     def error(self, msg, exc_info=False):
         pass
 
+    def event(self, name, level="info", **fields):
+        pass
+
 
-def test_run_dns_diag_valid(monkeypatch):
-    # Mock socket and dnspython
-    monkeypatch.setattr("network.dns.socket.gethostbyname", lambda addr: "8.8.8.8")
+def test_run_dns_diag_valid(dns_stub, capsys, monkeypatch):
+    server = dns_stub(
+        {
+            ("google.com", "A"): ["8.8.8.8"],
+            ("8.8.8.8.in-addr.arpa", "PTR"): ["testhost."],
+        }
+    )
     monkeypatch.setattr(
-        "network.dns.socket.gethostbyaddr", lambda ip: ("testhost", [], [ip])
+        "network.dns_async.make_resolver",
+        lambda timeout, ns, port: make_resolver(timeout, ["127.0.0.1"], server.port),
     )
+    result = run_dns_diag("google.com", DummyLogger())
+    assert result.ip == "8.8.8.8"
+    assert result.reverse.rstrip(".") == "testhost"
+    assert result.records["A"] == ["8.8.8.8"]
+    render_dns(result)
+    out = capsys.readouterr().out
+    assert "google.com -> 8.8.8.8" in out
+    assert "Reverse: 8.8.8.8 -> testhost" in out
+    assert "A: ['8.8.8.8']" in out
 
-    class DummyAnswer:
-        def __str__(self):
-            return "answer"
 
-    class DummyResolver:
-        timeout = 3
+def test_run_dns_diag_socket_fallback(monkeypatch, capsys):
+    # Senza dnspython: solo risoluzione e reverse via socket
+    monkeypatch.setattr(network.dns_async, "dns", None)
+    monkeypatch.setattr(
+        "network.dns_utils.socket.gethostbyname", lambda addr: "8.8.8.8"
+    )
+    monkeypatch.setattr(
+        "network.dns_utils.socket.gethostbyaddr", lambda ip: ("testhost", [], [ip])
+    )
+    result = run_dns_diag("google.com", DummyLogger())
+    assert result == DnsResult(
+        "google.com",
+        "8.8.8.8",
+        "testhost",
+        {},
+        {"records": "modulo dnspython non disponibile"},
+    )
+    render_dns(result)
+    out = capsys.readouterr().out
+    assert "Reverse: 8.8.8.8 -> testhost" in out
+    assert "Record DNS non disponibili" in out
 
-        def resolve(self, address, rtype):
-            return [DummyAnswer()]
 
+def test_socket_fallback_reverse_error_key(monkeypatch):
+    # Stessa chiave "reverse" del motore asincrono
+    monkeypatch.setattr(network.dns_async, "dns", None)
     monkeypatch.setattr(
-        "network.dns.dns",
-        type(
-            "Dummy", (), {"resolver": type("Dummy2", (), {"Resolver": DummyResolver})}
-        ),
+        "network.dns_utils.socket.gethostbyname", lambda addr: "8.8.8.8"
     )
-    run_dns_diag("google.com", DummyLogger())
+
+    def no_ptr(ip):
+        raise OSError("host sconosciuto")
+
+    monkeypatch.setattr("network.dns_utils.socket.gethostbyaddr", no_ptr)
+    result = run_dns_diag("google.com", DummyLogger())
+    assert result.errors["reverse"] == "host sconosciuto"
 
 
 def test_run_dns_diag_invalid(monkeypatch):
     monkeypatch.setattr(
-        "network.dns.socket.gethostbyname",
+        "network.dns_utils.socket.gethostbyname",
         lambda addr: (_ for _ in ()).throw(Exception("fail")),
     )
-    run_dns_diag("invalid_domain", DummyLogger())
+    assert run_dns_diag("invalid_domain", DummyLogger()) is None
@@ -0,0 +1,108 @@
+# tests/test_dns_async.py - Test coverage per network/dns_async.py (stub DNS locale)
+import asyncio
+import socket
+import time
+
+import pytest
+
+from network.dns_async import compare_resolvers, diagnose_many, run_dns_bulk_diag
+
+pytest.importorskip("dns.asyncresolver")
+
+
+class DummyLogger:
+    def info(self, msg):
+        pass
+
+    def warning(self, msg, exc_info=False):
+        pass
+
+    def error(self, msg, exc_info=False):
+        pass
+
+    def event(self, name, level="info", **fields):
+        pass
+
+
+ZONE = {
+    ("example.test", "A"): ["192.0.2.10"],
+    ("example.test", "AAAA"): ["2001:db8::10"],
+    ("example.test", "MX"): ["10 mail.example.test."],
+    ("example.test", "TXT"): ['"v=spf1 -all"'],
+    ("10.2.0.192.in-addr.arpa", "PTR"): ["host.example.test."],
+    ("other.test", "A"): ["192.0.2.20"],
+}
+
+
+def test_diagnose_many_concurrent_queries(dns_stub):
+    server = dns_stub(ZONE, delay=0.2)
+    start = time.monotonic()
+    (result,) = asyncio.run(
+        diagnose_many(["example.test"], nameservers=["127.0.0.1"], port=server.port)
+    )
+    elapsed = time.monotonic() - start
+    assert result["ip"] == "192.0.2.10"
+    assert result["reverse"] == "host.example.test"
+    assert result["records"] == {
+        "A": ["192.0.2.10"],
+        "AAAA": ["2001:db8::10"],
+        "MX": ["10 mail.example.test."],
+        "TXT": ['"v=spf1 -all"'],
+    }
+    # 4 record + reverse in sequenza costerebbero 1 s: in parallelo ~2 round trip
+    assert elapsed < 0.8
+
+
+def test_run_dns_bulk_diag_bounded(dns_stub):
+    server = dns_stub(ZONE)
+    results = run_dns_bulk_diag(
+        ["example.test", "other.test", "missing.test", "invalid_domain"],
+        DummyLogger(),
+        record_types=["A"],
+        concurrency=2,
+        nameservers=["127.0.0.1"],
+        port=server.port,
+    )
+    assert [r["address"] for r in results] == [
+        "example.test",
+        "other.test",
+        "missing.test",
+    ]
+    assert results[1]["ip"] == "192.0.2.20"
+    assert results[2]["ip"] is None
+    assert results[2]["errors"]["A"] == "il nome DNS non esiste"
+
+
+def test_compare_resolvers_latency_divergence_timeouts(dns_stub):
+    fast = dns_stub(ZONE, host="127.0.0.2")
+    dns_stub(ZONE, host="127.0.0.3", port=fast.port, delay=0.1)
+    dns_stub(
+        {("example.test", "A"): ["198.51.100.1"]}, host="127.0.0.4", port=fast.port
+    )
+    # Server che non risponde mai: ogni query va in timeout
+    dead = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    dead.bind(("127.0.0.5", fast.port))
+    try:
+        start = time.monotonic()
+        report = asyncio.run(
+            compare_resolvers(
+                "example.test",
+                ["127.0.0.5", "127.0.0.3", "127.0.0.2", "127.0.0.4"],
+                record_types=["A"],
+                dns_timeout=0.5,
+                rounds=2,
+                port=fast.port,
+            )
+        )
+        elapsed = time.monotonic() - start
+    finally:
+        dead.close()
+    by_server = {entry["server"]: entry for entry in report}
+    assert [entry["server"] for entry in report][-1] == "127.0.0.5"
+    assert by_server["127.0.0.5"]["timeout_rate"] == 1.0
+    assert by_server["127.0.0.2"]["p50_ms"] < by_server["127.0.0.3"]["p50_ms"]
+    assert by_server["127.0.0.3"]["answered"] == 2
+    assert by_server["127.0.0.4"]["divergent"] == {"A": ["198.51.100.1"]}
+    assert by_server["127.0.0.2"]["divergent"] == {}
+    # Un server morto costa un timeout per giro, non uno per server e tipo
+    assert elapsed < 2 * 0.5 + 0.5
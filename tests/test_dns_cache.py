@@ -0,0 +1,90 @@
+# tests/test_dns_cache.py - Test coverage per network/dns_cache.py
+import asyncio
+
+import pytest
+
+from network.dns_async import diagnose_many
+from network.dns_cache import DnsCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_dns_cache_ttl_lru_and_stats(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("network.dns_cache.time", clock)
+    cache = DnsCache(maxsize=2)
+    cache.put("Example.test.", "a", (["192.0.2.1"], None), ttl=30)
+    cache.put("other.test", "A", ([], "il nome DNS non esiste"), ttl=5)
+    assert cache.get("example.test", "A") == (["192.0.2.1"], None)
+    clock.now += 10
+    assert cache.get("other.test", "A") is None  # scaduto
+    cache.put("b.test", "A", (["192.0.2.2"], None), ttl=30)
+    cache.put("c.test", "A", (["192.0.2.3"], None), ttl=30)
+    assert cache.get("example.test", "A") is None  # evicted (LRU)
+    cache.put("zero.test", "A", (["192.0.2.4"], None), ttl=0)
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 2, "hit_rate": 0.333}
+
+
+def test_diagnose_many_negative_caching(dns_stub):
+    pytest.importorskip("dns.asyncresolver")
+    server = dns_stub(
+        {("example.test", "A"): ["192.0.2.10"]},
+        ttl=300,
+        soa="ns.test. admin.test. 1 3600 600 86400 42",
+    )
+    cache = DnsCache()
+    for _ in range(3):
+        results = asyncio.run(
+            diagnose_many(
+                ["example.test", "missing.test"],
+                record_types=["A", "MX"],
+                nameservers=["127.0.0.1"],
+                port=server.port,
+                cache=cache,
+            )
+        )
+    assert results[0]["records"] == {"A": ["192.0.2.10"]}
+    assert results[1]["errors"]["A"] == "il nome DNS non esiste"
+    # Ogni (nome, tipo) interrogato una sola volta: il resto servito dalla cache
+    assert sorted(server.queries) == sorted(
+        [
+            ("example.test", "A"),
+            ("example.test", "MX"),
+            ("missing.test", "A"),
+            ("missing.test", "MX"),
+            ("10.2.0.192.in-addr.arpa", "PTR"),
+        ]
+    )
+    expiry = {key[:2]: entry for key, entry in cache._entries.items()}
+    # NXDOMAIN memorizzato con il minimum del SOA (42 s), non con il TTL positivo
+    negative = expiry[("missing.test", "A")][0] - expiry[("example.test", "A")][0]
+    assert negative == pytest.approx(42 - 300, abs=1)
+    assert cache.stats()["hits"] == 10
+
+
+def test_cache_scoped_per_resolver(dns_stub):
+    pytest.importorskip("dns.asyncresolver")
+    first = dns_stub({("example.test", "A"): ["192.0.2.1"]})
+    second = dns_stub({("example.test", "A"): ["198.51.100.1"]})
+    cache = DnsCache()
+    answers = [
+        asyncio.run(
+            diagnose_many(
+                ["example.test"],
+                record_types=["A"],
+                nameservers=["127.0.0.1"],
+                port=server.port,
+                cache=cache,
+            )
+        )[0]["records"]["A"]
+        for server in (first, second, first)
+    ]
+    # Stesso nome, resolver diversi: nessuna risposta presa dalla cache dell'altro
+    assert answers == [["192.0.2.1"], ["198.51.100.1"], ["192.0.2.1"]]
+    assert first.queries.count(("example.test", "A")) == 1
@@ -0,0 +1,120 @@
+# tests/test_logging.py - Test coverage per logs/custom_logging.py
+import json
+import logging
+import queue
+import threading
+
+from logs.custom_logging import DroppingQueueHandler, LogManager
+
+
+class DummyConfig:
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, section, key, fallback=None):
+        return self.values.get(key, fallback)
+
+    def getint(self, section, key, fallback=None):
+        return int(self.values.get(key, fallback))
+
+    def getboolean(self, section, key, fallback=None):
+        return self.values.get(key, fallback)
+
+
+def _config(tmp_path, **values):
+    return DummyConfig({"file": str(tmp_path / "logs" / "test.log"), **values})
+
+
+def test_log_manager_sync_writes_file(tmp_path):
+    log = LogManager(_config(tmp_path))
+    log.info("messaggio sincrono")
+    log.close()
+    text = (tmp_path / "logs" / "test.log").read_text()
+    assert "[INFO] messaggio sincrono" in text
+    assert log.dropped == 0
+
+
+def test_log_manager_async_flushes_on_close(tmp_path):
+    log = LogManager(_config(tmp_path, **{"async": True}))
+    for i in range(200):
+        log.info(f"record {i}")
+    log.error("errore finale")
+    log.close()
+    lines = (tmp_path / "logs" / "test.log").read_text().splitlines()
+    assert len(lines) == 201
+    assert lines[0].endswith("record 0")
+    assert lines[-1].endswith("[ERROR] errore finale")
+    assert not any(
+        isinstance(h, DroppingQueueHandler)
+        for h in logging.getLogger("network_diag_tool").handlers
+    )
+
+
+def test_log_manager_async_io_off_caller_thread(tmp_path):
+    log = LogManager(_config(tmp_path, **{"async": True}))
+    threads = []
+
+    class Recorder(logging.Handler):
+        def emit(self, record):
+            threads.append(threading.get_ident())
+
+    log._listener.handlers += (Recorder(),)
+    log.info("dal thread di probe")
+    log.close()
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_dropping_queue_handler_counts_drops():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    logger = logging.getLogger("test_dropping_queue_handler")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning("msg %d", i)
+    finally:
+        logger.removeHandler(handler)
+    assert handler.dropped == 3
+    record = handler.queue.get_nowait()
+    # Formattazione rinviata al listener: msg/args intatti
+    assert (record.msg, record.args) == ("msg %d", (0,))
+
+
+def test_event_is_lazy_when_level_filtered(tmp_path):
+    log = LogManager(_config(tmp_path, level="WARNING"))
+    formatted = []
+
+    class Probe:
+        def __str__(self):
+            formatted.append(True)
+            return "probe"
+
+    log.event("dns.record", rtype="A", records=Probe())
+    log.event("dns.record_error", "warning", rtype="MX", error="NXDOMAIN")
+    log.close()
+    text = (tmp_path / "logs" / "test.log").read_text()
+    assert not formatted
+    assert "[WARNING] dns.record_error rtype=MX error=NXDOMAIN" in text
+    assert "dns.record " not in text
+
+
+def test_event_json_lines(tmp_path):
+    log = LogManager(_config(tmp_path, format="json", **{"async": True}))
+    log.event("traceroute.hops", address="10.0.0.4", hops=[("10.0.0.1", 1.5)])
+    log.info("messaggio libero")
+    log.close()
+    lines = (tmp_path / "logs" / "test.log").read_text().splitlines()
+    first, second = (json.loads(line) for line in lines)
+    assert first["event"] == "traceroute.hops"
+    assert first["level"] == "INFO"
+    assert first["hops"] == [["10.0.0.1", 1.5]]
+    assert second["msg"] == "messaggio libero"
+
+
+def test_log_manager_async_default_and_override(tmp_path):
+    log = LogManager(_config(tmp_path), async_default=True)
+    assert log._listener is not None
+    log.close()
+    log = LogManager(_config(tmp_path, **{"async": False}), async_default=True)
+    assert log._listener is None
+    log.close()
@@ -0,0 +1,73 @@
+# tests/test_mtr.py - Test coverage per network/mtr.py
+import statistics
+
+import pytest
+
+from network.mtr import HopStats, _paris_ident, run_mtr_diag
+
+
+class DummyLogger:
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg, exc_info=False):
+        pass
+
+    def event(self, name, level="info", **fields):
+        pass
+
+
+def test_hop_stats_welford():
+    samples = [10.0, 12.5, None, 11.0, 30.0, None, 9.5]
+    hop = HopStats()
+    for rtt in samples:
+        hop.add(rtt, "192.0.2.1")
+    received = [s for s in samples if s is not None]
+    assert hop.sent == 7 and hop.received == 5
+    assert hop.loss == pytest.approx(100 * 2 / 7)
+    assert hop.mean == pytest.approx(statistics.mean(received))
+    assert hop.stdev == pytest.approx(statistics.stdev(received))
+    assert (hop.min, hop.max) == (9.5, 30.0)
+    assert hop.jitter > 0
+
+
+def test_paris_ident_keeps_checksum_constant():
+    def ones_complement_sum(a, b):
+        total = a + b
+        return (total & 0xFFFF) + (total >> 16)
+
+    sums = {ones_complement_sum(_paris_ident(seq), seq) for seq in range(0, 70000, 7)}
+    assert len(sums) == 1
+
+
+def test_run_mtr_diag_streams_rows(monkeypatch, tmp_path):
+    route = ["192.0.2.1", None, "10.0.0.4"]
+
+    def dummy_send_cycle(address, max_ttl, timeout, seq_base):
+        results = {}
+        for ttl in range(1, max_ttl + 1):
+            hop = route[min(ttl, len(route)) - 1]
+            rtt = None if hop is None else ttl * 1.5
+            results[ttl] = (hop, rtt, hop == "10.0.0.4")
+        return results
+
+    for name in ("sr", "IP", "ICMP"):
+        monkeypatch.setattr(f"network.mtr.{name}", object())
+    monkeypatch.setattr("network.mtr._send_cycle", dummy_send_cycle)
+    monkeypatch.chdir(tmp_path)
+
+    stats = run_mtr_diag(
+        "10.0.0.4", DummyLogger(), "linux", interval=0, cycles=3, csvfile="mtr.csv"
+    )
+    assert sorted(stats) == [1, 2, 3]
+    assert stats[2].loss == 100.0
+    assert stats[3].received == 3 and stats[3].mean == pytest.approx(4.5)
+    lines = (tmp_path / "csv_utils" / "mtr.csv").read_text().splitlines()
+    assert len(lines) == 1 + 3 * 3
+
+
+def test_run_mtr_diag_invalid():
+    assert run_mtr_diag("invalid_address", DummyLogger(), "linux", cycles=1) == {}
@@ -0,0 +1,118 @@
+# tests/test_netdev.py - Test coverage per network/netdev.py
+import pytest
+
+from cli.render import render_stats
+from network import netdev
+from network.netdev import ProcNetDevReader
+from network.stats import InterfaceSampler, counter_reader, run_stats_diag
+
+HEADER = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast|"
+    "bytes    packets errs drop fifo colls carrier compressed\n"
+)
+
+
+def _line(name, rx, tx):
+    fields = " ".join(str(v) for v in (*rx, *tx))
+    return f"{name:>6}: {fields}\n"
+
+
+def _write(path, interfaces):
+    path.write_text(HEADER + "".join(_line(*iface) for iface in interfaces))
+
+
+class DummyLogger:
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg, exc_info=False):
+        pass
+
+    def event(self, name, level="info", **fields):
+        pass
+
+
+@pytest.fixture
+def proc_net_dev(tmp_path, monkeypatch):
+    path = tmp_path / "dev"
+    _write(
+        path,
+        [
+            ("lo", [500, 5, 0, 0, 0, 0, 0, 0], [500, 5, 0, 0, 0, 0, 0, 0]),
+            ("eth0", [2000, 20, 1, 3, 0, 0, 0, 7], [1000, 10, 2, 4, 0, 0, 0, 0]),
+        ],
+    )
+    monkeypatch.setattr("network.netdev.PROC_NET_DEV", str(path))
+    return path
+
+
+def test_reader_maps_fields_like_psutil(proc_net_dev):
+    with ProcNetDevReader() as reader:
+        counters = reader.read()
+        assert list(counters) == ["lo", "eth0"]
+        # bytes_sent, bytes_recv, packets_sent, packets_recv, errin, errout, dropin, dropout
+        assert list(counters["eth0"]) == [1000, 2000, 10, 20, 1, 2, 3, 4]
+
+
+def test_reader_rereads_in_place(proc_net_dev):
+    reader = ProcNetDevReader()
+    first = reader.read()
+    eth0 = first["eth0"]
+    _write(
+        proc_net_dev,
+        [
+            ("lo", [600, 6, 0, 0, 0, 0, 0, 0], [600, 6, 0, 0, 0, 0, 0, 0]),
+            ("eth0", [4000, 40, 1, 3, 0, 0, 0, 0], [3000, 30, 2, 4, 0, 0, 0, 0]),
+        ],
+    )
+    second = reader.read()
+    # Stesse interfacce: stesso dict e stesse viste, valori aggiornati
+    assert second is first and second["eth0"] is eth0
+    assert eth0[0] == 3000
+
+    _write(proc_net_dev, [("veth9", [1] * 8, [2] * 8)])
+    assert list(reader.read()) == ["veth9"]
+    reader.close()
+
+
+def test_reader_grows_small_buffer(proc_net_dev):
+    interfaces = [(f"veth{i}", [i] * 8, [i * 2] * 8) for i in range(200)]
+    _write(proc_net_dev, interfaces)
+    with ProcNetDevReader(bufsize=64) as reader:
+        counters = reader.read()
+    assert len(counters) == 200
+    assert counters["veth199"][0] == 398
+
+
+def test_counter_reader_prefers_proc(proc_net_dev, monkeypatch):
+    reader = counter_reader()
+    assert isinstance(reader, ProcNetDevReader)
+    reader.close()
+    monkeypatch.setattr("network.netdev.PROC_NET_DEV", "/nonexistent/net/dev")
+    monkeypatch.setattr("network.stats.psutil", None)
+    assert not netdev.available()
+    assert counter_reader() is None
+
+
+def test_sampler_and_stats_with_proc_reader(proc_net_dev, capsys):
+    sampler = InterfaceSampler(
+        ProcNetDevReader(), history=4, clock=iter([0, 1]).__next__
+    )
+    sampler.sample()
+    _write(
+        proc_net_dev,
+        [
+            ("lo", [500, 5, 0, 0, 0, 0, 0, 0], [500, 5, 0, 0, 0, 0, 0, 0]),
+            ("eth0", [2500, 30, 1, 3, 0, 0, 0, 7], [1000, 10, 2, 4, 0, 0, 0, 0]),
+        ],
+    )
+    sampler.sample()
+    sampler.close()
+    assert sampler.rates()["eth0"]["bps_recv"] == 4000
+
+    render_stats(run_stats_diag(DummyLogger()))
+    assert "eth0: Bytes sent=1000, recv=2500" in capsys.readouterr().out
@@ -0,0 +1,161 @@
+# tests/test_orchestrator.py - Test coverage per network/orchestrator.py
+import time
+
+import pytest
+
+from cli.render import render_report
+from network import orchestrator
+from network.orchestrator import StageSkipped, default_stages, diagnose, run_full_diag
+
+
+class DummyLogger:
+    def __init__(self):
+        self.events = []
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg, exc_info=False):
+        pass
+
+    def event(self, name, level="info", **fields):
+        self.events.append((name, fields))
+
+
+def _sleeping(seconds, value):
+    def stage(address):
+        time.sleep(seconds)
+        return value
+
+    return stage
+
+
+def _skipped(address):
+    raise StageSkipped("backend assente")
+
+
+def _failing(address):
+    raise RuntimeError("boom")
+
+
+def test_diagnose_runs_stages_concurrently():
+    stages = {f"s{i}": _sleeping(0.2, i) for i in range(5)}
+    start = time.monotonic()
+    report = diagnose("10.0.0.1", stages, DummyLogger())
+    elapsed = time.monotonic() - start
+    # Durata ~ stadio più lento, non la somma (1 s)
+    assert elapsed < 0.6
+    assert [r.value for r in report.stages.values()] == [0, 1, 2, 3, 4]
+    assert all(r.ok and r.elapsed >= 0.19 for r in report.stages.values())
+
+
+def test_diagnose_statuses_and_per_stage_timeout():
+    logger = DummyLogger()
+    stages = {
+        "ping": _sleeping(0, 12.5),
+        "slow": _sleeping(1.0, "tardi"),
+        "skip": _skipped,
+        "fail": _failing,
+    }
+    start = time.monotonic()
+    report = diagnose(
+        "10.0.0.1", stages, logger, timeouts={"slow": 0.1}, default_timeout=5
+    )
+    assert time.monotonic() - start < 0.5
+    # Ordine del report = ordine degli stadi, non di completamento
+    assert list(report.stages) == ["ping", "slow", "skip", "fail"]
+    assert {n: r.status for n, r in report.stages.items()} == {
+        "ping": "ok",
+        "slow": "timeout",
+        "skip": "skipped",
+        "fail": "error",
+    }
+    assert report.value("ping") == 12.5
+    assert report.value("slow", "n/d") == "n/d"
+    assert report.stages["fail"].error == "boom"
+    stage_events = [f for name, f in logger.events if name == "diag.stage"]
+    assert len(stage_events) == 4
+    report_event = [f for name, f in logger.events if name == "diag.report"][0]
+    assert report_event["failed"] == "slow,fail"
+
+
+def test_default_stages_rejects_unknown():
+    with pytest.raises(ValueError):
+        default_stages(DummyLogger(), names=("ping", "whois"))
+
+
+def test_traceroute_stage_skipped_without_scapy(monkeypatch):
+    monkeypatch.setattr("network.traceroute.traceroute", None)
+    stages = default_stages(DummyLogger(), names=("traceroute",))
+    report = diagnose("10.0.0.1", stages, DummyLogger())
+    assert report.stages["traceroute"].status == "skipped"
+
+
+def test_ping_stages_skipped_without_backends(monkeypatch):
+    for name in ("ping3_ping", "pingparsing", "sr"):
+        monkeypatch.setattr(f"network.ping.{name}", None)
+    stages = default_stages(DummyLogger(), names=("ping", "burst", "batch"))
+    report = diagnose("10.0.0.1", stages, DummyLogger())
+    assert {n: r.status for n, r in report.stages.items()} == {
+        "ping": "skipped",
+        "burst": "skipped",
+        "batch": "skipped",
+    }
+    # Nessun valore vuoto spacciato per misura: la riga ping resta senza dati
+    assert report.ping_row(2)[2:] == [""] * 7
+
+
+def test_run_full_diag_writes_ping_row(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    stages = {
+        "ping": lambda addr: 10.0,
+        "burst": lambda addr: {
+            "min_rtt": 9.0,
+            "avg_rtt": 10.0,
+            "max_rtt": 11.0,
+            "packet_loss_rate": 0.0,
+        },
+        "batch": lambda addr: [10.1, ""],
+        "stats": lambda addr: {
+            "eth0": {
+                "bps_sent": 8e6,
+                "bps_recv": 1e6,
+                "pps_sent": 10.0,
+                "pps_recv": 5.0,
+                "errors_per_s": 0.0,
+                "drops_per_s": 0.0,
+                "interval_s": 1.0,
+            }
+        },
+    }
+    report = run_full_diag(
+        "10.0.0.1",
+        DummyLogger(),
+        "linux",
+        stages=stages,
+        csvfile="diag.csv",
+        scapy_count=2,
+    )
+    assert report.ping_row(2)[2:] == [10.0, 9.0, 10.0, 11.0, 0.0, 10.1, ""]
+    lines = (tmp_path / "diag.csv").read_text().splitlines()
+    assert lines[0].startswith("timestamp,address,ping3_ms")
+    assert lines[1].endswith("10.0.0.1,10.0,9.0,10.0,11.0,0.0,10.1,")
+    assert capsys.readouterr().out == ""
+    render_report(report)
+    out = capsys.readouterr().out
+    assert "Diagnosi avanzata 10.0.0.1" in out
+    assert "eth0: out=8.000 Mbps" in out
+
+
+def test_run_full_diag_invalid_address():
+    assert run_full_diag("999.1.1.1", DummyLogger(), "linux", stages={}) is None
+
+
+def test_stats_stage_rates(monkeypatch):
+    counters = iter([{"lo": [0] * 8}, {"lo": [100, 200, 1, 2, 0, 0, 0, 0]}])
+    monkeypatch.setattr(orchestrator, "counter_reader", lambda: lambda: next(counters))
+    rates = orchestrator._stats_rates(window=0.05)
+    assert rates["lo"]["bps_sent"] > 0
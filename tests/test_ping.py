@@ -1,7 +1,13 @@
 # tests/test_ping.py - Test coverage per network/ping.py (ping3, pingparsing, scapy)
 import pytest
 
-from network.ping import run_ping_diag
+from network.ping import (
+    PING_CSV_HEADER,
+    _scapy_batch_probe,
+    load_targets,
+    run_ping_diag,
+    run_ping_sweep,
+)
 
 
 class DummyLogger:
@@ -14,6 +20,48 @@ class DummyLogger:
     def error(self, msg, exc_info=False):
         pass
 
+    def event(self, name, level="info", **fields):
+        pass
+
+
+class DummyICMP:
+    def __init__(self, id=0, seq=0):
+        self.id = id
+        self.seq = seq
+
+
+class DummyPacket:
+    def __init__(self, icmp, time=1):
+        self.icmp = icmp
+        self.time = time
+        self.sent_time = time
+
+    def __getitem__(self, layer):
+        return self.icmp
+
+
+class DummyIP:
+    def __init__(self, dst):
+        self.dst = dst
+
+    def __truediv__(self, icmp):
+        return DummyPacket(icmp)
+
+
+def _mock_scapy(monkeypatch, lost=()):
+    # sr() simulato: risposte in ordine sparso, i seq in lost non rispondono
+    def dummy_sr(packets, timeout, verbose):
+        answered = [
+            (pkt, DummyPacket(DummyICMP(pkt.icmp.id, pkt.icmp.seq), time=1.002))
+            for pkt in reversed(packets)
+            if pkt.icmp.seq not in lost
+        ]
+        return answered, []
+
+    monkeypatch.setattr("network.ping.sr", dummy_sr)
+    monkeypatch.setattr("network.ping.IP", DummyIP)
+    monkeypatch.setattr("network.ping.ICMP", DummyICMP)
+
 
 @pytest.mark.parametrize(
     "address,expected", [("8.8.8.8", True), ("invalid_address", False)]
@@ -50,14 +98,7 @@ def test_run_ping_diag_basic(monkeypatch, address, expected):
         ),
     )
     # Mock scapy
-    monkeypatch.setattr(
-        "network.ping.sr1",
-        lambda pkt, timeout, verbose: type("Dummy", (), {"time": 2, "sent_time": 1})(),
-    )
-    monkeypatch.setattr(
-        "network.ping.IP", lambda dst: type("Dummy", (), {"sent_time": 1})()
-    )
-    monkeypatch.setattr("network.ping.ICMP", lambda: None)
+    _mock_scapy(monkeypatch)
 
     logger = DummyLogger()
     os_type = "linux"
@@ -93,15 +134,59 @@ def test_run_ping_diag_advanced(monkeypatch):
             {"PingParsing": DummyPingParsing, "PingTransmitter": DummyTransmitter},
         ),
     )
-    monkeypatch.setattr(
-        "network.ping.sr1",
-        lambda pkt, timeout, verbose: type("Dummy", (), {"time": 2, "sent_time": 1})(),
+    _mock_scapy(monkeypatch)
+
+    logger = DummyLogger()
+    os_type = "linux"
+    result = run_ping_diag(
+        "8.8.8.8", logger, os_type, advanced=True, csvfile="test_ping.csv"
     )
+    assert result.address == "8.8.8.8"
+    assert (result.rtt_ms, result.avg_rtt, result.loss_pct) == (52, 2, 0)
+    assert result.batch_rtts == (2.0,) * 4
+    assert result.reachable
+
+
+def test_load_targets_cidr_and_file(tmp_path):
+    assert load_targets("192.168.1.0/30") == ["192.168.1.1", "192.168.1.2"]
+    target_file = tmp_path / "targets.txt"
+    target_file.write_text("# fleet\n8.8.8.8\n\n10.0.0.0/31  # link\n8.8.8.8\n")
+    assert load_targets(str(target_file)) == ["8.8.8.8", "10.0.0.0", "10.0.0.1"]
+    with pytest.raises(ValueError):
+        load_targets("10.0.0.0/16", max_hosts=256)
+
+
+def test_run_ping_sweep(monkeypatch):
     monkeypatch.setattr(
-        "network.ping.IP", lambda dst: type("Dummy", (), {"sent_time": 1})()
+        "network.ping.ping3_ping",
+        lambda addr, unit, timeout: 7 if addr != "10.0.0.2" else None,
     )
-    monkeypatch.setattr("network.ping.ICMP", lambda: None)
+    targets = ["10.0.0.1", "10.0.0.2", "invalid_address", "10.0.0.3"]
+    rows = run_ping_sweep(targets, DummyLogger(), "linux", max_workers=2, timeout=1)
+    assert [row[1] for row in rows] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert [row[2] for row in rows] == [7, "", 7]
+    assert all(len(row) == len(PING_CSV_HEADER) for row in rows)
 
-    logger = DummyLogger()
-    os_type = "linux"
-    run_ping_diag("8.8.8.8", logger, os_type, advanced=True, csvfile="test_ping.csv")
+
+def test_scapy_batch_probe_matches_by_seq(monkeypatch):
+    _mock_scapy(monkeypatch, lost={1, 4})
+    rtts = _scapy_batch_probe("8.8.8.8", 6, timeout=1)
+    assert rtts == [2.0, "", 2.0, 2.0, "", 2.0]
+
+
+def test_run_ping_diag_configurable_scapy_count(monkeypatch, tmp_path):
+    monkeypatch.setattr("network.ping.ping3_ping", lambda addr, unit: 52)
+    monkeypatch.setattr("network.ping.pingparsing", None)
+    _mock_scapy(monkeypatch)
+    monkeypatch.chdir(tmp_path)
+    run_ping_diag(
+        "8.8.8.8",
+        DummyLogger(),
+        "linux",
+        advanced=True,
+        csvfile="out.csv",
+        scapy_count=6,
+    )
+    header, row = (tmp_path / "out.csv").read_text().splitlines()
+    assert header.split(",")[-1] == "scapy_ping_6_ms"
+    assert row.split(",")[-6:] == ["2.0"] * 6
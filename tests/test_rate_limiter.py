@@ -0,0 +1,207 @@
+# tests/test_rate_limiter.py - Test coverage per security/rate_limiter.py
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from cli.cli import CliMenu
+from config.config_manager import ConfigManager, SecuritySettings
+from network import dns_async
+from network.ping import _transport_batch_probe
+from security import rate_limiter
+from security.rate_limiter import (
+    ProbeBudget,
+    TokenBucket,
+    athrottle,
+    budget_from_settings,
+    configure_budget,
+    set_budget,
+    throttle,
+)
+
+
+class DummyLogger:
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def budget():
+    """Installa un budget di processo e ripristina il precedente a fine test."""
+    previous = rate_limiter.get_budget()
+
+    def install(**kwargs):
+        set_budget(ProbeBudget(**kwargs))
+        return rate_limiter.get_budget()
+
+    yield install
+    set_budget(previous)
+
+
+def test_token_bucket_burst_then_paced():
+    bucket = TokenBucket(rate=10, capacity=3, now=0.0)
+    assert [bucket.reserve(1, 0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Senza token: ogni probe successivo è distanziato di 1/rate
+    assert bucket.reserve(1, 0.0) == pytest.approx(0.1)
+    assert bucket.reserve(1, 0.0) == pytest.approx(0.2)
+    # Rientro del debito nel tempo, mai oltre la capacità
+    assert bucket.reserve(1, 10.0) == 0.0
+    assert bucket.tokens == pytest.approx(2.0)
+
+
+def test_token_bucket_invalid():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1, now=0.0)
+
+
+def test_probe_budget_per_target_and_global():
+    clock = FakeClock()
+    budget = ProbeBudget(rate=100, burst=4, target_rate=10, target_burst=2, clock=clock)
+    assert budget.reserve("10.0.0.1") == 0.0
+    assert budget.reserve("10.0.0.1") == 0.0
+    # Target esaurito: attesa dal bucket per target
+    assert budget.reserve("10.0.0.1") == pytest.approx(0.1)
+    # Altro target: libero, ma il bucket globale ha un solo token rimasto
+    assert budget.reserve("10.0.0.2") == 0.0
+    assert budget.reserve("10.0.0.3") == pytest.approx(0.01)
+    clock.now = 1.0
+    assert budget.reserve("10.0.0.1") == 0.0
+
+
+def test_dns_keys_skip_per_target_bucket():
+    clock = FakeClock()
+    budget = ProbeBudget(
+        rate=1000, burst=100, target_rate=1, target_burst=1, clock=clock
+    )
+    # Default: query DNS limitate solo dal budget globale
+    assert [budget.reserve("dns:127.0.0.1") for _ in range(50)] == [0.0] * 50
+    assert budget.tracked() == 0
+    limited = ProbeBudget(dns_rate=10, dns_burst=2, clock=clock)
+    assert [limited.reserve("dns:127.0.0.1") for _ in range(3)] == [
+        0.0,
+        0.0,
+        pytest.approx(0.1),
+    ]
+
+
+def test_probe_budget_reserve_many():
+    clock = FakeClock()
+    budget = ProbeBudget(rate=10, burst=2, target_rate=10, target_burst=5, clock=clock)
+    # Tre probe insieme sul globale (burst 2): attesa di un intervallo
+    assert budget.reserve_many(["a", "b", "c"]) == pytest.approx(0.1)
+    assert budget.tracked() == 3
+
+
+def test_probe_budget_evicts_oldest_target():
+    budget = ProbeBudget(max_targets=2, clock=FakeClock())
+    for target in ("a", "b", "c"):
+        budget.reserve(target)
+    assert budget.tracked() == 2
+    assert list(budget._targets) == ["b", "c"]
+
+
+def test_budget_from_settings():
+    assert budget_from_settings(SecuritySettings(probe_rate=0)) is None
+    assert budget_from_settings(SecuritySettings(dns_rate=200)).dns_rate == 200.0
+    budget = budget_from_settings(
+        SecuritySettings(probe_rate=50, target_rate=5, target_burst=1)
+    )
+    assert budget.target_rate == 5.0
+    with pytest.raises(ValueError):
+        SecuritySettings(target_burst=0).validate()
+    SecuritySettings(probe_rate=0, target_burst=0).validate()
+
+
+def test_configure_budget_follows_config_reload(tmp_path):
+    previous = rate_limiter.get_budget()
+    ini = tmp_path / "config.ini"
+    ini.write_text("[security]\ntarget_rate = 5\n")
+    config = ConfigManager(str(ini))
+    try:
+        first = configure_budget(config.settings.security)
+        assert first.target_rate == 5.0
+        # Stessi parametri: il budget in uso (e i suoi bucket) resta
+        assert configure_budget(config.settings.security) is first
+
+        ini.write_text("[security]\ntarget_rate = 7\ndns_rate = 30\n")
+        stat = ini.stat()
+        os.utime(ini, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        menu = CliMenu(config, DummyLogger(), "linux")
+        menu.reload_config()
+        budget = rate_limiter.get_budget()
+        assert budget is not first
+        assert (budget.target_rate, budget.dns_rate) == (7.0, 30.0)
+
+        ini.write_text("[security]\nprobe_rate = 0\n")
+        stat = ini.stat()
+        os.utime(ini, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        menu.reload_config()
+        assert rate_limiter.get_budget() is None
+    finally:
+        set_budget(previous)
+
+
+def test_throttle_sleeps_for_reserved_delay(budget, monkeypatch):
+    budget(rate=1000, burst=100, target_rate=10, target_burst=1, clock=FakeClock())
+    slept = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", slept.append)
+    assert throttle("10.0.0.1") == 0.0
+    assert throttle("10.0.0.1", 2) == pytest.approx(0.2)
+    assert slept == [pytest.approx(0.2)]
+
+
+def test_throttle_disabled():
+    previous = set_budget(None)
+    try:
+        assert throttle("10.0.0.1", 100) == 0.0
+        assert asyncio.run(athrottle("10.0.0.1", 100)) == 0.0
+    finally:
+        set_budget(previous)
+
+
+def test_transport_batch_paced_per_echo(budget, monkeypatch):
+    budget(rate=1000, burst=100, target_rate=100, target_burst=1)
+    sent = []
+
+    class DummyTransport:
+        def send(self, address):
+            sent.append(time.monotonic())
+            return len(sent)
+
+        def wait(self, probe, timeout):
+            return 1.0
+
+    _transport_batch_probe(DummyTransport(), "10.0.0.1", 4)
+    # Echo distanziati di ~1/target_rate invece che a raffica
+    assert sent[-1] - sent[0] >= 0.025
+
+
+def test_dns_queries_paced(budget, dns_stub):
+    server = dns_stub({("paced.test", "A"): ["192.0.2.1"]})
+    budget(rate=1000, burst=100, target_rate=1, dns_rate=50, dns_burst=1)
+    start = time.monotonic()
+    results = asyncio.run(
+        dns_async.diagnose_many(
+            ["paced.test"] * 4,
+            ["A"],
+            dns_timeout=2,
+            nameservers=["127.0.0.1"],
+            port=server.port,
+        )
+    )
+    assert all(r["ip"] == "192.0.2.1" for r in results)
+    # Stesso nameserver: le query non partono tutte insieme
+    assert time.monotonic() - start >= 0.05
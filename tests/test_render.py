@@ -0,0 +1,67 @@
+# tests/test_render.py - Test coverage per cli/render.py
+from cli.render import (
+    render_dns,
+    render_ping,
+    render_speedtest,
+    render_traceroute,
+    rendered,
+)
+from network.dns_utils import DnsResult
+from network.ping import PingResult
+from network.speedtest import SpeedtestResult
+from network.traceroute import Hop, TracerouteResult
+
+
+def test_render_ping(capsys):
+    row = ["2024-01-01 00:00:00", "8.8.8.8", 12.5, 10, 12, 15, 0.0, 11.0, ""]
+    result = PingResult.from_row(row)
+    assert result.batch_rtts == (11.0, None)
+    render_ping(result)
+    out = capsys.readouterr().out
+    assert "RTT: 12.5 ms" in out
+    assert "Burst min/avg/max 10/12/15 ms, loss 0.0%" in out
+    assert "Batch: 11.0 ms, timeout" in out
+
+
+def test_render_ping_unreachable(capsys):
+    result = PingResult.from_row(["ts", "10.0.0.1", "", "", "", "", "", ""])
+    assert not result.reachable
+    render_ping(result)
+    assert "RTT: timeout" in capsys.readouterr().out
+
+
+def test_render_traceroute(capsys):
+    render_traceroute(
+        TracerouteResult("8.8.8.8", (Hop("10.0.0.1", 1.5), Hop("*", None)))
+    )
+    assert capsys.readouterr().out.splitlines() == [
+        "--- Traceroute ---",
+        "10.0.0.1 (1.5 ms)",
+        "* (timeout)",
+    ]
+
+
+def test_render_dns_failure(capsys):
+    render_dns(DnsResult("example.test", None, None, {}, {"A": "NXDOMAIN"}))
+    assert "ERRORE: DNS fallito, vedi log." in capsys.readouterr().out
+
+
+def test_render_speedtest(capsys):
+    render_speedtest(SpeedtestResult(25e6, 5e6, 12.3, "1"))
+    out = capsys.readouterr().out
+    assert "Download: 25.00 Mbps" in out
+    assert "Ping:     12.3 ms" in out
+
+
+def test_render_none_prints_nothing(capsys):
+    for render in (render_ping, render_traceroute, render_dns, render_speedtest):
+        render(None)
+    assert capsys.readouterr().out == ""
+
+
+def test_rendered_stages(capsys):
+    result = DnsResult("example.test", "192.0.2.1", None, {}, {})
+    stages = rendered({"dns": lambda addr: result, "custom": lambda addr: 1})
+    assert stages["dns"]("example.test") is result
+    assert stages["custom"]("example.test") == 1
+    assert "example.test -> 192.0.2.1" in capsys.readouterr().out
@@ -0,0 +1,234 @@
+# tests/test_scheduler.py - Test coverage per scheduler/scheduler.py
+import configparser
+import os
+import threading
+
+import pytest
+
+from config.config_manager import ConfigManager, parse_settings
+from scheduler.scheduler import Job, JobRunner, Scheduler, load_jobs, next_deadline
+
+
+class DummyLogger:
+    def __init__(self):
+        self.warnings = []
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        self.warnings.append(msg)
+
+    def error(self, msg, exc_info=False):
+        pass
+
+    def event(self, name, level="info", **fields):
+        pass
+
+
+class DummyConfig:
+    def __init__(self, sections):
+        self._sections = sections
+
+    def sections(self):
+        return list(self._sections)
+
+    def get(self, section, key, fallback=None):
+        return self._sections.get(section, {}).get(key, fallback)
+
+    def getfloat(self, section, key, fallback=None):
+        return float(self._sections.get(section, {}).get(key, fallback))
+
+    def getint(self, section, key, fallback=None):
+        return int(self._sections.get(section, {}).get(key, fallback))
+
+    @property
+    def settings(self):
+        parser = configparser.ConfigParser()
+        parser.read_dict(self._sections)
+        return parse_settings(parser)
+
+
+def test_load_jobs_from_sections():
+    config = DummyConfig(
+        {
+            "network": {"timeout": "2"},
+            "job:ping": {
+                "action": "ping",
+                "targets": "8.8.8.8, 1.1.1.1",
+                "interval": "5",
+            },
+            "job:stats": {"action": "STATS", "interval": "0.5"},
+        }
+    )
+    jobs = load_jobs(config)
+    assert [(j.name, j.action, j.targets, j.interval) for j in jobs] == [
+        ("ping", "ping", ["8.8.8.8", "1.1.1.1"], 5.0),
+        ("stats", "stats", [], 0.5),
+    ]
+
+
+@pytest.mark.parametrize(
+    "section",
+    [
+        {"action": "speedtest", "interval": "5"},
+        {"action": "ping", "targets": "8.8.8.8", "interval": "0"},
+        {"action": "dns", "interval": "5"},
+    ],
+)
+def test_load_jobs_rejects_invalid(section):
+    with pytest.raises(ValueError):
+        load_jobs(DummyConfig({"job:bad": section}))
+
+
+def test_next_deadline_anchored_and_skips_missed_ticks():
+    # In orario: ancorata alla scadenza precedente, non all'ora corrente
+    assert next_deadline(10.0, 5.0, 10.7) == 15.0
+    # In ritardo di oltre due intervalli: nessuna raffica di recupero
+    assert next_deadline(10.0, 5.0, 22.0) == 25.0
+
+
+class FakeClock:
+    """Orologio finto: sleep() avanza il tempo, stop() dopo un numero di risvegli."""
+
+    def __init__(self, wakeups, before_sleep=None):
+        self.now = 100.0
+        self.wakeups = []
+        self.limit = wakeups
+        self.before_sleep = before_sleep
+        self.scheduler = None
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if self.before_sleep is not None:
+            self.before_sleep(self)
+        self.now += seconds
+        self.wakeups.append(self.now)
+        if len(self.wakeups) == self.limit:
+            self.scheduler.stop()
+
+
+def _wait_jobs(clock):
+    # Job terminati prima di avanzare il tempo: niente sovrapposizioni casuali
+    for job in clock.scheduler.jobs:
+        if job.future is not None:
+            job.future.result()
+
+
+def test_scheduler_runs_and_stops_cleanly():
+    clock = FakeClock(5, before_sleep=_wait_jobs)
+    calls = []
+    job = Job("stats", "stats", [], 0.25)
+    scheduler = Scheduler(
+        [job],
+        lambda j: calls.append(clock()),
+        DummyLogger(),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    clock.scheduler = scheduler
+    scheduler.run()
+    # Risvegli esattamente sulle scadenze, nessuna deriva
+    assert clock.wakeups == [100.25, 100.5, 100.75, 101.0, 101.25]
+    # Un'esecuzione per scadenza, l'ultima prima dello stop
+    assert calls == [100.0, 100.25, 100.5, 100.75, 101.0]
+    assert job.runs == 5 and job.skipped == 0
+
+
+def test_scheduler_skips_overlapping_runs():
+    release = threading.Event()
+    logger = DummyLogger()
+    # Job bloccato fino all'ultimo risveglio (stop): ogni tick lo trova in corso
+    clock = FakeClock(4, before_sleep=lambda c: len(c.wakeups) == 3 and release.set())
+    job = Job("slow", "ping", ["8.8.8.8"], 0.5)
+    scheduler = Scheduler(
+        [job],
+        lambda j: release.wait(),
+        logger,
+        max_workers=2,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    clock.scheduler = scheduler
+    scheduler.run()
+    # Una sola esecuzione: i tick 100.5, 101.0 e 101.5 trovano il job ancora in corso
+    assert clock.wakeups == [100.5, 101.0, 101.5, 102.0]
+    assert job.runs == 1
+    assert job.skipped == 3
+    assert len(logger.warnings) == 3
+
+
+def test_job_runner_adaptive_keeps_monitor_per_target(monkeypatch):
+    probes = []
+    monkeypatch.setattr(
+        "scheduler.scheduler.cheap_probe",
+        lambda addr, logger, timeout, store, transport: probes.append(addr) or 5.0,
+    )
+    config = DummyConfig({"adaptive": {"stages": "dns"}})
+    runner = JobRunner(config, DummyLogger(), "linux")
+    job = Job("watch", "adaptive", ["10.0.0.1", "invalid_address", "10.0.0.2"], 1)
+    for _ in range(3):
+        runner(job)
+    assert probes == ["10.0.0.1", "10.0.0.2"] * 3
+    assert [m.probes for m in runner._monitors.values()] == [3, 3]
+    runner.close()
+    assert not runner._monitors
+
+
+def test_job_runner_adaptive_follows_config_changes(monkeypatch):
+    monkeypatch.setattr(
+        "scheduler.scheduler.cheap_probe",
+        lambda addr, logger, timeout, store, transport: 5.0,
+    )
+    config = DummyConfig({"adaptive": {"stages": "dns", "window": "20"}})
+    runner = JobRunner(config, DummyLogger(), "linux")
+    job = Job("watch", "adaptive", ["10.0.0.1", "10.0.0.2"], 1)
+    runner(job)
+    first = dict(runner._monitors)
+
+    # Soglie cambiate: monitor ricreati con i nuovi parametri
+    config._sections["adaptive"]["window"] = "5"
+    runner(job)
+    assert all(runner._monitors[key] is not first[key] for key in first)
+    assert [m.window.samples.maxlen for m in runner._monitors.values()] == [5, 5]
+
+    # Target rimosso dal job ricaricato: il suo monitor viene chiuso
+    closed = []
+    removed = runner._monitors[("watch", "10.0.0.2")]
+    monkeypatch.setattr(removed, "close", lambda wait=True: closed.append(wait))
+    runner.prune([Job("watch", "adaptive", ["10.0.0.1"], 1)])
+    assert list(runner._monitors) == [("watch", "10.0.0.1")]
+    assert closed == [False]
+    runner.close()
+
+
+def test_scheduler_reloads_jobs_on_config_change(tmp_path):
+    ini = tmp_path / "config.ini"
+    ini.write_text("[job:a]\naction = stats\ninterval = 0.05\n")
+    config = ConfigManager(str(ini))
+    calls = []
+    scheduler = Scheduler(
+        load_jobs(config),
+        lambda j: calls.append(j.name),
+        DummyLogger(),
+        config=config,
+    )
+
+    def rewrite():
+        ini.write_text(
+            "[job:a]\naction = stats\ninterval = 0.05\n"
+            "[job:b]\naction = stats\ninterval = 0.05\n"
+        )
+        # mtime diverso anche su filesystem a bassa risoluzione
+        stat = ini.stat()
+        os.utime(ini, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    threading.Timer(0.15, rewrite).start()
+    threading.Timer(0.5, scheduler.stop).start()
+    scheduler.run()
+    assert [job.name for job in scheduler.jobs] == ["a", "b"]
+    assert "b" in calls
+    # Il job esistente conserva il conteggio delle esecuzioni
+    assert scheduler.jobs[0].runs == calls.count("a")
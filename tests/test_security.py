@@ -0,0 +1,70 @@
+# tests/test_security.py - Test coverage per security/security.py
+
+import pytest
+
+from security.security import _cached_check, validate_address, validate_many
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        "8.8.8.8",
+        "255.255.255.255",
+        "0.0.0.0",
+        "::1",
+        "2001:4860:4860::8888",
+        "fe80::1%eth0",
+        "google.com",
+        "sub-domain.example.co.uk",
+    ],
+)
+def test_validate_address_valid(address):
+    assert validate_address(address)
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        "999.1.1.1",
+        "1.2.3",
+        "01.2.3.4",
+        "8.8.8.8\n",
+        "8.8.8.8; rm -rf /",
+        "2001:db8::g",
+        ":::",
+        "::1%$(id)",
+        "fe80::1%a b",
+        "::1%\n",
+        "::1\n",
+        "fe80::1%",
+        "-bad.com",
+        "localhost",
+        "a" * 250 + ".com",
+        "",
+        None,
+        42,
+    ],
+)
+def test_validate_address_invalid(address):
+    assert not validate_address(address)
+
+
+def test_validate_address_cached():
+    _cached_check.cache_clear()
+    assert validate_address("example.org")
+    assert validate_address("example.org")
+    info = _cached_check.cache_info()
+    assert info.hits == 1 and info.misses == 1
+
+
+def test_validate_many_aligned_with_input():
+    targets = ["10.0.0.1", "999.0.0.1", "::1", "10.0.0.1", "bad_host", None, ["x"]]
+    assert validate_many(targets) == [True, False, True, True, False, False, False]
+    scoped = ["fe80::1%eth0", "::1%$(id)", "fe80::1%a b", "::1%\n"]
+    assert validate_many(scoped) == [True, False, False, False]
+
+
+def test_validate_many_bypasses_lru():
+    _cached_check.cache_clear()
+    validate_many([f"10.0.{i // 256}.{i % 256}" for i in range(1000)])
+    assert _cached_check.cache_info().currsize == 0
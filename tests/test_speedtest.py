@@ -1,7 +1,18 @@
 # tests/test_speedtest.py - Test coverage per network/speedtest.py
 
+import json
+import time
+from typing import Any, List, Tuple
 
-from network.speedtest import run_speedtest_diag
+from network.speedtest import SpeedtestCache, SpeedtestResult, run_speedtest_diag
+
+SERVERS = {
+    12.5: [{"id": "1", "d": 12.5, "url": "http://a/upload.php"}],
+    40.0: [
+        {"id": "2", "d": 40.0, "url": "http://b/upload.php"},
+        {"id": "3", "d": 40.0, "url": "http://c/upload.php"},
+    ],
+}
 
 
 class DummyLogger:
@@ -15,28 +26,148 @@ class DummyLogger:
         pass
 
 
-def test_run_speedtest_diag_success(monkeypatch):
-    class DummySpeedtest:
-        def get_best_server(self):
-            pass
+class DummySpeedtest:
+    instances = 0
+    calls: List[Tuple[str, Any]] = []
+
+    def __init__(self):
+        DummySpeedtest.instances += 1
+        self.servers = {}
+
+    def get_servers(self, servers=None):
+        DummySpeedtest.calls.append(("get_servers", servers))
+        if servers:
+            ids = {str(s) for s in servers}
+            self.servers = {
+                d: [s for s in group if s["id"] in ids]
+                for d, group in SERVERS.items()
+                if any(s["id"] in ids for s in group)
+            }
+        else:
+            self.servers = SERVERS
 
-        def download(self):
-            return 1e6
+    def get_closest_servers(self, limit=5):
+        return [s for group in self.servers.values() for s in group][:limit]
 
-        def upload(self):
-            return 2e6
+    def get_best_server(self, servers=None):
+        DummySpeedtest.calls.append(("get_best_server", [s["id"] for s in servers]))
+        # Latenza diversa a ogni misura, come un server reale
+        return dict(servers[0], latency=10 + len(DummySpeedtest.calls))
 
-        class results:
-            ping = 10
+    def download(self):
+        return 1e6
 
+    def upload(self):
+        return 2e6
+
+    class results:
+        ping = 10
+
+
+def _install(monkeypatch):
+    DummySpeedtest.instances = 0
+    DummySpeedtest.calls = []
     monkeypatch.setattr(
         "network.speedtest.speedtest", type("Dummy", (), {"Speedtest": DummySpeedtest})
     )
+
+
+def test_run_speedtest_diag_success(monkeypatch):
+    _install(monkeypatch)
     logger = DummyLogger()
-    run_speedtest_diag(logger, max_attempts=1)
+    result = run_speedtest_diag(logger, max_attempts=1)
+    assert result == SpeedtestResult(1e6, 2e6, 10, "1")
+    assert DummySpeedtest.calls == [
+        ("get_servers", None),
+        ("get_best_server", ["1", "2", "3"]),
+    ]
 
 
 def test_run_speedtest_diag_fail(monkeypatch):
     monkeypatch.setattr("network.speedtest.speedtest", None)
     logger = DummyLogger()
-    run_speedtest_diag(logger, max_attempts=1)
+    assert run_speedtest_diag(logger, max_attempts=1) is None
+
+
+def test_speedtest_cache_reuses_best_server(monkeypatch, tmp_path):
+    _install(monkeypatch)
+    cache_file = tmp_path / "speedtest_cache.json"
+    run_speedtest_diag(DummyLogger(), max_attempts=1, cache_file=str(cache_file))
+    saved = json.loads(cache_file.read_text())
+    assert saved["best"]["id"] == "1"
+    assert len(saved["servers"]) == 3
+
+    DummySpeedtest.calls = []
+    run_speedtest_diag(DummyLogger(), max_attempts=1, cache_file=str(cache_file))
+    # Niente download della lista, latenza misurata solo sul server in cache
+    assert DummySpeedtest.calls == [("get_best_server", ["1"])]
+    # Stesso server migliore: cache non riscritta
+    assert json.loads(cache_file.read_text()) == saved
+
+
+def test_speedtest_cache_expired(monkeypatch, tmp_path):
+    _install(monkeypatch)
+    cache_file = tmp_path / "speedtest_cache.json"
+    cache = SpeedtestCache(str(cache_file), ttl=60)
+    cache.save([{"id": "9", "d": 1.0}], {"id": "9", "d": 1.0})
+    assert cache.load()["best"]["id"] == "9"
+
+    later = time.time() + 120
+    monkeypatch.setattr("network.speedtest.time.time", lambda: later)
+    assert cache.load() is None
+    run_speedtest_diag(
+        DummyLogger(), max_attempts=1, cache_file=str(cache_file), cache_ttl=60
+    )
+    assert DummySpeedtest.calls[0] == ("get_servers", None)
+
+
+def test_speedtest_cache_corrupted(tmp_path):
+    cache_file = tmp_path / "speedtest_cache.json"
+    cache_file.write_text("{non json")
+    assert SpeedtestCache(str(cache_file)).load() is None
+
+
+def test_speedtest_pinned_server(monkeypatch, tmp_path):
+    _install(monkeypatch)
+    run_speedtest_diag(DummyLogger(), max_attempts=1, server_id="3")
+    assert DummySpeedtest.calls == [
+        ("get_servers", [3]),
+        ("get_best_server", ["3"]),
+    ]
+
+    # Con lista in cache il server fissato non richiede download
+    cache_file = tmp_path / "speedtest_cache.json"
+    SpeedtestCache(str(cache_file)).save(
+        [s for group in SERVERS.values() for s in group], {"id": "1", "d": 12.5}
+    )
+    DummySpeedtest.calls = []
+    run_speedtest_diag(
+        DummyLogger(), max_attempts=1, cache_file=str(cache_file), server_id="3"
+    )
+    assert DummySpeedtest.calls == [("get_best_server", ["3"])]
+
+
+def test_speedtest_retry_reuses_client_and_drops_cache(monkeypatch, tmp_path):
+    _install(monkeypatch)
+    failures = []
+
+    def flaky_download(self):
+        if not failures:
+            failures.append(1)
+            raise OSError("server non raggiungibile")
+        return 1e6
+
+    monkeypatch.setattr(DummySpeedtest, "download", flaky_download)
+    cache_file = tmp_path / "speedtest_cache.json"
+    SpeedtestCache(str(cache_file)).save(
+        [s for group in SERVERS.values() for s in group], {"id": "2", "d": 40.0}
+    )
+    run_speedtest_diag(DummyLogger(), max_attempts=2, cache_file=str(cache_file))
+    assert DummySpeedtest.instances == 1
+    # Secondo tentativo: cache scartata, selezione completa
+    assert DummySpeedtest.calls == [
+        ("get_best_server", ["2"]),
+        ("get_servers", None),
+        ("get_best_server", ["1", "2", "3"]),
+    ]
+    assert json.loads(cache_file.read_text())["best"]["id"] == "1"
@@ -1,7 +1,16 @@
 # tests/test_stats.py - Test coverage per network/stats.py
+from array import array
+from collections import namedtuple
 
-
-from network.stats import run_stats_diag
+from cli.render import render_stats
+from network.stats import (
+    COUNTER_FIELDS,
+    CounterRing,
+    InterfaceCounters,
+    InterfaceSampler,
+    run_stats_diag,
+    run_stats_sampling_diag,
+)
 
 
 class DummyLogger:
@@ -14,27 +23,109 @@ class DummyLogger:
     def error(self, msg, exc_info=False):
         pass
 
+    def event(self, name, level="info", **fields):
+        pass
 
-def test_run_stats_diag(monkeypatch):
-    class DummyStats:
-        bytes_sent = 100
-        bytes_recv = 200
-        packets_sent = 5
-        packets_recv = 6
-        errin = 0
-        errout = 0
-        dropin = 0
-        dropout = 0
 
+def test_run_stats_diag(monkeypatch, capsys):
+    # Stessa forma di psutil: namedtuple snetio
+    DummyStats = namedtuple("snetio", COUNTER_FIELDS)
+    monkeypatch.setattr("network.netdev.PROC_NET_DEV", "/nonexistent/net/dev")
     monkeypatch.setattr(
         "network.stats.psutil",
-        type("Dummy", (), {"net_io_counters": lambda pernic: {"eth0": DummyStats()}}),
+        type(
+            "Dummy",
+            (),
+            {
+                "net_io_counters": lambda pernic: {
+                    "eth0": DummyStats(100, 200, 5, 6, 0, 0, 0, 0)
+                }
+            },
+        ),
     )
     logger = DummyLogger()
-    run_stats_diag(logger)
+    interfaces = run_stats_diag(logger)
+    assert interfaces == [InterfaceCounters("eth0", 100, 200, 5, 6, 0, 0, 0, 0)]
+    assert interfaces[0].bytes_recv == 200
+    render_stats(interfaces)
+    assert "eth0: Bytes sent=100, recv=200" in capsys.readouterr().out
+
+
+def test_interface_counters_match_counter_fields():
+    assert InterfaceCounters._fields[1:] == COUNTER_FIELDS
 
 
-def test_run_stats_diag_no_module(monkeypatch):
+def test_run_stats_diag_no_module(monkeypatch, capsys):
+    monkeypatch.setattr("network.netdev.PROC_NET_DEV", "/nonexistent/net/dev")
     monkeypatch.setattr("network.stats.psutil", None)
     logger = DummyLogger()
     run_stats_diag(logger)
+    assert "ERRORE" in capsys.readouterr().out
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_counter_ring_is_fixed_size():
+    ring = CounterRing(size=4)
+    for i in range(10):
+        ring.append(float(i), [i] * 8)
+    assert ring.count == 4
+    assert len(ring.times) == 4 and len(ring.values) == 32
+    assert ring.sample(0) == (9.0, array("Q", [9] * 8))
+    assert ring.sample(3)[0] == 6.0
+
+
+def test_interface_sampler_rates():
+    clock = FakeClock()
+    counters = {"eth0": [0, 0, 0, 0, 0, 0, 0, 0], "veth1": [5] * 8}
+    sampler = InterfaceSampler(lambda: counters, history=8, clock=clock)
+    sampler.sample()
+    assert sampler.rates() == {}
+
+    clock.now = 0.5
+    counters = {
+        "eth0": [1000, 2000, 10, 20, 1, 1, 0, 3],
+        "veth1": [4] * 8,  # contatori azzerati: nessun rateo
+    }
+    sampler.sample()
+    rates = sampler.rates()
+    assert set(rates) == {"eth0"}
+    assert rates["eth0"]["bps_sent"] == 16000
+    assert rates["eth0"]["bps_recv"] == 32000
+    assert rates["eth0"]["pps_recv"] == 40
+    assert rates["eth0"]["errors_per_s"] == 4
+    assert rates["eth0"]["drops_per_s"] == 6
+
+    # Interfaccia scomparsa: ring buffer rimosso
+    clock.now = 1.0
+    counters = {"eth0": [3000, 2000, 30, 20, 1, 1, 0, 3]}
+    sampler.sample()
+    assert set(sampler.rings) == {"eth0"}
+    assert sampler.rates(window=2)["eth0"]["bps_sent"] == 24000
+
+
+def test_run_stats_sampling_diag(capsys):
+    clock = FakeClock()
+    reads = []
+
+    def read_counters():
+        n = len(reads)
+        reads.append(n)
+        clock.now = n * 0.01
+        return {"eth0": [n * 100, n * 50, n, n, 0, 0, 0, 0], "lo": [0] * 8}
+
+    sampler = InterfaceSampler(read_counters, history=16, clock=clock)
+    rates = run_stats_sampling_diag(
+        DummyLogger(), interval=0.01, duration=0.05, sampler=sampler
+    )
+    assert len(reads) == 6
+    assert round(rates["eth0"]["bps_sent"]) == 80000
+    assert rates["lo"]["bps_sent"] == 0
+    out = capsys.readouterr().out
+    assert out.index("eth0:") < out.index("lo:")
@@ -1,7 +1,13 @@
 # tests/test_traceroute.py - Test coverage per network/traceroute.py
 
 
-from network.traceroute import run_traceroute_diag
+from cli.render import render_topology
+from network.traceroute import (
+    Hop,
+    TracerouteResult,
+    run_multi_traceroute_diag,
+    run_traceroute_diag,
+)
 
 
 class DummyLogger:
@@ -14,6 +20,9 @@ class DummyLogger:
     def error(self, msg, exc_info=False):
         pass
 
+    def event(self, name, level="info", **fields):
+        pass
+
 
 def test_run_traceroute_diag_valid(monkeypatch):
     # Mock traceroute function
@@ -29,10 +38,58 @@ def test_run_traceroute_diag_valid(monkeypatch):
 
     monkeypatch.setattr("network.traceroute.traceroute", dummy_traceroute)
     logger = DummyLogger()
-    run_traceroute_diag("8.8.8.8", logger, "linux", max_hops=3, timeout=1)
+    result = run_traceroute_diag("8.8.8.8", logger, "linux", max_hops=3, timeout=1)
+    assert result == TracerouteResult("8.8.8.8", (Hop("1.2.3.4", 1000),))
 
 
 def test_run_traceroute_diag_invalid(monkeypatch):
     monkeypatch.setattr("network.traceroute.traceroute", None)
     logger = DummyLogger()
-    run_traceroute_diag("invalid_address", logger, "linux", max_hops=3, timeout=1)
+    assert (
+        run_traceroute_diag("invalid_address", logger, "linux", max_hops=3, timeout=1)
+        is None
+    )
+
+
+def test_run_multi_traceroute_diag_shared_hops(monkeypatch, capsys):
+    # Due destinazioni che condividono i primi due hop (r1, r2)
+    routes = {
+        "10.0.0.4": ["192.0.2.1", "192.0.2.2", "198.51.100.3", "10.0.0.4"],
+        "10.0.1.5": [
+            "192.0.2.1",
+            "192.0.2.2",
+            "203.0.113.3",
+            "203.0.113.4",
+            "10.0.1.5",
+        ],
+    }
+    probed = []
+
+    def dummy_probe_ttl(destinations, ttl, timeout):
+        probed.extend((dst, ttl) for dst in destinations)
+        results = {}
+        for dst in destinations:
+            route = routes[dst]
+            hop = route[min(ttl, len(route)) - 1]
+            results[dst] = (hop, float(ttl), hop == dst)
+        return results
+
+    for name in ("sr", "IP", "ICMP"):
+        monkeypatch.setattr(f"network.traceroute.{name}", object())
+    monkeypatch.setattr("network.traceroute._probe_ttl", dummy_probe_ttl)
+
+    topology = run_multi_traceroute_diag(
+        ["10.0.0.4", "10.0.1.5", "invalid_address"], DummyLogger(), "linux"
+    )
+    for dst, route in routes.items():
+        path = topology.paths[dst]
+        assert [path[ttl][0] for ttl in sorted(path)] == route
+    # Il tratto condiviso viene sondato una sola volta sotto il TTL di partenza
+    assert ("10.0.1.5", 1) not in probed
+    assert topology.probes_sent == len(probed) == 8
+    assert topology.graph["192.0.2.2"] == {"198.51.100.3", "203.0.113.3"}
+    assert len(topology.hops()) == 7
+    render_topology(topology)
+    out = capsys.readouterr().out
+    assert "--- Traceroute 10.0.1.5 (10.0.1.5) ---" in out
+    assert "Hop unici: 7 | Probe inviati: 8" in out